@@ -1,29 +1,52 @@
 import asyncio
+import itertools
+import warnings
 from asyncio import get_event_loop, Task
+from collections import OrderedDict
 from logging import getLogger, Logger
+from random import Random
 from typing import List, Callable, Any, Union
 
+from aiohttp import ClientError, ClientSession, TCPConnector
 from dirty_loader.factories import BaseFactory
-from functools import wraps
+from functools import partial, wraps
 from service_client import ServiceClient
 from service_client.factories import load_spec_by_spec_loader
 from service_client.plugins import PathTokens, Headers, BasePlugin
 from service_client.utils import build_parameter_object
 
 from dirty_models.models import BaseModel
-from .formatters import telegram_encoder, telegram_decoder
-from .messages import Update, SendMessageRequest, GetUpdatesRequest, SendLocationRequest, AnswerInlineQueryRequest, \
-    AnswerCallbackQueryRequest, SendPhotoRequest, Message, User, File, UserProfilePhotos, Chat, ChatMember, \
+from .broadcast import Broadcast
+from .uploads import BulkUpload
+from .cache import TTLCache
+from .commands import CommandRouter, CommandRoute, Command
+from .dispatchers import BaseDispatcher
+from .downloads import FileChunks, download_to, DEFAULT_CHUNK_SIZE
+from .formatters import telegram_encoder, telegram_decoder, contains_file, close_files, RequestTemplate
+from .plugins import DedicatedSession
+from .messages import Update, LazyUpdate, SendMessageRequest, GetUpdatesRequest, SendLocationRequest, \
+    AnswerInlineQueryRequest, AnswerCallbackQueryRequest, SendPhotoRequest, Message, User, File, UserProfilePhotos, \
+    Chat, ChatMember, \
     GetFileRequest, GetUserProfilePhotoRequest, SetWebhookRequest, SendVideoRequest, SendAudioRequest, \
     SendDocumentRequest, SendStickerRequest, SendVoiceRequest, SendVenueRequest, SendContactRequest, \
     SendChatActionRequest, EditMessageTextRequest, EditMessageCaptionRequest, EditMessageReplyMarkupRequest, \
     KickChatMemberRequest, LeaveChatRequest, UnbanChatMemberRequest, GetChatRequest, GetChatAdministratorsRequest, \
-    GetChatCountRequest, GetChatMemberRequest
+    GetChatCountRequest, GetChatMemberRequest, ResponseParameters
 
 __version__ = '0.2.3'
 
 TELEGRAM_BOT_API_BASEPATH = 'https://api.telegram.org/{prefix}bot{token}'
 
+MAX_INLINE_QUERY_RESULTS = 50
+
+DEFAULT_CONNECTOR_CONFIG = {'limit': 100,
+                            'keepalive_timeout': 30,
+                            'ttl_dns_cache': 300}
+
+DEFAULT_POLLING_CONNECTOR_CONFIG = {'limit': 1,
+                                    'keepalive_timeout': 120,
+                                    'ttl_dns_cache': 300}
+
 
 class TelegramError(Exception):
     """
@@ -37,12 +60,22 @@ class TelegramError(Exception):
 
         It contains Telegram error description.
 
+    .. attribute:: retry_after
+
+        Seconds to wait before request could be repeated, when flood control is exceeded.
+
+    .. attribute:: migrate_to_chat_id
+
+        New identifier of a group migrated to a supergroup.
+
     """
 
-    def __init__(self, msg, code):
+    def __init__(self, msg, code, parameters: ResponseParameters = None):
         super(TelegramError, self).__init__(msg)
         self.code = code
         self.msg = msg
+        self.retry_after = parameters.retry_after if parameters else None
+        self.migrate_to_chat_id = parameters.migrate_to_chat_id if parameters else None
 
     def __str__(self):
         return "CODE {}: {}".format(self.code, super(TelegramError, self).__str__())
@@ -83,29 +116,164 @@ def message_or_true(msg) -> Union[bool, Message]:
     return True
 
 
+class RetryPolicy:
+    """
+    Retry policy for Telegram requests.
+
+    * Requests rejected by flood control (error 429) are retried after ``retry_after`` seconds
+      sent by Telegram, as they were not executed.
+    * Requests failed by transient errors (server errors, connection errors and timeouts) are retried
+      using exponential backoff with full jitter. Each retry spends a token from retry budget and each
+      success request refills ``budget_refill`` tokens, so retries stop when most requests fail.
+      Transient errors on non idempotent requests (like sending a message) are not retried unless
+      ``retry_non_idempotent`` is set, because request could be executed anyway.
+    * Requests with files are never retried, as file streams are already consumed.
+
+    :param max_retries: Maximum retries per request.
+    :param base_delay: Backoff base delay in seconds.
+    :param max_delay: Maximum backoff delay in seconds.
+    :param max_retry_after: Maximum ``retry_after`` to wait. If Telegram asks for longer waits,
+                            error is raised.
+    :param budget: Maximum number of retry tokens.
+    :param budget_refill: Retry tokens added by each success request.
+    :param retry_non_idempotent: Whether to retry non idempotent requests after transient errors.
+    """
+
+    def __init__(self, max_retries=3, base_delay=0.5, max_delay=30, max_retry_after=60,
+                 budget=10, budget_refill=0.1, retry_non_idempotent=False):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.max_budget = budget
+        self.budget = budget
+        self.budget_refill = budget_refill
+        self.retry_non_idempotent = retry_non_idempotent
+
+        self.retries = 0
+        self.flood_retries = 0
+        self.budget_exhausted = 0
+
+        self._random = Random()
+
+    @staticmethod
+    def is_transient_error(ex: Exception) -> bool:
+        """
+        Returns whether an exception is caused by a transient error.
+
+        :param ex: Exception raised by request.
+        """
+        if isinstance(ex, TelegramError):
+            return ex.code is not None and ex.code >= 500
+        if isinstance(ex, (ClientError, OSError, asyncio.TimeoutError)):
+            return True
+        try:
+            return ex.response.status >= 500
+        except AttributeError:
+            return False
+
+    def get_retry_delay(self, ex: Exception, attempt: int, idempotent: bool = False) -> Union[float, None]:
+        """
+        Returns seconds to wait before retrying a failed request, or :data:`None`
+        if request must not be retried.
+
+        :param ex: Exception raised by request.
+        :param attempt: Number of retries already done.
+        :param idempotent: Whether request is idempotent.
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        if isinstance(ex, TelegramError) and ex.code == 429:
+            if ex.retry_after is None or ex.retry_after > self.max_retry_after:
+                return None
+            self.flood_retries += 1
+            return ex.retry_after
+
+        if not self.is_transient_error(ex) or not (idempotent or self.retry_non_idempotent):
+            return None
+
+        if self.budget < 1:
+            self.budget_exhausted += 1
+            return None
+
+        self.budget -= 1
+        self.retries += 1
+        return self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def on_success(self):
+        """
+        Refills retry budget after a success request.
+        """
+        self.budget = min(self.max_budget, self.budget + self.budget_refill)
+
+    def get_stats(self):
+        """
+        Returns retry statistics.
+
+        :return: Dictionary with statistics.
+        """
+        return {'retries': self.retries,
+                'flood_retries': self.flood_retries,
+                'budget_exhausted': self.budget_exhausted,
+                'budget': self.budget}
+
+
 def check_result(func=None,
-                 message_cls: BaseModel = Message) -> Union[bool, BaseModel]:
+                 message_cls: BaseModel = Message, idempotent: bool = False) -> Union[bool, BaseModel]:
     """
     Decorator to process Telegram responses. It raise :class:`~TelegramError` exception when result is not successful.
     Otherwise it process :class:`~messages.Response` message using `message_cls` parameter as factory.
 
+    If bot has a :class:`~RetryPolicy`, failed requests are retried according to it.
+
+    If a reply to the update processed by current task has been captured in order to be sent in
+    webhook response, request waits until that response has been sent.
+
+    Streams owned by :class:`~messages.FileModel` fields of request are closed once request
+    finishes, even if it fails.
+
     :param func: Decorated function. Used in order to decorate a function using default parameters.
     :param message_cls: Message class factory. Default: :class:`~messages.Message`
+    :param idempotent: Whether request could be repeated safely.
     :returns: :data:`True` or :class:`~dirty_models.models.BaseModel`
     """
 
     def wrapper(func):
         @wraps(func)
         async def inner(self, *args, **kwargs):
+            attempt = 0
             try:
-                result = await func(self, *args, **kwargs)
-                response = result.data
-                if response.ok:
-                    return message_cls(response.result)
-                raise TelegramError(response.description, response.error_code)
-            except Exception as ex:
-                self.logger.exception(ex)
-                raise ex
+                if self.webhook_server is not None:
+                    await self.webhook_server.wait_reply_sent()
+                while True:
+                    try:
+                        result = await func(self, *args, **kwargs)
+                        response = result.data
+                        if response.ok:
+                            if self.retry_policy is not None:
+                                self.retry_policy.on_success()
+                            return message_cls(response.result)
+                        raise TelegramError(response.description, response.error_code, response.parameters)
+                    except Exception as ex:
+                        delay = None
+                        if self.retry_policy is not None \
+                                and not any(isinstance(arg, BaseModel) and contains_file(arg)
+                                            for arg in itertools.chain(args, kwargs.values())):
+                            delay = self.retry_policy.get_retry_delay(ex, attempt, idempotent=idempotent)
+
+                        if delay is None:
+                            self.logger.exception(ex)
+                            raise ex
+
+                        self.logger.warning("Retrying {} in {:.2f} seconds after error: {}".format(func.__name__,
+                                                                                                   delay, ex))
+                    attempt += 1
+                    await asyncio.sleep(delay)
+            finally:
+                for arg in itertools.chain(args, kwargs.values()):
+                    if isinstance(arg, BaseModel):
+                        close_files(arg)
 
         return inner
 
@@ -114,10 +282,64 @@ def check_result(func=None,
     return wrapper
 
 
+def reply_in_webhook_response(method: str, key_field: str):
+    """
+    Decorator for request methods which could be answered in webhook response. When bot is
+    attached to a :class:`~aiotelebot.webhook.WebhookServer` with ``reply_in_response`` enabled
+    and request is the first reply to the update processed by current task, request is sent in webhook
+    response body instead of calling Telegram API, and :data:`True` is returned instead of
+    method result.
+
+    :param method: Telegram method name.
+    :param key_field: Request field used to match request with update in process.
+    """
+
+    def wrapper(func):
+        @wraps(func)
+        async def inner(self, request, *args, **kwargs):
+            if self.webhook_server is not None \
+                    and self.webhook_server.capture_reply(method, (key_field, getattr(request, key_field)), request):
+                return True
+            return await func(self, request, *args, **kwargs)
+
+        return inner
+
+    return wrapper
+
+
+def build_request_object(func=None, **options):
+    """
+    Decorator for request methods which builds request object from keyword parameters, like
+    :func:`service_client.utils.build_parameter_object` does. In addition, when first parameter
+    is a :class:`~aiotelebot.formatters.RequestTemplate`, keyword parameters are used as values
+    of template substitutable fields, and prepared request is sent without building any model.
+
+    :param options: Options for :func:`service_client.utils.build_parameter_object`.
+    """
+
+    def inner(func):
+        build = build_parameter_object(func, **options)
+
+        @wraps(build)
+        def wrapper(self, *args, **kwargs):
+            if args and isinstance(args[0], RequestTemplate):
+                return func(self, args[0].prepare(**kwargs))
+            return build(self, *args, **kwargs)
+
+        return wrapper
+
+    if func:
+        return inner(func)
+    return inner
+
+
 class Bot:
     def __init__(self, token, base_path=TELEGRAM_BOT_API_BASEPATH,
                  client_name='TelegramBot', client_plugins=None, updates_timeout=100,
-                 spec=None, logger=None, loop=None):
+                 pipelined_updates=False, lazy_updates=False, dispatcher=None, inline_query_timeout=None,
+                 inline_cache_size=0, inline_cache_ttl=60, inline_query_debounce=None,
+                 retry_policy=None, connector_config=None, polling_connector_config=None,
+                 max_downloads=4, file_cache_size=1000, file_cache_ttl=3300, spec=None, logger=None, loop=None):
 
         from .telegram_api_spec import spec as default_spec
         spec = spec or default_spec
@@ -132,21 +354,105 @@ class Bot:
         except TypeError:  # pragma: no cover
             pass
 
+        config = {'connector': dict(DEFAULT_CONNECTOR_CONFIG, **(connector_config or {}))}
         self.service_client = ServiceClient(name=client_name,
                                             spec=spec, parser=telegram_decoder, serializer=telegram_encoder,
-                                            base_path=base_path,
-                                            plugins=plugins)
+                                            base_path=base_path, config=config,
+                                            plugins=plugins, loop=self.loop)
+
+        self.polling_connector_config = dict(DEFAULT_POLLING_CONNECTOR_CONFIG, **(polling_connector_config or {}))
+        self.polling_connector = None
 
         self.update_offset = 0
         self.me = None
         self.updates_timeout = updates_timeout
+        self.pipelined_updates = pipelined_updates
+        self.lazy_updates = lazy_updates
+
+        self.webhook_server = None
+        self.retry_policy = retry_policy
+        self.max_downloads = max_downloads
+        self._download_semaphore = None
+        if file_cache_size:
+            self.file_cache = TTLCache(max_size=file_cache_size, ttl=file_cache_ttl)
+        else:
+            self.file_cache = None
+        self._file_requests = {}
+
+        self.dispatcher = dispatcher
+        if self.dispatcher:
+            self.dispatcher.assign_bot(self)
 
         self.registered_update_processors = []
         self.registered_message_processors = []
         self.registered_commands = {}
-        self.registered_inline_providers = {}
+        self.command_router = CommandRouter()
+        self.registered_inline_providers = OrderedDict()
+        self.inline_query_timeout = inline_query_timeout
+        if inline_cache_size:
+            self.inline_results_cache = TTLCache(max_size=inline_cache_size, ttl=inline_cache_ttl)
+        else:
+            self.inline_results_cache = None
+
+        self.inline_query_debounce = inline_query_debounce
+        self._inline_query_tasks = {}
+
+    @property
+    def download_semaphore(self):
+        """
+        Semaphore which limits concurrent downloads. It is created on first use, so it is
+        bound to running event loop.
+        """
+        if self._download_semaphore is None:
+            self._download_semaphore = asyncio.Semaphore(self.max_downloads)
+        return self._download_semaphore
+
+    def _start_polling_session(self):
+        # Polling session is only needed by bots which poll updates, and it is created
+        # inside a coroutine, so it is bound to running event loop.
+        if self.polling_connector is not None:
+            return
+
+        self.polling_connector = TCPConnector(loop=self.loop, **self.polling_connector_config)
+        polling_session = ClientSession(connector=self.polling_connector, loop=self.loop,
+                                        response_class=self.service_client.create_response)
+        self.service_client.add_plugins([DedicatedSession(polling_session, loop=self.loop)])
+
+    @staticmethod
+    def _get_connector_stats(connector: TCPConnector):
+        # aiohttp does not expose pool usage, so it is read from connector internals
+        # (``_acquired``, ``_conns`` and ``_waiters``, available from aiohttp 2.0 to 3.x).
+        try:
+            return {'limit': connector.limit,
+                    'acquired': len(connector._acquired),
+                    'idle': sum(len(conns) for conns in connector._conns.values()),
+                    'waiting': sum(len(waiters) for waiters in connector._waiters.values())}
+        except (AttributeError, TypeError):  # pragma: no cover
+            return {'limit': connector.limit, 'acquired': None, 'idle': None, 'waiting': None}
+
+    def get_connection_stats(self):
+        """
+        Returns connection pools usage. Long polling requests use their own connection pool,
+        so they never wait for a connection used to send requests, and vice versa. That pool is
+        created when :meth:`~Bot.start_get_updates` is called, so ``polling`` statistics are
+        :data:`None` until then.
 
-    @check_result(message_cls=User)
+        Pool usage is read from aiohttp connector internals. If they are not available in
+        installed aiohttp version, only ``limit`` is reported and other values are :data:`None`.
+
+        :return: Dictionary with statistics of ``requests`` and ``polling`` connection pools.
+        """
+        return {'requests': self._get_connector_stats(self.service_client.connector),
+                'polling': (self._get_connector_stats(self.polling_connector)
+                            if self.polling_connector is not None else None)}
+
+    def close(self):
+        """
+        Closes all connections.
+        """
+        self.service_client.close()
+
+    @check_result(message_cls=User, idempotent=True)
     async def get_me(self) -> User:
         """
         A simple method for testing your bot's auth token. Requires no parameters.
@@ -156,30 +462,31 @@ class Bot:
 
         :return: Bot metainfo
         """
-        user = await self.service_client.get_me()
-        self.me = user
-        return user
+        return await self.service_client.get_me()
 
-    @check_result(message_cls=list_of(Update))
-    @build_parameter_object(arg_name='query')
+    @build_request_object(arg_name='query')
     async def get_updates(self, query: GetUpdatesRequest = None) -> List[Update]:
         """
         Use this method to receive incoming updates using long polling.
-        An Array of :class:`~messages.Update` objects is returned.
+        An Array of :class:`~messages.Update` objects is returned. Updates are built
+        using :meth:`~Bot.build_update`.
 
         .. seealso:: https://core.telegram.org/bots/api#getupdates
 
         :param query: Custom get updates request
         :return: List of updates
         """
+        return [self.build_update(raw_update) for raw_update in await self._get_raw_updates(query)]
+
+    @check_result(message_cls=list, idempotent=True)
+    async def _get_raw_updates(self, query: GetUpdatesRequest = None) -> List[dict]:
         if not query:
             query = GetUpdatesRequest()
             query.offset = self.update_offset
             query.timeout = self.updates_timeout
         return await self.service_client.get_updates(query)
 
-    @check_result(message_cls=File)
-    @build_parameter_object
+    @build_request_object
     async def get_file(self, request: GetFileRequest) -> File:
         """
         Use this method to get basic info about a file and prepare it for downloading.
@@ -188,22 +495,93 @@ class Bot:
         taken from the response. It is guaranteed that the link will be valid for at least 1 hour.
         When the link expires, a new one can be requested by calling :meth:`~Bot.get_file` again.
 
+        Files are cached by ``file_id`` for ``file_cache_ttl`` seconds (less than link lifetime),
+        and concurrent calls for same ``file_id`` share one request.
+
         .. seealso:: https://core.telegram.org/bots/api#getfile
 
         :param request: Request model
         """
+        file_id = getattr(request, 'file_id', None)
+        if self.file_cache is None or file_id is None:
+            return await self._get_file(request)
+
+        file = self.file_cache.get(file_id)
+        if file is not None:
+            return file
+
+        try:
+            future = self._file_requests[file_id]
+        except KeyError:
+            future = asyncio.ensure_future(self._get_file(request), loop=self.loop)
+            self._file_requests[file_id] = future
+            future.add_done_callback(lambda fut: self._file_request_done(file_id, fut))
+
+        return await asyncio.shield(future)
+
+    @check_result(message_cls=File, idempotent=True)
+    async def _get_file(self, request: GetFileRequest) -> File:
         return await self.service_client.get_file(request)
 
-    async def download_file(self, file_path: str):
+    def _file_request_done(self, file_id, future):
+        del self._file_requests[file_id]
+        if not future.cancelled() and future.exception() is None:
+            self.file_cache.set(file_id, future.result())
+
+    async def download_file(self, file_path: str, offset: int = 0):
         """
         Download file by file path. File path is retrieve using :meth:`~Bot.get_file` method.
 
         It returns ClientResponse object. You could use read method in order to get file data.
+
+        :param file_path: File path.
+        :param offset: Position to start download. If server honors it, response status is 206.
         """
+        if offset:
+            return await self.service_client.download_file(file_path=file_path,
+                                                           headers={'Range': 'bytes={}-'.format(offset)})
         return await self.service_client.download_file(file_path=file_path)
 
-    @check_result(message_cls=UserProfilePhotos)
-    @build_parameter_object
+    def iter_file_chunks(self, file_id: str = None, file: File = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         offset: int = 0) -> FileChunks:
+        """
+        Downloads a file in chunks. File information is requested using :meth:`~Bot.get_file`
+        unless it is given. No more than ``max_downloads`` files are downloaded at same time,
+        so use it as an asynchronous context manager if iteration could stop before file end.
+
+        .. code-block:: python
+
+            async with bot.iter_file_chunks(message.document.file_id) as chunks:
+                async for chunk in chunks:
+                    process(chunk)
+
+        :param file_id: File identifier.
+        :param file: File information.
+        :param chunk_size: Maximum chunk size in bytes.
+        :param offset: Position to start download.
+        :return: Asynchronous iterator of chunks.
+        """
+        return FileChunks(self, file_id=file_id, file=file, chunk_size=chunk_size,
+                          offset=offset, semaphore=self.download_semaphore)
+
+    async def download_to(self, destination, file_id: str = None, file: File = None,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = False) -> File:
+        """
+        Downloads a file to a path or to a file object, in chunks. Downloaded size is verified
+        against file size.
+
+        :param destination: File path or writable binary file object.
+        :param file_id: File identifier.
+        :param file: File information.
+        :param chunk_size: Maximum chunk size in bytes.
+        :param resume: Whether to resume download of an incomplete file. Only for file paths.
+        :return: File information.
+        """
+        return await download_to(self.iter_file_chunks(file_id=file_id, file=file, chunk_size=chunk_size),
+                                 destination, resume=resume)
+
+    @check_result(message_cls=UserProfilePhotos, idempotent=True)
+    @build_request_object
     async def get_user_profile_photos(self, request: GetUserProfilePhotoRequest) -> UserProfilePhotos:
         """
         Use this method to get a list of profile pictures for a user.
@@ -215,8 +593,8 @@ class Bot:
 
         return await self.service_client.get_user_profile_photos(request)
 
-    @check_result
-    @build_parameter_object
+    @check_result(idempotent=True)
+    @build_request_object
     async def set_webhook(self, request: SetWebhookRequest) -> bool:
         """
         Use this method to specify a url and receive incoming updates via an outgoing webhook.
@@ -243,13 +621,19 @@ class Bot:
 
         return await self.service_client.set_webhook(request)
 
+    @build_request_object
+    @reply_in_webhook_response('sendMessage', 'chat_id')
     @check_result
-    @build_parameter_object
-    async def send_message(self, request: SendMessageRequest) -> Message:
+    async def send_message(self, request: SendMessageRequest) -> Union[bool, Message]:
 
         """
         Use this method to send text messages. On success, the sent :class:`~messages.Message` is returned.
 
+        .. warning::
+
+            If it is sent in webhook response (see :class:`~aiotelebot.webhook.WebhookServer`),
+            :data:`True` is returned instead of sent message.
+
         .. seealso:: https://core.telegram.org/bots/api#sendmessage
 
         :param request: Request model
@@ -258,7 +642,7 @@ class Bot:
         return await self.service_client.send_message(request)
 
     @check_result
-    @build_parameter_object
+    @build_request_object
     async def send_photo(self, request: SendPhotoRequest) -> Message:
 
         """
@@ -272,7 +656,7 @@ class Bot:
         return await self.service_client.send_photo(request)
 
     @check_result
-    @build_parameter_object
+    @build_request_object
     async def send_video(self, request: SendVideoRequest) -> Message:
 
         """
@@ -288,7 +672,7 @@ class Bot:
         return await self.service_client.send_video(request)
 
     @check_result
-    @build_parameter_object
+    @build_request_object
     async def send_audio(self, request: SendAudioRequest) -> Message:
 
         """
@@ -308,7 +692,7 @@ class Bot:
         return await self.service_client.send_audio(request)
 
     @check_result
-    @build_parameter_object
+    @build_request_object
     async def send_document(self, request: SendDocumentRequest) -> Message:
 
         """
@@ -323,7 +707,7 @@ class Bot:
         return await self.service_client.send_document(request)
 
     @check_result
-    @build_parameter_object
+    @build_request_object
     async def send_sticker(self, request: SendStickerRequest) -> Message:
 
         """
@@ -335,7 +719,7 @@ class Bot:
         return await self.service_client.send_sticker(request)
 
     @check_result
-    @build_parameter_object
+    @build_request_object
     async def send_voice(self, request: SendVoiceRequest) -> Message:
 
         """
@@ -353,7 +737,7 @@ class Bot:
         return await self.service_client.send_voice(request)
 
     @check_result
-    @build_parameter_object
+    @build_request_object
     async def send_location(self, request: SendLocationRequest) -> Message:
 
         """
@@ -367,7 +751,7 @@ class Bot:
         return await self.service_client.send_location(request)
 
     @check_result
-    @build_parameter_object
+    @build_request_object
     async def send_venue(self, request: SendVenueRequest) -> Message:
 
         """
@@ -381,7 +765,7 @@ class Bot:
         return await self.service_client.send_venue(request)
 
     @check_result
-    @build_parameter_object
+    @build_request_object
     async def send_contact(self, request: SendContactRequest) -> Message:
 
         """
@@ -394,8 +778,8 @@ class Bot:
 
         return await self.service_client.send_contact(request)
 
-    @check_result(message_cls=result_bool)
-    @build_parameter_object
+    @check_result(message_cls=result_bool, idempotent=True)
+    @build_request_object
     async def send_chat_action(self, request: SendChatActionRequest) -> bool:
 
         """
@@ -418,8 +802,63 @@ class Bot:
 
         return await self.service_client.send_chat_action(request)
 
+    def broadcast(self, request: Union[BaseModel, RequestTemplate], chat_ids, method: str = None, concurrency: int = 10,
+                  rate: float = None, start_at: int = 0) -> Broadcast:
+        """
+        Sends same request to many chats. Request is serialized once and only chat identifier
+        is serialized for each chat. It returns an asynchronous iterator of
+        :class:`~aiotelebot.broadcast.BroadcastResult`, one for each chat. Requests in process
+        are cancelled when it is closed.
+
+        .. code-block:: python
+
+            async with bot.broadcast(SendMessageRequest(text='Hello'), chat_ids, rate=30) as broadcast:
+                async for result in broadcast:
+                    if not result.ok:
+                        log_error(result.chat_id, result.error)
+
+        :param request: Request model or request template with substitutable ``chat_id``.
+                        Request model ``chat_id`` is ignored.
+        :param chat_ids: Iterable or asynchronous iterable of chat identifiers.
+        :param method: Bot method name. By default, it is chosen by request class.
+        :param concurrency: Maximum number of requests sent at same time.
+        :param rate: Maximum number of requests per second.
+        :param start_at: Number of chat identifiers to skip. Used to resume a broadcast
+                         from its :attr:`~aiotelebot.broadcast.Broadcast.checkpoint`.
+        :return: Broadcast asynchronous iterator.
+        """
+        return Broadcast(self, request, chat_ids, method=method, concurrency=concurrency,
+                         rate=rate, start_at=start_at, loop=self.loop)
+
+    def upload_files(self, chat_id, files, method: str = 'send_document', concurrency: int = 4,
+                     read_ahead: int = None, executor=None, **fields) -> BulkUpload:
+        """
+        Sends many files to a chat. Files are opened ahead in a thread pool and several files
+        are uploaded at same time. It returns an asynchronous iterator of
+        :class:`~aiotelebot.uploads.UploadResult`, one for each file. Uploads in process are
+        cancelled and opened files are closed when it is closed.
+
+        .. code-block:: python
+
+            async with bot.upload_files(chat_id, paths, method='send_photo') as upload:
+                async for result in upload:
+                    if result.ok:
+                        save_file_id(result.source, result.file_id)
+
+        :param chat_id: Chat identifier.
+        :param files: Iterable of file paths or :class:`~aiotelebot.messages.FileModel`.
+        :param method: Bot method name used to send files.
+        :param concurrency: Maximum number of files uploaded at same time.
+        :param read_ahead: Maximum number of opened files waiting to be uploaded.
+        :param executor: Executor used to open and read files. By default, event loop one is used.
+        :param fields: Other request fields, like ``caption``.
+        :return: Upload asynchronous iterator.
+        """
+        return BulkUpload(self, chat_id, files, method=method, concurrency=concurrency, read_ahead=read_ahead,
+                          executor=executor, loop=self.loop, **fields)
+
     @check_result(message_cls=result_bool)
-    @build_parameter_object
+    @build_request_object
     async def answer_inline_query(self, request: AnswerInlineQueryRequest) -> bool:
 
         """
@@ -434,8 +873,9 @@ class Bot:
 
         return await self.service_client.answer_inline_query(request)
 
+    @build_request_object
+    @reply_in_webhook_response('answerCallbackQuery', 'callback_query_id')
     @check_result(message_cls=result_bool)
-    @build_parameter_object
     async def answer_callback_query(self, request: AnswerCallbackQueryRequest) -> bool:
 
         """
@@ -450,8 +890,8 @@ class Bot:
 
         return await self.service_client.answer_callback_query(request)
 
-    @check_result(message_cls=message_or_true)
-    @build_parameter_object
+    @check_result(message_cls=message_or_true, idempotent=True)
+    @build_request_object
     async def edit_message_text(self, request: EditMessageTextRequest) -> Union[bool, Message]:
 
         """
@@ -466,8 +906,8 @@ class Bot:
 
         return await self.service_client.edit_message_text(request)
 
-    @check_result(message_cls=message_or_true)
-    @build_parameter_object
+    @check_result(message_cls=message_or_true, idempotent=True)
+    @build_request_object
     async def edit_message_caption(self, request: EditMessageCaptionRequest) -> Union[bool, Message]:
 
         """
@@ -483,8 +923,8 @@ class Bot:
 
         return await self.service_client.edit_message_caption(request)
 
-    @check_result(message_cls=message_or_true)
-    @build_parameter_object
+    @check_result(message_cls=message_or_true, idempotent=True)
+    @build_request_object
     async def edit_message_reply_markup(self, request: EditMessageReplyMarkupRequest) -> Union[bool, Message]:
 
         """
@@ -499,8 +939,8 @@ class Bot:
 
         return await self.service_client.edit_message_reply_markup(request)
 
-    @check_result(message_cls=result_bool)
-    @build_parameter_object
+    @check_result(message_cls=result_bool, idempotent=True)
+    @build_request_object
     async def kick_chat_member(self, request: KickChatMemberRequest) -> bool:
 
         """
@@ -516,8 +956,8 @@ class Bot:
 
         return await self.service_client.kick_chat_member(request)
 
-    @check_result(message_cls=result_bool)
-    @build_parameter_object
+    @check_result(message_cls=result_bool, idempotent=True)
+    @build_request_object
     async def leave_chat(self, request: LeaveChatRequest) -> bool:
 
         """
@@ -530,8 +970,8 @@ class Bot:
 
         return await self.service_client.leave_chat(request)
 
-    @check_result(message_cls=result_bool)
-    @build_parameter_object
+    @check_result(message_cls=result_bool, idempotent=True)
+    @build_request_object
     async def unban_chat_member(self, request: UnbanChatMemberRequest) -> bool:
 
         """
@@ -546,8 +986,8 @@ class Bot:
 
         return await self.service_client.unban_chat_member(request)
 
-    @check_result(message_cls=Chat)
-    @build_parameter_object
+    @check_result(message_cls=Chat, idempotent=True)
+    @build_request_object
     async def get_chat(self, request: GetChatRequest) -> Chat:
 
         """
@@ -562,8 +1002,8 @@ class Bot:
 
         return await self.service_client.get_chat(request)
 
-    @check_result(message_cls=list_of(ChatMember))
-    @build_parameter_object
+    @check_result(message_cls=list_of(ChatMember), idempotent=True)
+    @build_request_object
     async def get_chat_administrators(self, request: GetChatAdministratorsRequest) -> List[ChatMember]:
 
         """
@@ -579,8 +1019,8 @@ class Bot:
 
         return await self.service_client.get_chat_administrators(request)
 
-    @check_result(message_cls=int)
-    @build_parameter_object
+    @check_result(message_cls=int, idempotent=True)
+    @build_request_object
     async def get_chat_members_count(self, request: GetChatCountRequest) -> int:
 
         """
@@ -593,8 +1033,8 @@ class Bot:
 
         return await self.service_client.get_chat_members_count(request)
 
-    @check_result(message_cls=ChatMember)
-    @build_parameter_object
+    @check_result(message_cls=ChatMember, idempotent=True)
+    @build_request_object
     async def get_chat_member(self, request: GetChatMemberRequest) -> ChatMember:
 
         """
@@ -612,40 +1052,123 @@ class Bot:
 
         """
         Starts get updates loop.
+
+        Updates are requested using :meth:`~Bot.get_updates`. Long polling requests use a dedicated
+        connection pool, which is created on first call.
+
+        If bot was built using ``pipelined_updates`` parameter, next ``getUpdates`` request is sent
+        as soon as new update offset is known, so previous batch of updates is decoded and dispatched
+        meanwhile. In that mode, raw updates are requested directly in order to know new offset
+        before decoding them, so :meth:`~Bot.get_updates` is not called and overriding it has no effect.
+
+        If bot was built using ``lazy_updates`` parameter, updates are built as
+        :class:`~messages.LazyUpdate` objects.
         """
 
-        await self.get_me()
+        self._start_polling_session()
+        self.me = await self.get_me()
+        if self.pipelined_updates:
+            await self._start_pipelined_get_updates()
+            return
+
         while not Task.current_task(self.loop).cancelled():
             updates = await self.get_updates()
             for update in updates:
                 if update.update_id >= self.update_offset:
                     self.update_offset = update.update_id + 1
-                asyncio.ensure_future(self.process_update(update), loop=self.loop)
+                await self.dispatch_update(update)
+
+    async def _start_pipelined_get_updates(self):
+        next_updates = asyncio.ensure_future(self._get_raw_updates(), loop=self.loop)
+        try:
+            while not Task.current_task(self.loop).cancelled():
+                raw_updates = await next_updates
+                for raw_update in raw_updates:
+                    if raw_update['update_id'] >= self.update_offset:
+                        self.update_offset = raw_update['update_id'] + 1
 
-    async def process_update(self, update: Update):
+                next_updates = asyncio.ensure_future(self._get_raw_updates(), loop=self.loop)
+
+                for raw_update in raw_updates:
+                    # Let next request go ahead between each update decoding.
+                    await asyncio.sleep(0)
+                    await self.dispatch_update(self.build_update(raw_update))
+        finally:
+            next_updates.cancel()
+
+    def build_update(self, raw_update: dict) -> Update:
+        """
+        Builds an update message from raw data. If bot was built using ``lazy_updates`` parameter,
+        a :class:`~messages.LazyUpdate` is returned, so inner messages are decoded only when
+        they are accessed.
+
+        :param raw_update: Raw update data
+        :return: Update message
+        """
+        if self.lazy_updates:
+            return LazyUpdate(raw_update)
+        return Update(raw_update)
+
+    async def dispatch_update(self, update: Update):
+        """
+        Dispatch an update in order to be processed. If bot has a dispatcher, update is sent to it
+        (it could wait until dispatcher accepts the update). Otherwise, a new task is created
+        to process update.
+
+        :param update: Update message
+        """
+        if self.dispatcher is None:
+            asyncio.ensure_future(self.process_update(update), loop=self.loop)
+        else:
+            await self.dispatcher.dispatch(update)
+
+    async def _run_processor(self, coro, wait=False):
+        if self.dispatcher is None and not wait:
+            asyncio.ensure_future(coro, loop=self.loop)
+            return
+
+        try:
+            await coro
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            self.logger.exception(ex)
+
+    async def process_update(self, update: Update, wait: bool = False):
 
         """
         Process a new update message. It will be processed by all registered update processors and
         by all specific message processors (message, command, chosen inline result or callback query).
 
+        When bot has a dispatcher or ``wait`` is set, specific processors are awaited instead of being
+        run on new tasks.
+
         :param update: Update message
+        :param wait: Whether to wait until specific processors finish.
         """
 
-        self.logger.debug("New update message: {}".format(repr(update)))
+        if self.webhook_server is None:
+            return await self._process_update(update, wait=wait)
+
+        with self.webhook_server.reply_scope(update):
+            await self._process_update(update, wait=wait)
+
+    async def _process_update(self, update: Update, wait: bool = False):
+        self.logger.debug("New update message: %r", update)
 
         for up_processor in self.registered_update_processors:
             if await up_processor(update) is True:
-                self.logger.debug("Update processor dropped update message: {}".format(repr(up_processor)))
+                self.logger.debug("Update processor dropped update message: %r", up_processor)
                 return
 
-        if update.message:
-            asyncio.ensure_future(self.process_message(update.message))
-        elif update.inline_query:
-            asyncio.ensure_future(self.process_inline_query(update.inline_query))
-        elif update.chose_inline_result:
-            asyncio.ensure_future(self.process_chosen_inline_result(update.chose_inline_result))
-        elif update.callback_query:
-            asyncio.ensure_future(self.process_callback_query(update.callback_query))
+        if update.message is not None:
+            await self._run_processor(self.process_message(update.message, wait=wait), wait=wait)
+        elif update.inline_query is not None:
+            await self._run_processor(self.process_inline_query(update.inline_query), wait=wait)
+        elif update.chose_inline_result is not None:
+            await self._run_processor(self.process_chosen_inline_result(update.chose_inline_result), wait=wait)
+        elif update.callback_query is not None:
+            await self._run_processor(self.process_callback_query(update.callback_query), wait=wait)
 
     def register_update_processor(self, func: Callable[[Update],
                                                        Union[bool, None]]) -> Callable[[Update],
@@ -671,11 +1194,12 @@ class Bot:
         self.registered_update_processors.append(func)
         return func
 
-    async def process_message(self, message: Message):
+    async def process_message(self, message: Message, wait: bool = False):
         """
         Process and route messages received by bot.
 
         :param message: Message to process by bot.
+        :param wait: Whether to wait until command or message processors finish.
         """
 
         self.logger.debug('Processing message: {}'.format(repr(message)))
@@ -685,16 +1209,13 @@ class Bot:
         except AttributeError:
             pass
 
-        try:
-            for entity in message.entities:
-                if entity.type == 'bot_command' and entity.offset == 0:
-                    asyncio.ensure_future(self.execute_command(message), loop=self.loop)
-                    return
-        except TypeError:
-            pass
+        command = self.command_router.parse(message)
+        if command and command.is_addressed_to(self.me.username if self.me else None):
+            await self._run_processor(self.execute_command(message, command), wait=wait)
+            return
 
         for processor in self.registered_message_processors:
-            asyncio.ensure_future(processor(message), loop=self.loop)
+            await self._run_processor(processor(message), wait=wait)
 
     def register_message_processor(self, func: Callable[[Message], Any]) -> Callable[[Message], Any]:
         """
@@ -715,31 +1236,72 @@ class Bot:
         self.registered_message_processors.append(func)
         return func
 
-    async def execute_command(self, message):
-        for entity in message.entities:
-            if entity.type == 'bot_command' and entity.offset == 0:
-                command = message.text[1:entity.length]
-                self.logger.info("Executing command: " + command)
-                break
-        try:
-            await self.registered_commands[command](message)
-        except KeyError:
-            self.logger.warn('Unknown command: {}'.format(command))
+    async def execute_command(self, message: Message, command: Command = None):
+        """
+        Execute command function registered for command in message. If command is not
+        registered an ``Unknown command`` message is sent to chat.
+
+        Functions added directly to ``registered_commands`` dictionary are still executed, but it is
+        deprecated and a :class:`DeprecationWarning` is emitted. Use :meth:`~Bot.register_command` instead.
+
+        :param message: Message which contains command.
+        :param command: Command already parsed from message. If it is not defined, it will be parsed.
+        """
+        if command is None:
+            command = self.command_router.parse(message)
+            if command is None:
+                return
+
+        route = self.command_router.get_route(command.name)
+        func = self.registered_commands.get(command.name)
+        if func is not None and (route is None or route.func is not func):
+            warnings.warn('Command {} was added to registered_commands directly, '
+                          'use register_command instead'.format(command.name), DeprecationWarning)
+            route = CommandRoute(command.name, func)
+
+        if route is None:
+            self.logger.warning('Unknown command: {}'.format(command.name))
             req = SendMessageRequest()
             req.chat_id = message.chat.id
             req.text = 'Unknown command'
             await self.send_message(req)
+            return
+
+        self.logger.info("Executing command: " + command.name)
+        try:
+            await route(message, command)
         except Exception as ex:
             self.logger.exception(ex)
 
-    def register_command(self, command: str, func: Union[Callable[[Message], Any], None] = None):
+    def register_command(self, command: str, func: Union[Callable[..., Any], None] = None,
+                         aliases: Union[List[str], None] = None, pass_args: bool = False):
+        """
+        Register a function in order to execute a command. Command names are case insensitive
+        and suffix ``@<bot_username>`` is removed before look up for command function.
 
-        def inner(func: Callable[[Message]]):
+        It could be used as decorator:
+
+        .. code-block:: python
+
+            @bot.register_command('start', aliases=['begin'], pass_args=True)
+            async def start_command(message: Message, args: List[str]):
+                do_some_thing(message, args)
+
+        :param command: Command name.
+        :param func: Command function.
+        :param aliases: Other names for same command.
+        :param pass_args: Whether command arguments (text after command split by whitespaces)
+                          must be passed to function as second parameter.
+        :return: Function registered
+        """
+
+        def inner(func: Callable[..., Any]):
             self.registered_commands[command] = func
+            self.command_router.register(command, func, aliases=aliases, pass_args=pass_args)
+            return func
 
         if func:
-            inner(func)
-            return func
+            return inner(func)
 
         return inner
 
@@ -755,21 +1317,148 @@ class Bot:
         return inner
 
     async def get_inline_results(self, inline_query):
+        """
+        Get results for an inline query from all registered inline providers. Providers are
+        called concurrently, and results are merged in provider registration order.
+
+        It stops waiting for providers as soon as enough results are available from first providers
+        or when ``inline_query_timeout`` seconds have passed. Providers still running are cancelled.
+
+        If bot was built using ``inline_cache_size`` parameter, provider results are cached by provider name,
+        normalized query text (lower case and collapsed whitespaces) and offset for ``inline_cache_ttl`` seconds.
+
+        :param inline_query: Inline query.
+        :type inline_query: telebot.messages.InlineQuery
+        :return: List of inline query results (50 as maximum).
+        """
+        providers = list(self.registered_inline_providers.items())
+        tasks = [self._call_inline_provider(name, provider, inline_query) for name, provider in providers]
+
+        try:
+            if self.inline_query_timeout is not None:
+                deadline = self.loop.time() + self.inline_query_timeout
+            pending = set(tasks)
+
+            while pending and not self._enough_inline_results(tasks):
+                if self.inline_query_timeout is None:
+                    timeout = None
+                else:
+                    timeout = max(deadline - self.loop.time(), 0)
+
+                done, pending = await asyncio.wait(pending, timeout=timeout,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.logger.warning('Inline providers timeout: {}'.format(
+                        ', '.join(name for (name, _), task in zip(providers, tasks) if task in pending)))
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        results = []
+        for (name, _), task in zip(providers, tasks):
+            results.extend(self._get_provider_results(name, task))
+            if len(results) >= MAX_INLINE_QUERY_RESULTS:
+                return results[:MAX_INLINE_QUERY_RESULTS]
+
+        return results
+
+    def _call_inline_provider(self, name, provider, inline_query):
+        if self.inline_results_cache is None:
+            return asyncio.ensure_future(self._get_inline_provider_results(name, provider, inline_query),
+                                         loop=self.loop)
+
+        key = (name, ' '.join((inline_query.query or '').split()).lower(), inline_query.offset)
+        results = self.inline_results_cache.get(key)
+        if results is None:
+            return asyncio.ensure_future(self._get_inline_provider_results(name, provider, inline_query, key),
+                                         loop=self.loop)
+
+        fut = self.loop.create_future()
+        fut.set_result(results)
+        return fut
+
+    async def _get_inline_provider_results(self, name, provider, inline_query, cache_key=None):
         results = []
-        for name, provider in self.registered_inline_providers.items():
-            p_results = await provider(query=inline_query)
-            for r in p_results:
-                r.id = "{}:{}".format(name, r.id)
-                results.append(r)
-                if len(results) >= 50:
-                    return results
+        for r in (await provider(query=inline_query) or []):
+            r.id = "{}:{}".format(name, r.id)
+            results.append(r)
+
+        if cache_key is not None:
+            self.inline_results_cache.set(cache_key, results)
+        return results
+
+    def _get_provider_results(self, name, task):
+        if not task.done() or task.cancelled():
+            return []
+
+        ex = task.exception()
+        if ex:
+            self.logger.error('Inline provider {} failed: {}'.format(name, ex), exc_info=ex)
+            return []
+
+        return task.result()
+
+    def _enough_inline_results(self, tasks):
+        count = 0
+        for task in tasks:
+            if not task.done():
+                return False
+            if not task.cancelled() and not task.exception():
+                count += len(task.result())
+            if count >= MAX_INLINE_QUERY_RESULTS:
+                return True
+        return False
 
     async def process_inline_query(self, inline_query):
         """
+        Answer an inline query using results from registered inline providers.
+
+        If bot was built using ``inline_query_debounce`` parameter, inline query is answered after waiting
+        that number of seconds. If a newer inline query from same user arrives meanwhile, older one
+        is cancelled (even if it is already being processed) and it is never answered. Debounced queries
+        are answered in a new task and this method returns without waiting for it, so dispatchers which
+        process updates of a user in order (like :class:`~aiotelebot.dispatchers.ChatLaneDispatcher`)
+        deliver next queries while previous one is waiting.
+
         :param inline_query:
         :type inline_query: telebot.messages.InlineQuery
-        :return:
+        :return: Task which answers debounced inline query, otherwise :data:`None`.
         """
+        if self.inline_query_debounce is None:
+            await self._answer_inline_query(inline_query)
+            return
+
+        try:
+            user_id = inline_query.inline_query_from.id
+        except AttributeError:
+            await self._answer_inline_query(inline_query)
+            return
+
+        try:
+            self._inline_query_tasks[user_id].cancel()
+        except KeyError:
+            pass
+
+        task = asyncio.ensure_future(self._debounce_inline_query(inline_query), loop=self.loop)
+        self._inline_query_tasks[user_id] = task
+        task.add_done_callback(partial(self._inline_query_done, user_id, inline_query))
+        return task
+
+    def _inline_query_done(self, user_id, inline_query, task):
+        if self._inline_query_tasks.get(user_id) is task:
+            del self._inline_query_tasks[user_id]
+
+        if task.cancelled():
+            self.logger.debug('Inline query superseded: {}'.format(inline_query.id))
+        elif task.exception() is not None:
+            self.logger.exception(task.exception())
+
+    async def _debounce_inline_query(self, inline_query):
+        await asyncio.sleep(self.inline_query_debounce)
+        await self._answer_inline_query(inline_query)
+
+    async def _answer_inline_query(self, inline_query):
         req = AnswerInlineQueryRequest()
         req.inline_query_id = inline_query.id
         req.cache_time = 60
@@ -805,7 +1494,7 @@ class BotFactory(BaseFactory):
     """
 
     def __call__(self, client_plugins=None, spec=None, spec_loader=None,
-                 logger=None, update_processors=None, message_processors=None,
+                 logger=None, dispatcher=None, retry_policy=None, update_processors=None, message_processors=None,
                  commands=None, inline_providers=None, **kwargs):
         if spec_loader:
             spec = load_spec_by_spec_loader(spec_loader, self.loader)
@@ -817,7 +1506,18 @@ class BotFactory(BaseFactory):
         except TypeError:
             pass
 
-        bot = super(BotFactory, self).__call__(spec=spec, client_plugins=client_plugins, logger=logger, **kwargs)
+        try:
+            dispatcher = self.load_item(dispatcher, BaseDispatcher)
+        except TypeError:
+            pass
+
+        try:
+            retry_policy = self.load_item(retry_policy, RetryPolicy)
+        except TypeError:
+            pass
+
+        bot = super(BotFactory, self).__call__(spec=spec, client_plugins=client_plugins, logger=logger,
+                                               dispatcher=dispatcher, retry_policy=retry_policy, **kwargs)
 
         try:
             for update_processor in update_processors:
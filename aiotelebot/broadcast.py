@@ -0,0 +1,188 @@
+import asyncio
+from asyncio import Lock
+
+from .formatters import ChatRequestTemplate, RequestTemplate
+from .messages import SendMessageRequest, SendPhotoRequest, SendVideoRequest, SendAudioRequest, \
+    SendDocumentRequest, SendStickerRequest, SendVoiceRequest, SendLocationRequest, SendVenueRequest, \
+    SendContactRequest, SendChatActionRequest
+from .plugins import TokenBucket
+from .workers import WorkerIterator
+
+BROADCAST_METHODS = {SendMessageRequest: 'send_message',
+                     SendPhotoRequest: 'send_photo',
+                     SendVideoRequest: 'send_video',
+                     SendAudioRequest: 'send_audio',
+                     SendDocumentRequest: 'send_document',
+                     SendStickerRequest: 'send_sticker',
+                     SendVoiceRequest: 'send_voice',
+                     SendLocationRequest: 'send_location',
+                     SendVenueRequest: 'send_venue',
+                     SendContactRequest: 'send_contact',
+                     SendChatActionRequest: 'send_chat_action'}
+
+
+class BroadcastResult:
+    """
+    Result of sending a broadcast request to a chat.
+
+    .. attribute:: index
+
+        Position of chat in chat identifiers sequence.
+
+    .. attribute:: chat_id
+
+        Chat identifier.
+
+    .. attribute:: result
+
+        Method result (usually sent :class:`~aiotelebot.messages.Message`) or :data:`None` if it failed.
+
+    .. attribute:: error
+
+        Exception raised sending request or :data:`None` if it was sent.
+    """
+
+    __slots__ = ('index', 'chat_id', 'result', 'error')
+
+    def __init__(self, index, chat_id, result=None, error=None):
+        self.index = index
+        self.chat_id = chat_id
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return '<BroadcastResult {} chat_id={} ok={}>'.format(self.index, self.chat_id, self.ok)
+
+
+class Broadcast(WorkerIterator):
+    """
+    Asynchronous iterator which sends same request to many chats and yields a
+    :class:`~BroadcastResult` for each chat, in completion order.
+
+    Request is serialized once, only chat identifier is serialized for each chat. No more
+    than ``concurrency`` requests are sent at same time and, if ``rate`` is defined, no more
+    than ``rate`` requests per second are sent. Chat identifiers are read when they are
+    going to be sent, so they could come from a huge (asynchronous) iterable. Sending stops
+    when results are not consumed. Requests in process are cancelled when broadcast is
+    closed, so use it as an asynchronous context manager if iteration could be stopped early.
+
+    Broadcast could be resumed using :attr:`~Broadcast.checkpoint` as ``start_at``, then
+    chats which results were already yielded are skipped.
+
+    .. code-block:: python
+
+        async with bot.broadcast(SendMessageRequest(text='Hello'), chat_ids) as broadcast:
+            async for result in broadcast:
+                if not result.ok:
+                    log_error(result.chat_id, result.error)
+                save_checkpoint(broadcast.checkpoint)
+
+    :param bot: Bot used to send requests.
+    :param request: Request model or :class:`~aiotelebot.formatters.RequestTemplate` with substitutable
+                    ``chat_id``. Request model ``chat_id`` is ignored.
+    :param chat_ids: Iterable or asynchronous iterable of chat identifiers.
+    :param method: Bot method name. By default, it is chosen by request class. It raises
+                   :class:`ValueError` if it is not given and request class has no default method.
+    :param concurrency: Maximum number of requests sent at same time.
+    :param rate: Maximum number of requests per second.
+    :param start_at: Number of chat identifiers to skip.
+    :param loop: Event loop.
+    """
+
+    def __init__(self, bot, request, chat_ids, method=None, concurrency=10, rate=None, start_at=0, loop=None):
+        super(Broadcast, self).__init__(concurrency, loop or bot.loop)
+        self.bot = bot
+        if isinstance(request, RequestTemplate):
+            if 'chat_id' not in request.fields:
+                raise ValueError('Request template must have chat_id substitutable field')
+            self.template = request
+        else:
+            self.template = ChatRequestTemplate(request)
+        if method is None:
+            try:
+                method = BROADCAST_METHODS[type(self.template.request)]
+            except KeyError:
+                raise ValueError('Request type {} could not be broadcast, '
+                                 'method must be given'.format(type(self.template.request).__name__))
+        self.method = getattr(bot, method)
+        self.rate_bucket = TokenBucket(rate) if rate else None
+
+        self.start_at = start_at
+        self.checkpoint = start_at
+        self.read_chats = 0
+        self.sent = 0
+        self.failed = 0
+
+        if hasattr(chat_ids, '__aiter__'):
+            self._chat_ids = chat_ids.__aiter__()
+            self._is_async_source = True
+        else:
+            self._chat_ids = iter(chat_ids)
+            self._is_async_source = False
+
+        self._source_lock = None
+        self._index = 0
+        self._done_indexes = set()
+
+    async def _next_chat_id(self):
+        if self._is_async_source:
+            return await self._chat_ids.__anext__()
+        try:
+            return next(self._chat_ids)
+        except StopIteration:
+            raise StopAsyncIteration()
+
+    async def _next_item(self):
+        async with self._source_lock:
+            while self._index < self.start_at:
+                await self._next_chat_id()
+                self._index += 1
+
+            chat_id = await self._next_chat_id()
+            index = self._index
+            self._index += 1
+            self.read_chats += 1
+            return index, chat_id
+
+    async def _process(self, item):
+        index, chat_id = item
+        if self.rate_bucket is not None:
+            delay = self.rate_bucket.reserve(self.loop.time())
+            if delay:
+                await asyncio.sleep(delay)
+
+        try:
+            result = await self.method(self.template.prepare(chat_id=chat_id))
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            self.failed += 1
+            return BroadcastResult(index, chat_id, error=ex)
+
+        self.sent += 1
+        return BroadcastResult(index, chat_id, result=result)
+
+    def _start(self):
+        self._source_lock = Lock()
+        super(Broadcast, self)._start()
+
+    def _on_result(self, result):
+        self._done_indexes.add(result.index)
+        while self.checkpoint in self._done_indexes:
+            self._done_indexes.remove(self.checkpoint)
+            self.checkpoint += 1
+
+    def get_stats(self):
+        """
+        Returns broadcast progress.
+
+        :return: Dictionary with statistics.
+        """
+        return {'read_chats': self.read_chats,
+                'sent': self.sent,
+                'failed': self.failed,
+                'checkpoint': self.checkpoint}
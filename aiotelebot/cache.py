@@ -0,0 +1,91 @@
+from collections import OrderedDict
+from time import monotonic
+
+
+class TTLCache:
+    """
+    Least recently used cache where entries expire after a time to live.
+
+    :param max_size: Maximum number of entries. Least recently used entries are evicted first.
+    :param ttl: Default time to live of entries, in seconds.
+    """
+
+    def __init__(self, max_size=1000, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        """
+        Returns value stored for a key. If key does not exist or it has expired, ``default``
+        is returned.
+
+        :param key: Entry key.
+        :param default: Value to return when key is not in cache.
+        """
+        try:
+            expires_at, value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        if expires_at <= monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a value for a key.
+
+        :param key: Entry key.
+        :param value: Value to store.
+        :param ttl: Time to live of entry. If it is not defined, default time to live is used.
+        """
+        self._data[key] = (monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        """
+        Removes an entry from cache.
+
+        :param key: Entry key.
+        """
+        self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_stats(self):
+        """
+        Returns cache statistics.
+
+        :return: Dictionary with statistics.
+        """
+        return {'size': len(self._data),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations}
@@ -0,0 +1,119 @@
+from typing import Callable, Any, Union, List
+
+from .messages import Message
+
+
+class Command:
+    """
+    Bot command parsed from a message.
+
+    .. attribute:: name
+
+        Command name without leading slash and bot name suffix.
+
+    .. attribute:: bot_name
+
+        Bot name suffix (``/command@bot_name``) or :data:`None`.
+
+    .. attribute:: text
+
+        Text after command.
+
+    .. attribute:: args
+
+        Text after command split by whitespaces.
+    """
+
+    __slots__ = ('name', 'bot_name', 'text', 'args')
+
+    def __init__(self, name: str, bot_name: Union[str, None] = None, text: str = ''):
+        self.name = name
+        self.bot_name = bot_name
+        self.text = text
+        self.args = text.split()
+
+    def is_addressed_to(self, username: Union[str, None]) -> bool:
+        """
+        Checks whether command is addressed to bot with given username. Commands without
+        bot name suffix are addressed to any bot.
+
+        :param username: Bot username
+        """
+        if self.bot_name is None or username is None:
+            return True
+        return self.bot_name.lower() == username.lower()
+
+    def __repr__(self):
+        return '<Command {} bot_name={} args={}>'.format(self.name, self.bot_name, self.args)
+
+
+class CommandRoute:
+    """
+    Command route definition.
+    """
+
+    __slots__ = ('command', 'func', 'pass_args')
+
+    def __init__(self, command: str, func: Callable[..., Any], pass_args: bool = False):
+        self.command = command
+        self.func = func
+        self.pass_args = pass_args
+
+    async def __call__(self, message: Message, command: Command):
+        if self.pass_args:
+            return await self.func(message, command.args)
+        return await self.func(message)
+
+
+class CommandRouter:
+    """
+    Command routing table. Command names and aliases are case insensitive.
+    """
+
+    def __init__(self):
+        self._routes = {}
+
+    def register(self, command: str, func: Callable[..., Any],
+                 aliases: Union[List[str], None] = None, pass_args: bool = False) -> CommandRoute:
+        """
+        Register a command function.
+
+        :param command: Command name.
+        :param func: Command function.
+        :param aliases: Other names for same command.
+        :param pass_args: Whether command arguments must be passed to function.
+        :return: Command route.
+        """
+        route = CommandRoute(command, func, pass_args=pass_args)
+        for name in [command] + list(aliases or []):
+            self._routes[name.lstrip('/').lower()] = route
+        return route
+
+    def get_route(self, name: str) -> Union[CommandRoute, None]:
+        """
+        Returns route for a command name or alias. If it does not exist, :data:`None` is returned.
+
+        :param name: Command name or alias.
+        """
+        return self._routes.get(name.lower())
+
+    @staticmethod
+    def parse(message: Message) -> Union[Command, None]:
+        """
+        Parse a command from message. Only commands at beginning of message are used.
+
+        :param message: Message to parse.
+        :return: Command or :data:`None` if message does not start by a command.
+        """
+        text = message.text
+        entities = message.entities
+        if not text or not entities:
+            return None
+
+        for entity in entities:
+            if entity.offset == 0 and entity.type == 'bot_command':
+                length = entity.length
+                name, _, bot_name = text[1:length].partition('@')
+                return Command(name, bot_name=bot_name or None, text=text[length:].strip())
+
+        return None
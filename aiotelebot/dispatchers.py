@@ -0,0 +1,326 @@
+import asyncio
+import weakref
+from asyncio import Queue, Semaphore, Event
+from collections import deque
+
+
+class BaseDispatcher:
+    """
+    Base update dispatcher. A dispatcher decides when and how updates received by a
+    :class:`~aiotelebot.Bot` are processed.
+
+    Updates dispatched using a dispatcher are processed completely (update processors,
+    message processors, commands, etc.) by dispatcher workers, so no other task is
+    created for each update.
+    """
+
+    def __init__(self, loop=None):
+        self.loop = loop
+        self.dispatched_updates = 0
+        self.processed_updates = 0
+        self.total_wait_time = 0
+        self.max_wait_time = 0
+
+    def assign_bot(self, bot):
+        self.bot = bot
+        self.loop = self.loop or bot.loop
+
+    @property
+    def bot(self):
+        return self._bot()
+
+    @bot.setter
+    def bot(self, bot):
+        self._bot = weakref.ref(bot)
+
+    async def dispatch(self, update):
+        """
+        Dispatch an update. It could wait until dispatcher is able to accept it.
+
+        :param update: Update to dispatch.
+        """
+        raise NotImplementedError()
+
+    async def process(self, update, enqueued_at):
+        """
+        Process an update previously dispatched.
+
+        :param update: Update to process.
+        :param enqueued_at: Loop time when update was dispatched.
+        """
+        wait_time = self.loop.time() - enqueued_at
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+
+        try:
+            await self.bot.process_update(update)
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            self.bot.logger.exception(ex)
+        finally:
+            self.processed_updates += 1
+
+    def get_stats(self):
+        """
+        Returns dispatcher statistics.
+
+        :return: Dictionary with statistics.
+        """
+        try:
+            average_wait_time = self.total_wait_time / self.processed_updates
+        except ZeroDivisionError:
+            average_wait_time = 0
+
+        return {'dispatched_updates': self.dispatched_updates,
+                'processed_updates': self.processed_updates,
+                'average_wait_time': average_wait_time,
+                'max_wait_time': self.max_wait_time}
+
+    def close(self):
+        """
+        Stops dispatcher workers. Pending updates are discarded.
+        """
+        pass
+
+
+class QueueDispatcher(BaseDispatcher):
+    """
+    Dispatcher which uses a bounded queue and a fixed number of workers.
+
+    When queue is full, :meth:`~QueueDispatcher.dispatch` waits until there is room for
+    new update, so get updates loop is slowed down.
+
+    :param max_size: Maximum number of updates waiting on queue.
+    :param workers: Number of workers processing updates.
+    """
+
+    def __init__(self, max_size=1000, workers=10, loop=None):
+        super(QueueDispatcher, self).__init__(loop=loop)
+        self.max_size = max_size
+        self.workers = workers
+        self.backpressure_time = 0
+
+        self._queue = None
+        self._workers = []
+
+    @property
+    def queue_depth(self):
+        """
+        Number of updates waiting on queue.
+        """
+        try:
+            return self._queue.qsize()
+        except AttributeError:
+            return 0
+
+    def _start_workers(self):
+        if self._queue is None:
+            self._queue = Queue(maxsize=self.max_size)
+
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.workers:
+            self._workers.append(asyncio.ensure_future(self._worker(), loop=self.loop))
+
+    async def _worker(self):
+        # Queue is kept, as close() discards it while worker is still being cancelled.
+        queue = self._queue
+        while True:
+            update, enqueued_at = await queue.get()
+            try:
+                await self.process(update, enqueued_at)
+            finally:
+                queue.task_done()
+
+    async def dispatch(self, update):
+        self._start_workers()
+
+        start = self.loop.time()
+        await self._queue.put((update, self.loop.time()))
+        self.backpressure_time += self.loop.time() - start
+        self.dispatched_updates += 1
+
+    async def join(self):
+        """
+        Waits until all dispatched updates are processed.
+        """
+        if self._queue is not None:
+            await self._queue.join()
+
+    def get_stats(self):
+        stats = super(QueueDispatcher, self).get_stats()
+        stats.update({'queue_depth': self.queue_depth,
+                      'max_size': self.max_size,
+                      'workers': self.workers,
+                      'backpressure_time': self.backpressure_time})
+        return stats
+
+    def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        self._queue = None
+
+
+class _Lane:
+
+    __slots__ = ('updates', 'wakeup', 'task')
+
+    def __init__(self):
+        self.updates = deque()
+        self.wakeup = Event()
+        self.task = None
+
+
+class ChatLaneDispatcher(BaseDispatcher):
+    """
+    Dispatcher which keeps updates from same chat (or same user for inline queries, chosen inline
+    results and callback queries) in order. Each chat has a serial lane, and lanes are processed in parallel.
+    Updates without chat or user (see :meth:`~ChatLaneDispatcher.get_update_key`) have no lane, so they
+    are processed concurrently.
+
+    Lanes are removed when they are idle for ``idle_timeout`` seconds, so memory used only depends
+    on active chats.
+
+    When there are ``max_pending`` updates waiting or being processed, :meth:`~ChatLaneDispatcher.dispatch`
+    waits until one of them is processed, so get updates loop is slowed down.
+
+    :param max_pending: Maximum number of updates waiting or being processed.
+    :param idle_timeout: Seconds to wait for a new update on a lane before evicting it.
+    """
+
+    def __init__(self, max_pending=1000, idle_timeout=5, loop=None):
+        super(ChatLaneDispatcher, self).__init__(loop=loop)
+        self.max_pending = max_pending
+        self.idle_timeout = idle_timeout
+        self.evicted_lanes = 0
+        self.backpressure_time = 0
+
+        self._lanes = {}
+        self._tasks = set()
+        self._pending = None
+        self._pending_updates = 0
+        self._idle = None
+
+    @staticmethod
+    def get_update_key(update):
+        """
+        Returns lane key for an update. By default it is chat identifier for messages and
+        user identifier for inline queries, chosen inline results and callback queries.
+        Updates with :data:`None` key are not kept in order.
+
+        :param update: Update message
+        :return: Lane key
+        """
+        # Values are read using paths, so inner models of lazy updates are not decoded.
+        for field in ('message', 'edited_message'):
+            if update.get_path_value(field) is not None:
+                return update.get_path_value(field, 'chat', 'id')
+
+        for field in ('inline_query', 'chose_inline_result', 'callback_query'):
+            if update.get_path_value(field) is not None:
+                return update.get_path_value(field, 'from', 'id')
+
+        return None
+
+    @property
+    def active_lanes(self):
+        """
+        Number of lanes currently alive.
+        """
+        return len(self._lanes)
+
+    @property
+    def pending_updates(self):
+        """
+        Number of updates waiting or being processed.
+        """
+        return self._pending_updates
+
+    async def dispatch(self, update):
+        if self._pending is None:
+            self._pending = Semaphore(self.max_pending)
+            self._idle = Event()
+
+        start = self.loop.time()
+        await self._pending.acquire()
+        self.backpressure_time += self.loop.time() - start
+        self.dispatched_updates += 1
+        self._pending_updates += 1
+        self._idle.clear()
+
+        key = self.get_update_key(update)
+        if key is None:
+            task = asyncio.ensure_future(self._process_update(self._pending, update, self.loop.time()),
+                                         loop=self.loop)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return
+
+        try:
+            lane = self._lanes[key]
+        except KeyError:
+            lane = self._lanes[key] = _Lane()
+            lane.task = asyncio.ensure_future(self._lane_worker(key, lane), loop=self.loop)
+
+        lane.updates.append((update, self.loop.time()))
+        lane.wakeup.set()
+
+    async def _process_update(self, pending, update, enqueued_at):
+        try:
+            await self.process(update, enqueued_at)
+        finally:
+            pending.release()
+            # Updates dispatched before closing dispatcher are not pending anymore.
+            if pending is self._pending:
+                self._pending_updates -= 1
+                if not self._pending_updates:
+                    self._idle.set()
+
+    async def _lane_worker(self, key, lane):
+        # Semaphore is kept, as close() discards it while lane is still being cancelled.
+        pending = self._pending
+        try:
+            while True:
+                while lane.updates:
+                    await self._process_update(pending, *lane.updates.popleft())
+
+                lane.wakeup.clear()
+                try:
+                    await asyncio.wait_for(lane.wakeup.wait(), timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    if not lane.updates:
+                        break
+        finally:
+            if self._lanes.get(key) is lane:
+                del self._lanes[key]
+                self.evicted_lanes += 1
+
+    async def join(self):
+        """
+        Waits until all dispatched updates are processed.
+        """
+        if self._idle is not None and self.pending_updates:
+            await self._idle.wait()
+
+    def get_stats(self):
+        stats = super(ChatLaneDispatcher, self).get_stats()
+        stats.update({'active_lanes': self.active_lanes,
+                      'evicted_lanes': self.evicted_lanes,
+                      'pending_updates': self.pending_updates,
+                      'max_pending': self.max_pending,
+                      'backpressure_time': self.backpressure_time})
+        return stats
+
+    def close(self):
+        for lane in list(self._lanes.values()):
+            lane.task.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        self._lanes = {}
+        self._tasks = set()
+        self._pending = None
+        self._pending_updates = 0
+        if self._idle is not None:
+            # Pending updates are discarded, so nobody must wait for them.
+            self._idle.set()
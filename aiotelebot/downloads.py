@@ -0,0 +1,212 @@
+import os
+
+from .messages import File
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class DownloadError(Exception):
+    """
+    File could not be downloaded or it was not downloaded completely.
+    """
+
+
+class FileChunks:
+    """
+    Asynchronous iterator over chunks of a file stored on Telegram servers. File information
+    is requested using :meth:`~aiotelebot.Bot.get_file` unless it is given, and file content
+    is read from download response in chunks, so no more than ``chunk_size`` bytes are kept
+    in memory.
+
+    It is possible to start download at an ``offset``. If server does not honor ``Range``
+    header, download starts from the beginning: :attr:`start_offset` tells position of
+    first chunk once download is opened.
+
+    Downloaded size is verified against file size, if it is known, when download finishes.
+    Download starting at file end (server responds ``416 Range Not Satisfiable``) is considered
+    finished, unless server reports a different file size.
+
+    Download slot is held until download finishes or it is closed, so if iteration could
+    be stopped before its end, use it as an asynchronous context manager:
+
+    .. code-block:: python
+
+        async with bot.iter_file_chunks(file_id) as chunks:
+            async for chunk in chunks:
+                if process(chunk):
+                    break
+
+    :param bot: Bot used to download file.
+    :param file_id: File identifier.
+    :param file: File information. If it is given, ``file_id`` is not needed.
+    :param chunk_size: Maximum chunk size in bytes.
+    :param offset: Position to start download.
+    :param semaphore: Semaphore used to limit concurrent downloads.
+    """
+
+    def __init__(self, bot, file_id: str = None, file: File = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 offset: int = 0, semaphore=None):
+        if file_id is None and file is None:
+            raise ValueError('File identifier or file information is needed')
+
+        self.bot = bot
+        self.file_id = file_id
+        self.file = file
+        self.chunk_size = chunk_size
+        self.offset = offset
+        self.start_offset = None
+        self.semaphore = semaphore
+
+        self._response = None
+        self._acquired = False
+        self._finished = False
+
+    @property
+    def size(self):
+        """
+        Expected file size or :data:`None` if it is unknown.
+        """
+        return self.file.file_size if self.file is not None else None
+
+    async def open(self):
+        """
+        Starts download. It waits until download could start.
+        """
+        if self.start_offset is not None:
+            return
+
+        if self.semaphore is not None:
+            await self.semaphore.acquire()
+            self._acquired = True
+
+        try:
+            if self.file is None:
+                self.file = await self.bot.get_file(file_id=self.file_id)
+
+            if self.offset and self.size is not None and self.offset >= self.size:
+                if self.offset > self.size:
+                    raise DownloadError('Offset {} does not match file size {}'.format(self.offset, self.size))
+                self.start_offset = self.offset
+                self._finish()
+                return
+
+            response = await self.bot.download_file(self.file.file_path, offset=self.offset)
+            if response.status == 200:
+                self.offset = 0
+            elif response.status == 416 and self.offset:
+                response.close()
+                size = self._get_range_size(response)
+                if size is not None and size != self.offset:
+                    raise DownloadError('Offset {} does not match file size {}'.format(self.offset, size))
+                self.start_offset = self.offset
+                self._finish()
+                return
+            elif response.status != 206:
+                response.close()
+                raise DownloadError('Unexpected response status {}'.format(response.status))
+
+            self._response = response
+            self.start_offset = self.offset
+        except BaseException:
+            self._finish()
+            raise
+
+    @staticmethod
+    def _get_range_size(response):
+        # Content-Range of an unsatisfiable range is "bytes */<size>".
+        try:
+            return int(response.headers['Content-Range'].rsplit('/', 1)[1])
+        except (KeyError, IndexError, ValueError):
+            return None
+
+    def _finish(self):
+        self._finished = True
+        if self._acquired:
+            self._acquired = False
+            self.semaphore.release()
+
+    def close(self):
+        """
+        Stops download.
+        """
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+        self._finish()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        if self._acquired or self._response is not None:
+            self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self._finished:
+            raise StopAsyncIteration()
+
+        await self.open()
+        if self._response is None:
+            raise StopAsyncIteration()
+
+        try:
+            chunk = await self._response.content.read(self.chunk_size)
+        except BaseException:
+            self.close()
+            raise
+
+        if chunk:
+            self.offset += len(chunk)
+            return chunk
+
+        self._response.release()
+        self._response = None
+        self._finish()
+
+        if self.size is not None and self.offset != self.size:
+            raise DownloadError('Downloaded {} bytes, expected {}'.format(self.offset, self.size))
+        raise StopAsyncIteration()
+
+
+async def download_to(chunks: FileChunks, destination, resume: bool = False) -> File:
+    """
+    Writes file chunks to a path or to a file object. Writes run in default executor, so
+    event loop is not blocked by disk.
+
+    :param chunks: File chunks iterator.
+    :param destination: File path or writable binary file object.
+    :param resume: Whether to resume download of an incomplete file. Only for file paths.
+    :return: File information.
+    """
+    loop = chunks.bot.loop
+
+    if hasattr(destination, 'write'):
+        try:
+            async for chunk in chunks:
+                await loop.run_in_executor(None, destination.write, chunk)
+        finally:
+            chunks.close()
+        return chunks.file
+
+    if resume and os.path.exists(destination):
+        chunks.offset = os.path.getsize(destination)
+
+    try:
+        await chunks.open()
+        out = await loop.run_in_executor(None, open, destination, 'ab' if chunks.start_offset else 'wb')
+        try:
+            async for chunk in chunks:
+                await loop.run_in_executor(None, out.write, chunk)
+        finally:
+            await loop.run_in_executor(None, out.close)
+    finally:
+        chunks.close()
+
+    return chunks.file
@@ -0,0 +1,76 @@
+import os
+from asyncio import get_event_loop
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class AsyncFile:
+    """
+    File read in a thread pool, so event loop is never blocked by file system. It could be
+    used as :class:`~aiotelebot.messages.FileModel` stream and it is sent in chunks.
+
+    File is opened on first read, or using :meth:`open`.
+
+    :param path: File path.
+    :param executor: Executor used to open and read file. By default, event loop one is used.
+    :param loop: Event loop.
+    """
+
+    def __init__(self, path: str, executor=None, loop=None):
+        self.name = path
+        self.executor = executor
+        self.loop = loop
+        self.size = None
+
+        self._file = None
+
+    @property
+    def closed(self):
+        """
+        Whether file has been opened and closed.
+        """
+        return self._file is not None and self._file.closed
+
+    async def _run(self, func, *args):
+        if self.loop is None:
+            self.loop = get_event_loop()
+        return await self.loop.run_in_executor(self.executor, func, *args)
+
+    def _open(self):
+        file = open(self.name, 'rb')
+        try:
+            return file, os.fstat(file.fileno()).st_size
+        except BaseException:
+            file.close()
+            raise
+
+    async def open(self):
+        """
+        Opens file, if it is not opened yet.
+        """
+        if self._file is None:
+            self._file, self.size = await self._run(self._open)
+
+    async def read(self, size: int = DEFAULT_CHUNK_SIZE) -> bytes:
+        """
+        Reads a chunk of file.
+
+        :param size: Maximum chunk size in bytes.
+        """
+        await self.open()
+        return await self._run(self._file.read, size)
+
+    def fileno(self):
+        if self._file is None:
+            raise OSError('File is not opened')
+        return self._file.fileno()
+
+    def close(self):
+        """
+        Closes file.
+        """
+        if self._file is not None:
+            self._file.close()
+
+    def __repr__(self):
+        return '<AsyncFile {!r}>'.format(self.name)
@@ -1,36 +1,469 @@
-from json import dumps
+from datetime import timedelta
+from enum import Enum
+from functools import lru_cache
+from json import dumps, JSONEncoder as BaseJSONEncoder
 
 from aiohttp.hdrs import CONTENT_TYPE
 from aiohttp.multipart import MultipartWriter
-from aiohttp.payload import get_payload
+from aiohttp.payload import get_payload, Payload
 from multidict import CIMultiDict
 
-from dirty_models.fields import ArrayField, ModelField
+from dirty_models.fields import ArrayField, ModelField, MultiTypeField, DateTimeBaseField
 from dirty_models.models import BaseModel
-from dirty_models.utils import ModelFormatterIter, JSONEncoder, ListFormatterIter
+from dirty_models.utils import ModelFormatterIter, JSONEncoder
 from service_client.json import json_decoder
 
-from .messages import FileModel, Response
+from .files import AsyncFile, DEFAULT_CHUNK_SIZE
+from .messages import FileModel, Response, BUFFER_TYPES
 
 
 class ContainsFileError(Exception):
     pass
 
 
-class TelegramModelFormatterIter(ModelFormatterIter):
+def _stdlib_json_backend():
+    return BaseJSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def _ujson_backend():
+    import ujson
+
+    def ujson_dumps(obj):
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+
+    return ujson_dumps
+
+
+def _orjson_backend():
+    import orjson
+
+    def orjson_dumps(obj):
+        return orjson.dumps(obj).decode()
+
+    return orjson_dumps
+
+
+JSON_BACKENDS = {'orjson': _orjson_backend,
+                 'ujson': _ujson_backend,
+                 'json': _stdlib_json_backend}
+
+json_dumps = None
+
+
+def set_json_backend(backend=None):
+    """
+    Sets JSON backend used to serialize request models. It could be a backend name (``orjson``, ``ujson``
+    or ``json``) or a callable which gets a structure of plain Python types and returns a JSON string.
+
+    If it is not defined, first available backend is used, in order: ``orjson``, ``ujson``, ``json``.
+
+    :param backend: Backend name or callable.
+    """
+    global json_dumps
+
+    if callable(backend):
+        json_dumps = backend
+        return
+
+    if backend is not None:
+        json_dumps = JSON_BACKENDS[backend]()
+        return
+
+    for name in ('orjson', 'ujson', 'json'):
+        try:
+            json_dumps = JSON_BACKENDS[name]()
+            return
+        except ImportError:
+            pass
+
+
+set_json_backend()
+
+
+def _identity(value):
+    return value
+
+
+def _build_value_encoder(field):
+    if isinstance(field, MultiTypeField):
+        field_encoders = [(field_type, _build_value_encoder(field_type)) for field_type in field.field_types]
+
+        def encode_multi_type(value):
+            for field_type, encoder in field_encoders:
+                if field_type.check_value(value):
+                    return encoder(value)
+            for field_type, encoder in field_encoders:
+                if field_type.can_use_value(value):
+                    return encoder(value)
+            return value
+
+        return encode_multi_type
+
+    elif isinstance(field, ModelField):
+        return encode_model
+
+    elif isinstance(field, ArrayField):
+        item_encoder = _build_value_encoder(field.field_type)
+
+        def encode_array(value):
+            return [item_encoder(item) for item in value]
+
+        return encode_array
+
+    elif isinstance(field, DateTimeBaseField):
+        return field.get_formatted_value
+
+    def encode_value(value):
+        if isinstance(value, Enum):
+            return value.value
+        elif isinstance(value, timedelta):
+            return value.total_seconds()
+        return value
+
+    return encode_value
+
+
+@lru_cache(maxsize=None)
+def get_model_encoding_plan(model_cls):
+    """
+    Returns a dictionary with an encoder function for each field of a model class. Encoders
+    convert field values to plain Python types. It is computed once per model class.
+
+    :param model_cls: Model class
+    :return: Dictionary of field name and encoder function.
+    """
+    return {name: _build_value_encoder(field) for name, field in model_cls.get_structure().items()}
+
+
+def encode_model(model):
+    """
+    Converts a model to a structure of plain Python types using its encoding plan.
+
+    :param model: Model to convert.
+    :return: dict
+    """
+    if isinstance(model, FileModel):
+        raise ContainsFileError()
+
+    plan = get_model_encoding_plan(type(model))
+    result = {}
+    for name in model.get_fields():
+        value = model.get_field_value(name)
+        result[name] = None if value is None else plan.get(name, _identity)(value)
+    return result
+
+
+def _encode_request(model):
+    result = encode_model(model)
+    for name, value in result.items():
+        if isinstance(value, (dict, list)):
+            result[name] = json_dumps(value)
+    return result
+
+
+def serialize_request(model, method=None):
+    """
+    Serializes a request model to JSON using current JSON backend. Nested models and arrays
+    are serialized as JSON strings, as Telegram expects.
+
+    :param model: Request model.
+    :param method: Telegram method name. If it is defined, it is added as ``method`` field, as
+                   Telegram expects on webhook responses.
+    :return: JSON string
+    """
+    result = _encode_request(model)
+    if method:
+        result['method'] = method
+    return json_dumps(result)
+
+
+class PreparedRequest:
+    """
+    Request already serialized to JSON. It is sent as it is, without model validation or encoding.
+
+    :param body: JSON string.
+    :param chat_id: Chat identifier of request, used by plugins.
+    """
+
+    __slots__ = ('body', 'chat_id')
+
+    def __init__(self, body: str, chat_id=None):
+        self.body = body
+        self.chat_id = chat_id
+
+
+class RequestTemplate:
+    """
+    Request model serialized once in order to be sent many times changing only some fields,
+    like ``chat_id`` or ``reply_to_message_id``. Only substitutable fields are serialized
+    for each request, and no model is built.
+
+    Templates could be used directly on :class:`~aiotelebot.Bot` methods, using keyword
+    parameters for substitutable fields:
+
+    .. code-block:: python
+
+        template = RequestTemplate(SendMessageRequest(text='Hello', reply_markup=keyboard),
+                                   fields=['chat_id', 'reply_to_message_id'])
+        await bot.send_message(template, chat_id=chat_id, reply_to_message_id=message_id)
+
+    :param request: Request model. Values of substitutable fields are used as default values.
+    :param fields: Substitutable field names.
+    """
+
+    __slots__ = ('request', 'fields', '_encoders', '_defaults', '_tail')
+
+    def __init__(self, request: BaseModel, fields=('chat_id',)):
+        if contains_file(request):
+            raise ValueError('Requests with files could not be used as template')
+
+        plan = get_model_encoding_plan(type(request))
+        for name in fields:
+            if name not in plan:
+                raise ValueError('Field {} does not exist in {}'.format(name, type(request).__name__))
+
+        self.request = request
+        self.fields = tuple(fields)
+        self._encoders = {name: plan[name] for name in self.fields}
+
+        data = _encode_request(request)
+        self._defaults = {name: data.pop(name) for name in self.fields if name in data}
+        self._tail = (',' + json_dumps(data)[1:]) if data else '}'
+
+    def _encode_field(self, name, value):
+        if not isinstance(value, dict):
+            value = self._encoders[name](value)
+        if isinstance(value, (dict, list)):
+            value = json_dumps(value)
+        return '"{}":{}'.format(name, json_dumps(value))
 
-    def format_field(self, field, value):
-        if isinstance(field, ModelField):
+    def prepare(self, **values) -> PreparedRequest:
+        """
+        Returns prepared request using given values for substitutable fields. Default values
+        are used for missing fields, and :data:`None` removes a field.
+
+        :param values: Values of substitutable fields.
+        """
+        chat_id = values.get('chat_id', self._defaults.get('chat_id'))
+        fields = []
+        for name in self.fields:
+            if name in values:
+                value = values.pop(name)
+                if value is not None:
+                    fields.append(self._encode_field(name, value))
+            elif name in self._defaults:
+                fields.append('"{}":{}'.format(name, json_dumps(self._defaults[name])))
+
+        if values:
+            raise TypeError('Fields {} are not substitutable'.format(', '.join(sorted(values))))
+
+        if not fields:
+            return PreparedRequest('{' + self._tail[1:] if self._tail != '}' else '{}', chat_id=chat_id)
+
+        return PreparedRequest('{' + ','.join(fields) + self._tail, chat_id=chat_id)
+
+    __call__ = prepare
+
+
+class ChatRequestTemplate(RequestTemplate):
+    """
+    Request template where only chat identifier is substitutable. It is faster when a request
+    is sent to many chats.
+
+    :param request: Request model. Its ``chat_id`` is ignored.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, request: BaseModel):
+        super(ChatRequestTemplate, self).__init__(request, fields=('chat_id',))
+
+    def prepare(self, chat_id) -> PreparedRequest:
+        """
+        Returns prepared request for a chat.
+
+        :param chat_id: Chat identifier.
+        """
+        return PreparedRequest('{"chat_id":' + json_dumps(chat_id) + self._tail, chat_id=chat_id)
+
+    __call__ = prepare
+
+
+def _can_contain_file(field):
+    if isinstance(field, ModelField):
+        return issubclass(field.model_class, FileModel)
+    elif isinstance(field, MultiTypeField):
+        return any(_can_contain_file(field_type) for field_type in field.field_types)
+    return False
+
+
+@lru_cache(maxsize=None)
+def get_file_field_names(model_cls):
+    """
+    Returns names of fields of a model class which could contain a :class:`~aiotelebot.messages.FileModel`.
+    It is computed once per model class.
+
+    :param model_cls: Model class
+    :return: Tuple of field names
+    """
+    return tuple(name for name, field in model_cls.get_structure().items() if _can_contain_file(field))
+
+
+def contains_file(model):
+    """
+    Checks whether a model is or contains a :class:`~aiotelebot.messages.FileModel` in any of its fields.
+
+    :param model: Model to check
+    :return: bool
+    """
+    if isinstance(model, FileModel):
+        return True
+    return any(isinstance(model.get_field_value(name), FileModel)
+               for name in get_file_field_names(type(model)))
+
+
+def close_files(model):
+    """
+    Closes streams owned by :class:`~aiotelebot.messages.FileModel` fields of a model.
+
+    :param model: Model which contains files.
+    """
+    if isinstance(model, FileModel):
+        model.close()
+        return
+
+    for name in get_file_field_names(type(model)):
+        value = model.get_field_value(name)
+        if isinstance(value, FileModel):
+            value.close()
+
+
+class AsyncFilePayload(Payload):
+    """
+    Multipart payload which sends an :class:`~aiotelebot.files.AsyncFile` in chunks, reading them
+    in a thread pool. File is closed once it is sent, or when payload is closed without being sent.
+
+    :meth:`decode` and :meth:`as_bytes` read whole file again from its path, so payload could still
+    be sent. They are not used to send requests.
+    """
+
+    #: Maximum size in bytes of files which could be decoded.
+    max_decode_size = 1024 * 1024
+
+    def __init__(self, value: AsyncFile, *args, **kwargs):
+        super(AsyncFilePayload, self).__init__(value, *args, **kwargs)
+        self._size = value.size
+
+    def _read_all(self):
+        with open(self._value.name, 'rb') as file:
+            return file.read()
+
+    def decode(self, encoding='utf-8', errors='strict'):
+        """
+        Decodes file content. File is read synchronously, blocking event loop, so it is only
+        meant for debugging and logging. It raises :class:`ValueError` if file is larger than
+        :attr:`max_decode_size`.
+        """
+        with open(self._value.name, 'rb') as file:
+            data = file.read(self.max_decode_size + 1)
+
+        if len(data) > self.max_decode_size:
+            raise ValueError('File {} is too large to be decoded'.format(self._value.name))
+        return data.decode(encoding, errors)
+
+    async def as_bytes(self, encoding='utf-8', errors='strict'):
+        return await self._value._run(self._read_all)
+
+    async def write(self, writer):
+        try:
+            chunk = await self._value.read()
+            while chunk:
+                await writer.write(chunk)
+                chunk = await self._value.read()
+        finally:
+            self._value.close()
+
+    def _close(self):
+        self._value.close()
+
+
+class BufferPayload(Payload):
+    """
+    Multipart payload which sends a buffer (``bytes``, ``bytearray``, ``memoryview`` or ``mmap``)
+    in chunks. Chunks are slices of a memory view, so buffer is never copied.
+    """
+
+    _autoclose = True
+
+    def __init__(self, value, *args, **kwargs):
+        value = memoryview(value).cast('B')
+        super(BufferPayload, self).__init__(value, *args, **kwargs)
+        self._size = len(value)
+
+    def decode(self, encoding='utf-8', errors='strict'):
+        return self._value.tobytes().decode(encoding, errors)
+
+    async def as_bytes(self, encoding='utf-8', errors='strict'):
+        return self._value.tobytes()
+
+    async def write(self, writer):
+        for offset in range(0, self._size, DEFAULT_CHUNK_SIZE):
+            await writer.write(self._value[offset:offset + DEFAULT_CHUNK_SIZE])
+
+
+def _to_multipart_value(value):
+    if isinstance(value, (dict, list)):
+        return json_dumps(value)
+    return value
+
+
+def _build_multipart_encoder(field, value_encoder):
+    if _can_contain_file(field):
+        def encode_file_field(value):
             if isinstance(value, FileModel):
                 return value
-            return dumps(value, cls=JSONEncoder)
-        elif isinstance(field, ArrayField):
-            return dumps(ListFormatterIter(obj=value,
-                                           field=value.get_field_type(),
-                                           parent_formatter=ModelFormatterIter(model=self.model)),
-                         cls=JSONEncoder)
+            return _to_multipart_value(value_encoder(value))
+
+        return encode_file_field
+
+    def encode_field(value):
+        return _to_multipart_value(value_encoder(value))
+
+    return encode_field
+
+
+@lru_cache(maxsize=None)
+def get_multipart_encoding_plan(model_cls):
+    """
+    Returns a dictionary with a multipart encoder function for each field of a model class.
+    Encoders return a :class:`~aiotelebot.messages.FileModel` as it is, nested models and arrays
+    serialized to JSON, and any other value as a plain Python type. It is computed once per model class.
+
+    :param model_cls: Model class
+    :return: Dictionary of field name and encoder function.
+    """
+    return {name: _build_multipart_encoder(field, get_model_encoding_plan(model_cls)[name])
+            for name, field in model_cls.get_structure().items()}
+
 
-        return super(TelegramModelFormatterIter, self).format_field(field, value)
+def iter_multipart_fields(model):
+    """
+    Iterates over fields of a request model encoded for a multipart body using its
+    multipart encoding plan.
+
+    :param model: Request model.
+    :return: Iterator of field name and encoded value.
+    """
+    plan = get_multipart_encoding_plan(type(model))
+    for name in model.get_fields():
+        value = model.get_field_value(name)
+        yield name, None if value is None else plan.get(name, _identity)(value)
+
+
+class TelegramModelFormatterIter(ModelFormatterIter):
+
+    def __iter__(self):
+        return iter_multipart_fields(self.model)
 
 
 class TelegramJsonEncoder(JSONEncoder):
@@ -44,21 +477,31 @@ class TelegramJsonEncoder(JSONEncoder):
 
 
 def telegram_encoder(content, *args, **kwargs):
-    try:
+    if isinstance(content, PreparedRequest):
+        return content.body
+
+    if not isinstance(content, BaseModel):
         return dumps(content, cls=TelegramJsonEncoder)
-    except ContainsFileError:
-        pass
 
-    formatter = TelegramModelFormatterIter(content)
+    if not contains_file(content):
+        try:
+            return serialize_request(content)
+        except ContainsFileError:
+            pass
 
     kwargs['endpoint_desc']['stream_request'] = True
 
     mp = MultipartWriter('form-data')
 
-    for field, value in formatter:
+    for field, value in iter_multipart_fields(content):
         content_dispositon = {'name': field}
         if isinstance(value, FileModel):
-            part = get_payload(value.stream, headers=CIMultiDict())
+            if isinstance(value.stream, AsyncFile):
+                part = AsyncFilePayload(value.stream, headers=CIMultiDict())
+            elif isinstance(value.stream, BUFFER_TYPES):
+                part = BufferPayload(value.stream, headers=CIMultiDict())
+            else:
+                part = get_payload(value.stream, headers=CIMultiDict())
             if value.name:
                 content_dispositon['filename'] = value.name
             if value.mime_type:
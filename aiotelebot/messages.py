@@ -1,24 +1,54 @@
 import datetime
 from enum import Enum
 from mimetypes import guess_type
+from mmap import mmap
 
 from os.path import split
 
+from dirty_models.base import Unlocker
 from dirty_models.fields import StringIdField, StringField, ModelField, DateTimeField, ArrayField, IntegerField, \
     BooleanField, FloatField, MultiTypeField, BaseField, BlobField, EnumField
 from dirty_models.models import BaseModel
 
+from .files import AsyncFile
+
+
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap)
+
 
 class StreamField(BaseField):
     """
-    Field type used to send streams (files) to Telegram.
+    Field type used to send streams (files) to Telegram. Streams could be file paths,
+    file objects or buffers (``bytes``, ``bytearray``, ``memoryview`` or ``mmap``),
+    which are sent without copying them.
     """
 
     def convert_value(self, value):
         return open(value, 'rb')
 
     def check_value(self, value):
-        return hasattr(value, 'read')
+        return isinstance(value, BUFFER_TYPES) or hasattr(value, 'read')
+
+    def __set__(self, obj, value):
+        if not isinstance(obj, FileModel):
+            super(StreamField, self).__set__(obj, value)
+            return
+
+        previous = obj.stream
+        super(StreamField, self).__set__(obj, value)
+        if obj.stream is previous:
+            return
+
+        # Replaced stream is closed if it was opened by file model
+        obj._close_stream(previous)
+        # Streams opened from paths belong to file model
+        BaseModel.__setattr__(obj, '__owns_stream__', not self.check_value(value) and self.can_use_value(value))
+
+    def __delete__(self, obj):
+        if isinstance(obj, FileModel):
+            obj.close()
+            BaseModel.__setattr__(obj, '__owns_stream__', False)
+        super(StreamField, self).__delete__(obj)
 
     def can_use_value(self, value):
         return isinstance(value, str)
@@ -27,12 +57,40 @@ class StreamField(BaseField):
 class FileModel(BaseModel):
     """
     File model which contains an stream and some metadata avout stream.
+
+    Streams opened by file model (from file paths) are owned by it, so they are closed
+    once request which contains file model finishes, even if it fails, or when they are
+    replaced. Other streams must be closed by their owners. Copies share stream and its ownership.
     """
 
     name = StringIdField()
     mime_type = StringIdField()
     stream = StreamField()
 
+    __owns_stream__ = False
+
+    @property
+    def owns_stream(self):
+        """
+        Whether stream was opened by file model.
+        """
+        return self.__owns_stream__
+
+    def close(self):
+        """
+        Closes stream if it is owned by file model.
+        """
+        self._close_stream(self.stream)
+
+    def _close_stream(self, stream):
+        if self.__owns_stream__ and stream is not None:
+            stream.close()
+
+    def copy(self):
+        file = super(FileModel, self).copy()
+        BaseModel.__setattr__(file, '__owns_stream__', self.__owns_stream__)
+        return file
+
     @classmethod
     def from_filename(cls, filename):
         try:
@@ -44,6 +102,30 @@ class FileModel(BaseModel):
                          name=split(filename)[-1],
                          mime_type=mime_type)
 
+    @classmethod
+    async def from_filename_async(cls, filename, executor=None, loop=None):
+        """
+        Builds a file model from a file path without blocking event loop: file is opened
+        and its mime type is guessed in a thread pool, and it is read in chunks while it is sent.
+
+        :param filename: File path.
+        :param executor: Executor used to open and read file. By default, event loop one is used.
+        :param loop: Event loop.
+        """
+        stream = AsyncFile(filename, executor=executor, loop=loop)
+        await stream.open()
+
+        try:
+            mime_type = (await stream.loop.run_in_executor(executor, guess_type, filename))[0]
+        except IndexError:  # pragma: no cover
+            mime_type = None
+
+        file = FileModel(stream=stream,
+                         name=split(filename)[-1],
+                         mime_type=mime_type)
+        BaseModel.__setattr__(file, '__owns_stream__', True)
+        return file
+
 
 class PersistentModel(BaseModel):
     """
@@ -1239,6 +1321,110 @@ class Update(BaseModel):
     chose_inline_result = ModelField(model_class=ChosenInlineResult)
     callback_query = ModelField(model_class=CallbackQuery)
 
+    def get_path_value(self, *path):
+        """
+        Returns value of a field of an inner model following a path of field names, like
+        ``update.get_path_value('message', 'chat', 'id')``. If any field in path is not
+        defined, :data:`None` is returned.
+
+        :param path: Field names.
+        """
+        return _get_path_value(self, path)
+
+
+def _get_path_value(value, path):
+    for name in path:
+        if value is None:
+            return None
+        value = value.get(name) if isinstance(value, dict) else value.get_field_value(name)
+    return value
+
+
+class LazyUpdate(Update):
+    """
+    Update model which keeps raw data of its inner models (message, inline query, callback query...)
+    and decodes them only when they are accessed. So, updates dropped by update processors
+    are never fully decoded.
+
+    Use :meth:`~LazyUpdate.get_path_value` to read a few values of an inner model
+    (like chat identifier) without decoding it.
+    """
+
+    def __init__(self, data=None, *args, **kwargs):
+        lazy_data = {}
+        if isinstance(data, dict):
+            structure = self.__structure__
+            data = data.copy()
+            for name in [name for name in data if isinstance(structure.get(name), ModelField)]:
+                value = data.pop(name)
+                if value is not None:
+                    lazy_data[name] = value
+
+        BaseModel.__setattr__(self, '__lazy_data__', lazy_data)
+        super(LazyUpdate, self).__init__(data, *args, **kwargs)
+
+    def _decode_field(self, name):
+        try:
+            value = self.__lazy_data__.pop(name)
+        except KeyError:
+            return
+
+        with Unlocker(self):
+            setattr(self, name, value)
+
+    def get_path_value(self, *path):
+        """
+        Returns value of a field of an inner model following a path of field names. Inner
+        models which are not decoded yet are not decoded: value is read from raw data.
+
+        :param path: Field names.
+        """
+        try:
+            value = self.__lazy_data__[path[0]]
+        except (KeyError, IndexError):
+            return super(LazyUpdate, self).get_path_value(*path)
+        return _get_path_value(value, path[1:])
+
+    def decode(self):
+        """
+        Decodes all pending inner models.
+        """
+        for name in list(self.__lazy_data__.keys()):
+            self._decode_field(name)
+
+    def get_field_value(self, name):
+        if self.__lazy_data__:
+            self._decode_field(self.get_real_name(name))
+        return super(LazyUpdate, self).get_field_value(name)
+
+    def set_field_value(self, name, value):
+        self.__lazy_data__.pop(self.get_real_name(name), None)
+        super(LazyUpdate, self).set_field_value(name, value)
+
+    def delete_field_value(self, name):
+        self._decode_field(self.get_real_name(name))
+        super(LazyUpdate, self).delete_field_value(name)
+
+    def get_fields(self):
+        result = super(LazyUpdate, self).get_fields()
+        result.extend([name for name in self.__lazy_data__ if name not in result])
+        return result
+
+    def export_data(self):
+        self.decode()
+        return super(LazyUpdate, self).export_data()
+
+    def export_modified_data(self):
+        self.decode()
+        return super(LazyUpdate, self).export_modified_data()
+
+    def is_modified(self):
+        self.decode()
+        return super(LazyUpdate, self).is_modified()
+
+    def __contains__(self, item):
+        return item in self.__lazy_data__ or super(LazyUpdate, self).__contains__(item)
+
 
 class GetUpdatesRequest(BaseModel):
     """
@@ -1270,6 +1456,17 @@ class SetWebhookRequest(BaseModel):
 ############
 # Response #
 ############
+class ResponseParameters(BaseModel):
+    """
+    Contains information about why a request was unsuccessful.
+
+    .. seealso:: https://core.telegram.org/bots/api#responseparameters
+    """
+
+    migrate_to_chat_id = IntegerField()
+    retry_after = IntegerField()
+
+
 class Response(BaseModel):
     """
     Response model.
@@ -1279,3 +1476,4 @@ class Response(BaseModel):
     result = BlobField()
     description = StringField()
     error_code = IntegerField()
+    parameters = ModelField(model_class=ResponseParameters)
@@ -0,0 +1,361 @@
+import asyncio
+import os
+from asyncio import get_event_loop
+from hashlib import sha256
+
+from dirty_models.model_types import ListModel
+from dirty_models.models import BaseModel
+from service_client.plugins import BasePlugin
+
+from .cache import TTLCache
+from .files import AsyncFile
+from .messages import FileModel, BUFFER_TYPES
+
+RATE_LIMITED_ENDPOINTS = ('send_message', 'forward_message', 'send_photo', 'send_audio', 'send_document',
+                          'send_sticker', 'send_video', 'send_voice', 'send_location', 'send_venue',
+                          'send_contact', 'edit_message_text', 'edit_message_caption', 'edit_message_reply_markup')
+
+UPLOAD_ENDPOINTS = {'send_photo': 'photo',
+                    'send_audio': 'audio',
+                    'send_document': 'document',
+                    'send_sticker': 'sticker',
+                    'send_video': 'video',
+                    'send_voice': 'voice'}
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter. Callers are served in arrival order: each call reserves next
+    available token, so no call could be overtaken by a later one.
+
+    :param rate: Tokens per second.
+    :param capacity: Maximum number of tokens (burst size).
+    """
+
+    __slots__ = ('rate', 'capacity', '_interval', '_next_at')
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._interval = 1 / rate
+        self._next_at = 0
+
+    def reserve(self, now):
+        """
+        Reserves a token.
+
+        :param now: Current time.
+        :return: Seconds to wait until reserved token is available.
+        """
+        next_at = max(self._next_at, now - (self.capacity - 1) * self._interval)
+        self._next_at = next_at + self._interval
+        return max(next_at - now, 0)
+
+    def is_idle(self, now):
+        """
+        Returns whether bucket is full, so it could be discarded.
+
+        :param now: Current time.
+        """
+        return self._next_at <= now - (self.capacity - 1) * self._interval
+
+
+class RateLimit(BasePlugin):
+    """
+    Service client plugin which limits rate of requests in order to honor Telegram limits:
+    about 30 messages per second overall, no more than one message per second to same chat
+    and no more than 20 messages per minute to same group.
+
+    Requests are not rejected when limits are exceeded. They wait until they could be sent.
+    Each request waits for its chat budget before it waits for global budget, so a busy
+    chat does not take global budget from other chats.
+
+    .. code-block:: python
+
+        bot = Bot(token, client_plugins=[RateLimit()])
+
+    :param global_rate: Global requests per second.
+    :param chat_rate: Requests per second to same private chat.
+    :param group_rate: Requests per second to same group or channel.
+    :param global_capacity: Global burst size.
+    :param chat_capacity: Burst size for same private chat.
+    :param group_capacity: Burst size for same group or channel.
+    :param endpoints: Rate limited endpoints. Only requests with ``chat_id`` are limited.
+    :param max_idle_chats: Number of chat buckets which triggers discarding idle ones.
+    :param loop: Event loop.
+    """
+
+    def __init__(self, global_rate=30, chat_rate=1, group_rate=20 / 60,
+                 global_capacity=30, chat_capacity=1, group_capacity=1,
+                 endpoints=RATE_LIMITED_ENDPOINTS, max_idle_chats=1000, loop=None):
+        self.global_bucket = TokenBucket(global_rate, global_capacity)
+        self.chat_rate = chat_rate
+        self.chat_capacity = chat_capacity
+        self.group_rate = group_rate
+        self.group_capacity = group_capacity
+        self.endpoints = set(endpoints)
+        self.max_idle_chats = max_idle_chats
+        self.loop = loop
+
+        self.queued_requests = 0
+        self.limited_requests = 0
+        self.delayed_requests = 0
+        self.total_wait_time = 0
+        self.max_wait_time = 0
+
+        self._chat_buckets = {}
+
+    @staticmethod
+    def _parse_chat_id(chat_id):
+        # Chat identifiers could be sent as numeric strings.
+        if isinstance(chat_id, str) and not chat_id.startswith('@'):
+            try:
+                return int(chat_id)
+            except ValueError:
+                pass
+        return chat_id
+
+    @classmethod
+    def is_group(cls, chat_id):
+        """
+        Returns whether a chat identifier belongs to a group, supergroup or channel. Channel
+        usernames start with ``@``, other chat identifiers (even numeric strings) belong to
+        groups when they are negative.
+
+        :param chat_id: Chat identifier or channel username.
+        """
+        chat_id = cls._parse_chat_id(chat_id)
+        if isinstance(chat_id, str):
+            return chat_id.startswith('@')
+        return chat_id < 0
+
+    def _get_chat_bucket(self, chat_id, now):
+        try:
+            return self._chat_buckets[chat_id]
+        except KeyError:
+            pass
+
+        if len(self._chat_buckets) >= self.max_idle_chats:
+            self._chat_buckets = {key: bucket for key, bucket in self._chat_buckets.items()
+                                  if not bucket.is_idle(now)}
+
+        if self.is_group(chat_id):
+            bucket = TokenBucket(self.group_rate, self.group_capacity)
+        else:
+            bucket = TokenBucket(self.chat_rate, self.chat_capacity)
+        self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def acquire(self, chat_id):
+        """
+        Waits until a request to a chat could be sent.
+
+        :param chat_id: Chat identifier or channel username.
+        """
+        if self.loop is None:
+            self.loop = get_event_loop()
+
+        started_at = self.loop.time()
+        self.queued_requests += 1
+        try:
+            chat_delay = self._get_chat_bucket(self._parse_chat_id(chat_id), started_at).reserve(started_at)
+            if chat_delay:
+                await asyncio.sleep(chat_delay)
+
+            global_delay = self.global_bucket.reserve(self.loop.time())
+            if global_delay:
+                await asyncio.sleep(global_delay)
+        finally:
+            self.queued_requests -= 1
+
+        self.limited_requests += 1
+        if chat_delay or global_delay:
+            wait_time = self.loop.time() - started_at
+            self.delayed_requests += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    async def prepare_payload(self, endpoint_desc, session, request_params, payload):
+        if endpoint_desc['endpoint'] in self.endpoints:
+            try:
+                chat_id = payload.chat_id
+            except AttributeError:
+                chat_id = None
+
+            if chat_id is not None:
+                await self.acquire(chat_id)
+
+        return payload
+
+    def get_stats(self):
+        """
+        Returns rate limiter statistics.
+
+        :return: Dictionary with statistics.
+        """
+        try:
+            average_wait_time = self.total_wait_time / self.delayed_requests
+        except ZeroDivisionError:
+            average_wait_time = 0
+
+        return {'queued_requests': self.queued_requests,
+                'limited_requests': self.limited_requests,
+                'delayed_requests': self.delayed_requests,
+                'average_wait_time': average_wait_time,
+                'max_wait_time': self.max_wait_time,
+                'chats': len(self._chat_buckets)}
+
+
+class DedicatedSession(BasePlugin):
+    """
+    Service client plugin which sends requests to some endpoints using a dedicated HTTP session,
+    so they use their own connection pool. It is used to keep long polling requests apart
+    from other requests.
+
+    :param session: HTTP client session.
+    :param endpoints: Endpoints which use dedicated session.
+    :param loop: Event loop.
+    """
+
+    def __init__(self, session, endpoints=('get_updates',), loop=None):
+        self.session = session
+        self.endpoints = set(endpoints)
+        self.loop = loop or get_event_loop()
+
+    async def prepare_session(self, endpoint_desc, session, request_params):
+        if endpoint_desc['endpoint'] in self.endpoints:
+            session.set_warpped_object(self.session)
+
+    def close(self):
+        # Service client could be closed on garbage collection, once event loop is closed.
+        if not self.session.closed and not self.loop.is_closed():
+            asyncio.ensure_future(self.session.close(), loop=self.loop)
+
+
+class UploadCache(BasePlugin):
+    """
+    Service client plugin which remembers ``file_id`` of uploaded files, so following sends
+    of same file use its ``file_id`` instead of uploading it again.
+
+    By default, files are identified by path, modification time and size, so only streams
+    opened from paths (like :meth:`~aiotelebot.messages.FileModel.from_filename` ones) are
+    cached. If ``by_content`` is enabled, files are identified by a hash of their content, so
+    any seekable stream could be cached, but each file is read twice. Hashes are computed in
+    default executor, so event loop is not blocked meanwhile.
+
+    .. warning::
+
+        When a cached ``file_id`` is used, file field of request model is replaced by it.
+
+    .. code-block:: python
+
+        bot = Bot(token, client_plugins=[UploadCache()])
+
+    :param max_size: Maximum number of files remembered.
+    :param ttl: Seconds to remember a file.
+    :param by_content: Whether to identify files by content hash.
+    :param endpoints: Dictionary of upload endpoints and file field names.
+    """
+
+    def __init__(self, max_size=1000, ttl=7 * 24 * 3600, by_content=False, endpoints=None):
+        self.cache = TTLCache(max_size=max_size, ttl=ttl)
+        self.by_content = by_content
+        self.endpoints = UPLOAD_ENDPOINTS if endpoints is None else endpoints
+
+        self.reused = 0
+        self.uploaded = 0
+
+    async def get_key(self, file: FileModel):
+        """
+        Returns key which identifies a file or :data:`None` if it could not be identified.
+
+        :param file: File model.
+        """
+        stream = file.stream
+        try:
+            if self.by_content:
+                return await self.service_client.loop.run_in_executor(None, self._get_content_key, stream)
+
+            if isinstance(stream, AsyncFile):
+                # It is opened on first read, so it is opened here in order to get file descriptor.
+                await stream.open()
+
+            name = stream.name
+            stat = os.fstat(stream.fileno())
+        except (AttributeError, OSError, ValueError):
+            return None
+
+        if not isinstance(name, str):
+            return None
+        return os.path.abspath(name), stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _get_content_key(stream):
+        if isinstance(stream, BUFFER_TYPES):
+            return sha256(stream).hexdigest()
+
+        position = stream.tell()
+        digest = sha256()
+        for chunk in iter(lambda: stream.read(64 * 1024), b''):
+            digest.update(chunk)
+        stream.seek(position)
+        return digest.hexdigest()
+
+    @staticmethod
+    def get_file_id(result, field):
+        """
+        Returns ``file_id`` of a file sent in a message.
+
+        :param result: Message data or :class:`~aiotelebot.messages.Message`.
+        :param field: Message file field name.
+        """
+        try:
+            value = result[field]
+            if isinstance(value, (list, ListModel)):
+                # Photos are returned in several sizes, last one is the original.
+                value = value[-1]
+            return value['file_id']
+        except (KeyError, IndexError, TypeError):
+            return None
+
+    async def prepare_payload(self, endpoint_desc, session, request_params, payload):
+        field = self.endpoints.get(endpoint_desc['endpoint'])
+        if field is None or not isinstance(payload, BaseModel):
+            return payload
+
+        file = payload.get_field_value(field)
+        if not isinstance(file, FileModel):
+            return payload
+
+        key = await self.get_key(file)
+        if key is None:
+            return payload
+
+        file_id = self.cache.get(key)
+        if file_id is None:
+            session.upload_cache_key = key
+        else:
+            setattr(payload, field, file_id)
+            file.close()
+            self.reused += 1
+        return payload
+
+    async def on_parsed_response(self, endpoint_desc, session, request_params, response):
+        key = getattr(session, 'upload_cache_key', None)
+        if key is None or not response.data.ok:
+            return
+
+        file_id = self.get_file_id(response.data.result, self.endpoints[endpoint_desc['endpoint']])
+        if file_id is not None:
+            self.cache.set(key, file_id)
+            self.uploaded += 1
+
+    def get_stats(self):
+        """
+        Returns upload cache statistics.
+
+        :return: Dictionary with statistics.
+        """
+        return {'reused': self.reused,
+                'uploaded': self.uploaded,
+                'size': len(self.cache)}
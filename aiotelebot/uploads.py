@@ -0,0 +1,193 @@
+import asyncio
+from asyncio import Queue
+
+from .messages import FileModel
+from .plugins import UPLOAD_ENDPOINTS, UploadCache
+from .workers import WorkerIterator
+
+
+class UploadResult:
+    """
+    Result of uploading a file.
+
+    .. attribute:: index
+
+        Position of file in files sequence.
+
+    .. attribute:: source
+
+        File path or file model.
+
+    .. attribute:: message
+
+        Sent :class:`~aiotelebot.messages.Message` or :data:`None` if it failed.
+
+    .. attribute:: file_id
+
+        Identifier of uploaded file or :data:`None` if it failed.
+
+    .. attribute:: error
+
+        Exception raised opening or sending file, or :data:`None` if it was sent.
+    """
+
+    __slots__ = ('index', 'source', 'message', 'file_id', 'error')
+
+    def __init__(self, index, source, message=None, file_id=None, error=None):
+        self.index = index
+        self.source = source
+        self.message = message
+        self.file_id = file_id
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return '<UploadResult {} file_id={} ok={}>'.format(self.index, self.file_id, self.ok)
+
+
+class BulkUpload(WorkerIterator):
+    """
+    Asynchronous iterator which uploads many files to a chat and yields an
+    :class:`~UploadResult` for each file, in completion order.
+
+    Files are opened ahead in a thread pool (no more than ``read_ahead`` files are waiting
+    to be sent) and no more than ``concurrency`` files are uploaded at same time. Uploading
+    stops when results are not consumed. Uploads in process are cancelled and opened files are
+    closed when upload is closed, so use it as an asynchronous context manager if iteration could
+    be stopped early.
+
+    .. code-block:: python
+
+        async with bot.upload_files(chat_id, paths, method='send_photo') as upload:
+            async for result in upload:
+                if result.ok:
+                    save_file_id(result.source, result.file_id)
+
+    :param bot: Bot used to send files.
+    :param chat_id: Chat identifier.
+    :param files: Iterable of file paths or :class:`~aiotelebot.messages.FileModel`.
+    :param method: Bot method name used to send files. It raises :class:`ValueError` if method
+                   does not upload files.
+    :param concurrency: Maximum number of files uploaded at same time.
+    :param read_ahead: Maximum number of opened files waiting to be uploaded. By default,
+                       it is same as ``concurrency``.
+    :param executor: Executor used to open and read files. By default, event loop one is used.
+    :param loop: Event loop.
+    :param fields: Other request fields, like ``caption``.
+    """
+
+    def __init__(self, bot, chat_id, files, method='send_document', concurrency=4, read_ahead=None,
+                 executor=None, loop=None, **fields):
+        super(BulkUpload, self).__init__(concurrency, loop or bot.loop)
+        self.bot = bot
+        self.chat_id = chat_id
+        try:
+            self.field = UPLOAD_ENDPOINTS[method]
+        except KeyError:
+            raise ValueError('Method {} does not upload files'.format(method))
+        self.method = getattr(bot, method)
+        self.read_ahead = concurrency if read_ahead is None else read_ahead
+        self.executor = executor
+        self.fields = fields
+
+        self.prepared = 0
+        self.uploaded = 0
+        self.failed = 0
+
+        self._files = iter(files)
+        self._prepared = None
+
+    async def _prepare(self, source):
+        if isinstance(source, FileModel):
+            return source
+
+        prepare = asyncio.ensure_future(FileModel.from_filename_async(source, executor=self.executor,
+                                                                      loop=self.loop),
+                                        loop=self.loop)
+        try:
+            return await asyncio.shield(prepare)
+        except asyncio.CancelledError:
+            # File is being opened in a thread, so it must be closed once it is opened.
+            try:
+                (await prepare).close()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            raise
+
+    async def _read(self):
+        try:
+            for index, source in enumerate(self._files):
+                try:
+                    item = (index, source, await self._prepare(source), None)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as ex:
+                    item = (index, source, None, ex)
+
+                self.prepared += 1
+                try:
+                    await self._prepared.put(item)
+                except asyncio.CancelledError:
+                    self._discard(item)
+                    raise
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            await self._results.put(ex)
+            return
+
+        for _ in range(self.concurrency):
+            await self._prepared.put(None)
+
+    async def _next_item(self):
+        item = await self._prepared.get()
+        if item is None:
+            raise StopAsyncIteration()
+        return item
+
+    async def _process(self, item):
+        index, source, file, error = item
+        if error is not None:
+            self.failed += 1
+            return UploadResult(index, source, error=error)
+
+        fields = dict(self.fields)
+        fields[self.field] = file
+        try:
+            message = await self.method(chat_id=self.chat_id, **fields)
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            self.failed += 1
+            return UploadResult(index, source, error=ex)
+
+        self.uploaded += 1
+        return UploadResult(index, source, message=message, file_id=UploadCache.get_file_id(message, self.field))
+
+    def _discard(self, item):
+        if item is not None and item[2] is not None:
+            item[2].close()
+
+    def _discard_pending(self):
+        while self._prepared is not None and not self._prepared.empty():
+            self._discard(self._prepared.get_nowait())
+
+    def _start(self):
+        self._prepared = Queue(maxsize=self.read_ahead)
+        super(BulkUpload, self)._start()
+        self._tasks.append(asyncio.ensure_future(self._read(), loop=self.loop))
+
+    def get_stats(self):
+        """
+        Returns upload progress.
+
+        :return: Dictionary with statistics.
+        """
+        return {'prepared': self.prepared,
+                'uploaded': self.uploaded,
+                'failed': self.failed}
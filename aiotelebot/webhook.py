@@ -0,0 +1,335 @@
+import asyncio
+from asyncio import Semaphore
+from contextlib import contextmanager
+
+from aiohttp import web
+from dirty_models.models import BaseModel
+from service_client.json import json_decoder
+
+from .formatters import contains_file, serialize_request
+
+try:
+    current_task = asyncio.current_task
+except AttributeError:  # pragma: no cover
+    current_task = asyncio.Task.current_task
+
+try:
+    from aiohttp.web import AppRunner, TCPSite
+except ImportError:
+    AppRunner = TCPSite = None
+
+
+class ReplySlot:
+    """
+    Reply slot of an update waiting for its webhook response.
+
+    :param keys: Keys which replies must match.
+    :param loop: Event loop.
+    """
+
+    def __init__(self, keys, loop):
+        self.keys = keys
+        self.reply = loop.create_future()
+        self.sent = loop.create_future()
+
+
+class WebhookServer:
+    """
+    HTTP server which receives updates sent by Telegram to a webhook. Updates are acknowledged
+    as soon as they are accepted, so Telegram is able to send next ones meanwhile they are processed.
+
+    If bot has a dispatcher, updates are sent to it. Otherwise, each update is processed in a new task
+    and no more than ``max_in_flight`` updates are processed at same time. When that limit is reached,
+    new requests wait until some update is processed, so Telegram slows down.
+
+    If ``reply_in_response`` is enabled, webhook response waits until first
+    :meth:`~aiotelebot.Bot.send_message` to same chat or first :meth:`~aiotelebot.Bot.answer_callback_query`
+    for same callback query is requested while update is processed (or until ``reply_timeout`` is reached).
+    That request is sent to Telegram in webhook response body, so an API call is saved. Only requests made
+    by the task which processes the update are captured: requests from other tasks or spawned by
+    processors use regular API calls, as following replies, replies with files and replies requested after
+    webhook response has been sent do. Requests made by that task after a captured reply wait until
+    webhook response has been sent, so Telegram receives them in order.
+
+    .. warning::
+
+        Telegram does not return result of requests sent in webhook response, so when a reply is
+        captured :meth:`~aiotelebot.Bot.send_message` returns :data:`True` instead of sent
+        :class:`~aiotelebot.messages.Message`. Processors must not rely on its result when
+        ``reply_in_response`` is enabled.
+
+    .. warning::
+
+        When bot has a dispatcher, server does not know when update processing finishes, so webhook
+        response of updates without reply is delayed until ``reply_timeout``.
+
+    .. code-block:: python
+
+        server = WebhookServer(bot, secret=token)
+        await server.start(port=8443, ssl_context=ssl_context)
+        await bot.set_webhook(url='https://www.example.com:8443/webhook/' + token)
+
+    :param bot: Bot which processes updates.
+    :param path: Webhook path.
+    :param secret: Secret path segment appended to webhook path.
+    :param max_in_flight: Maximum number of updates processed at same time.
+    :param keepalive_timeout: Seconds to keep idle connections opened.
+    :param reply_in_response: Whether to send first reply to an update in webhook response.
+    :param reply_timeout: Maximum seconds to wait for a reply.
+    :param loop: Event loop.
+    """
+
+    def __init__(self, bot, path='/webhook', secret=None, max_in_flight=100,
+                 keepalive_timeout=75, reply_in_response=False, reply_timeout=1, loop=None):
+        self.bot = bot
+        self.loop = loop or bot.loop
+
+        self.reply_in_response = reply_in_response
+        self.reply_timeout = reply_timeout
+        self.replies_in_response = 0
+        self._update_slots = {}
+        self._task_slots = {}
+        if reply_in_response:
+            self.bot.webhook_server = self
+
+        self.path = '/'.join([path.rstrip('/'), secret]) if secret else path
+        self.keepalive_timeout = keepalive_timeout
+        self.max_in_flight = max_in_flight
+
+        self.received_updates = 0
+        self.invalid_requests = 0
+
+        self._semaphore = None
+        self._tasks = set()
+
+        self.app = None
+        self._runner = None
+        self._handler = None
+        self._server = None
+
+    @property
+    def in_flight(self):
+        """
+        Number of updates in process.
+        """
+        return len(self._tasks)
+
+    def build_app(self) -> web.Application:
+        """
+        Builds aiohttp application with webhook route.
+
+        :return: Web application
+        """
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        return app
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """
+        Webhook request handler. It decodes update and responds as soon as update is accepted.
+
+        :param request: Webhook request
+        :return: Empty response
+        """
+        try:
+            raw_update = json_decoder(await request.read())
+        except ValueError:
+            raw_update = None
+
+        if not isinstance(raw_update, dict) or 'update_id' not in raw_update:
+            self.invalid_requests += 1
+            return web.Response(status=400)
+
+        update = self.bot.build_update(raw_update)
+        self.received_updates += 1
+
+        keys = self.get_reply_keys(update) if self.reply_in_response else []
+        if not keys:
+            await self.accept_update(update)
+            return web.Response()
+
+        slot = ReplySlot(keys, loop=self.loop)
+        self._update_slots[id(update)] = slot
+        try:
+            task = await self.accept_update(update)
+            await asyncio.wait([slot.reply] if task is None else [slot.reply, task],
+                               timeout=self.reply_timeout,
+                               return_when=asyncio.FIRST_COMPLETED)
+            slot.reply.cancel()
+
+            if slot.reply.cancelled():
+                return web.Response()
+
+            self.replies_in_response += 1
+            method, reply = slot.reply.result()
+            response = web.Response(text=serialize_request(reply, method=method), content_type='application/json')
+            await response.prepare(request)
+            await response.write_eof()
+            return response
+        finally:
+            del self._update_slots[id(update)]
+            slot.reply.cancel()
+            if not slot.sent.done():
+                slot.sent.set_result(None)
+
+    async def accept_update(self, update):
+        """
+        Accepts an update in order to be processed. It could wait until update could be accepted.
+
+        :param update: Update message
+        :return: Task which processes update or :data:`None` if update was sent to bot dispatcher.
+        """
+        if self.bot.dispatcher is not None:
+            await self.bot.dispatch_update(update)
+            return None
+
+        if self._semaphore is None:
+            self._semaphore = Semaphore(self.max_in_flight)
+        await self._semaphore.acquire()
+        task = asyncio.ensure_future(self.bot.process_update(update, wait=True), loop=self.loop)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    @staticmethod
+    def get_reply_keys(update):
+        """
+        Returns keys used to match replies with an update: chat identifier for messages
+        and callback query identifier for callback queries.
+
+        :param update: Update message
+        :return: List of keys
+        """
+        for field in ('message', 'edited_message'):
+            if update.get_path_value(field) is not None:
+                chat_id = update.get_path_value(field, 'chat', 'id')
+                return [('chat_id', chat_id)] if chat_id is not None else []
+
+        if update.get_path_value('callback_query') is not None:
+            keys = [('callback_query_id', update.get_path_value('callback_query', 'id'))]
+            chat_id = update.get_path_value('callback_query', 'message', 'chat', 'id')
+            if chat_id is not None:
+                keys.append(('chat_id', chat_id))
+            return keys
+
+        return []
+
+    @contextmanager
+    def reply_scope(self, update):
+        """
+        Binds reply slot of an update to current task while update is processed, so
+        replies requested by that task could be captured.
+
+        :param update: Update message
+        """
+        slot = self._update_slots.get(id(update))
+        task = current_task(loop=self.loop)
+        if slot is None or task is None:
+            yield
+            return
+
+        self._task_slots[task] = slot
+        try:
+            yield
+        finally:
+            if self._task_slots.get(task) is slot:
+                del self._task_slots[task]
+
+    def capture_reply(self, method, key, request):
+        """
+        Captures a request in order to send it in webhook response of update processed by current task.
+
+        :param method: Telegram method name.
+        :param key: Reply key.
+        :param request: Request model.
+        :return: Whether request was captured.
+        """
+        slot = self._task_slots.get(current_task(loop=self.loop))
+        if slot is None or slot.reply.done() or key not in slot.keys \
+                or not isinstance(request, BaseModel) or contains_file(request):
+            return False
+
+        slot.reply.set_result((method, request))
+        return True
+
+    async def wait_reply_sent(self):
+        """
+        Waits until webhook response has been sent if a reply of update processed by current task
+        has been captured.
+        """
+        slot = self._task_slots.get(current_task(loop=self.loop))
+        if slot is not None and slot.reply.done() and not slot.reply.cancelled():
+            await asyncio.shield(slot.sent)
+
+    def _task_done(self, task):
+        self._tasks.discard(task)
+        self._semaphore.release()
+        if not task.cancelled() and task.exception() is not None:
+            self.bot.logger.exception(task.exception())
+
+    async def start(self, host='0.0.0.0', port=8443, ssl_context=None):
+        """
+        Starts webhook server. Bot user is requested before, as it is done before polling updates,
+        so commands addressed to other bots and messages sent by bot itself are recognized.
+
+        Server is run using :class:`aiohttp.web.AppRunner`. Former aiohttp versions, which do not
+        have it, use application request handler.
+
+        :param host: Host to listen on.
+        :param port: Port to listen on. Telegram only supports 443, 80, 88 and 8443.
+        :param ssl_context: SSL context. Telegram only sends updates using HTTPS, so it is needed
+                            unless server is behind a proxy which terminates SSL.
+        """
+        self.bot.me = await self.bot.get_me()
+
+        self.app = self.build_app()
+        if AppRunner is not None:
+            self._runner = AppRunner(self.app, keepalive_timeout=self.keepalive_timeout)
+            await self._runner.setup()
+            await TCPSite(self._runner, host, port, ssl_context=ssl_context).start()
+        else:
+            self._handler = self.app.make_handler(loop=self.loop, keepalive_timeout=self.keepalive_timeout)
+            self._server = await self.loop.create_server(self._handler, host, port, ssl=ssl_context)
+
+    @property
+    def addresses(self):
+        """
+        Addresses server is listening on.
+        """
+        if self._runner is not None:
+            return self._runner.addresses
+        if self._server is not None:
+            return [sock.getsockname() for sock in self._server.sockets]
+        return []
+
+    async def stop(self, timeout=60):
+        """
+        Stops webhook server. It waits until updates in process are finished.
+
+        :param timeout: Seconds to wait for updates in process.
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        elif self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            await self.app.shutdown()
+            await self._handler.shutdown(timeout)
+            await self.app.cleanup()
+            self._server = None
+
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=timeout)
+
+    def get_stats(self):
+        """
+        Returns webhook server statistics.
+
+        :return: Dictionary with statistics.
+        """
+        return {'received_updates': self.received_updates,
+                'invalid_requests': self.invalid_requests,
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+                'replies_in_response': self.replies_in_response}
@@ -0,0 +1,135 @@
+import asyncio
+from asyncio import Queue
+
+
+class WorkerIterator:
+    """
+    Base asynchronous iterator which processes items with a bounded number of workers and
+    yields results in completion order. No more than ``concurrency`` items are processed at
+    same time and no more than ``concurrency`` results are waiting to be consumed, so
+    processing stops when results are not consumed.
+
+    Workers are stopped when iterator is closed, so it should be used as an asynchronous
+    context manager when iteration could be stopped before it finishes:
+
+    .. code-block:: python
+
+        async with iterator:
+            async for result in iterator:
+                if done(result):
+                    break
+
+    Subclasses must implement :meth:`_next_item` and :meth:`_process`.
+
+    :param concurrency: Maximum number of items processed at same time.
+    :param loop: Event loop.
+    """
+
+    def __init__(self, concurrency, loop):
+        self.concurrency = concurrency
+        self.loop = loop
+
+        self._results = None
+        self._tasks = None
+        self._running_workers = 0
+        self._finished = False
+
+    async def _next_item(self):
+        """
+        Returns next item to process. It raises :class:`StopAsyncIteration` when there are no more items.
+        """
+        raise NotImplementedError()
+
+    async def _process(self, item):
+        """
+        Processes an item and returns its result.
+        """
+        raise NotImplementedError()
+
+    def _discard(self, item):
+        """
+        Releases an item which is not going to be processed.
+        """
+
+    def _discard_pending(self):
+        """
+        Releases items read ahead which are not going to be processed.
+        """
+
+    def _on_result(self, result):
+        """
+        Called before a result is yielded.
+        """
+
+    async def _worker(self):
+        try:
+            while True:
+                try:
+                    item = await self._next_item()
+                except StopAsyncIteration:
+                    break
+
+                try:
+                    result = await self._process(item)
+                except asyncio.CancelledError:
+                    self._discard(item)
+                    raise
+                await self._results.put(result)
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            await self._results.put(ex)
+        finally:
+            self._running_workers -= 1
+            if self._running_workers == 0 and not self._finished:
+                await self._results.put(None)
+
+    def _start(self):
+        self._results = Queue(maxsize=self.concurrency)
+        self._running_workers = self.concurrency
+        self._tasks = [asyncio.ensure_future(self._worker(), loop=self.loop) for _ in range(self.concurrency)]
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._finished:
+            raise StopAsyncIteration()
+
+        if self._tasks is None:
+            self._start()
+
+        result = await self._results.get()
+        if result is None:
+            self._finished = True
+            raise StopAsyncIteration()
+        elif isinstance(result, Exception):
+            self.cancel()
+            raise result
+
+        self._on_result(result)
+        return result
+
+    def cancel(self):
+        """
+        Stops processing. Items in process are cancelled.
+        """
+        self._finished = True
+        for task in self._tasks or []:
+            task.cancel()
+        self._discard_pending()
+
+    async def aclose(self):
+        """
+        Stops processing and waits until items in process are cancelled.
+        """
+        self.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._discard_pending()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
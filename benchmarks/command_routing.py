@@ -0,0 +1,81 @@
+"""
+Measures time spent finding the function of a command in a message, scanning message entities
+for each step (as it was done before command router) and using :class:`~aiotelebot.commands.CommandRouter`::
+
+    python benchmarks/command_routing.py --commands 50
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from aiotelebot.commands import CommandRouter  # noqa
+from aiotelebot.messages import Message  # noqa
+
+
+async def command_func(message):
+    pass
+
+
+def build_message():
+    return Message({'message_id': 1,
+                    'from': {'id': 10000002, 'first_name': 'Telebot'},
+                    'chat': {'id': 10000001, 'type': 'group'},
+                    'date': 1475178814,
+                    'text': '/command_7@telebot arg1 @user',
+                    'entities': [{'type': 'bot_command', 'offset': 0, 'length': 18},
+                                 {'type': 'mention', 'offset': 24, 'length': 5}]})
+
+
+def find_by_entities(commands, message):
+    # Message processing looked for a command entity, then command execution looked for it again.
+    for entity in message.entities:
+        if entity.type == 'bot_command' and entity.offset == 0:
+            break
+    else:
+        return None
+
+    for entity in message.entities:
+        if entity.type == 'bot_command' and entity.offset == 0:
+            command = message.text[1:entity.length]
+            break
+    try:
+        return commands[command]
+    except KeyError:
+        return None
+
+
+def find_by_router(router, message):
+    command = router.parse(message)
+    if command is None:
+        return None
+    return router.get_route(command.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--commands', type=int, default=50, help='Registered commands')
+    parser.add_argument('--number', type=int, default=20000, help='Iterations')
+    args = parser.parse_args()
+
+    commands = {}
+    router = CommandRouter()
+    for i in range(args.commands):
+        name = 'command_{}'.format(i)
+        commands['{}@telebot'.format(name)] = command_func
+        router.register(name, command_func)
+
+    message = build_message()
+    cases = (('entities scan', lambda: find_by_entities(commands, message)),
+             ('command router', lambda: find_by_router(router, message)))
+
+    print('{:<16}{:>20}'.format('case', 'per message (us)'))
+    for name, func in cases:
+        elapsed = min(timeit.repeat(func, number=args.number, repeat=3))
+        print('{:<16}{:>20.2f}'.format(name, elapsed / args.number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Measures time spent deciding whether a request must be sent as multipart, trying to serialize
+it to JSON until a file is found (as it was done before file field detection) and checking
+file fields of request class::
+
+    python benchmarks/file_detection.py --rows 20 --columns 3
+"""
+import argparse
+import io
+import os
+import sys
+import timeit
+from json import dumps
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from aiotelebot.formatters import ContainsFileError, TelegramJsonEncoder, contains_file, telegram_encoder  # noqa
+from aiotelebot.messages import FileModel, InlineKeyboardMarkup, SendPhotoRequest  # noqa
+
+
+def build_request(rows, columns):
+    keyboard = [[{'text': 'button {} {}'.format(row, column),
+                  'callback_data': 'callback_data_{}_{}'.format(row, column)}
+                 for column in range(columns)]
+                for row in range(rows)]
+    return SendPhotoRequest({'chat_id': 12345,
+                             'photo': FileModel({'stream': io.BytesIO(b'photo')}),
+                             'caption': 'photo caption',
+                             'reply_markup': InlineKeyboardMarkup({'inline_keyboard': keyboard})})
+
+
+def detect_by_json(request):
+    try:
+        dumps(request, cls=TelegramJsonEncoder)
+    except ContainsFileError:
+        return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20, help='Keyboard rows')
+    parser.add_argument('--columns', type=int, default=3, help='Keyboard columns')
+    parser.add_argument('--number', type=int, default=1000, help='Iterations')
+    args = parser.parse_args()
+
+    request = build_request(args.rows, args.columns)
+    cases = (('json attempt', lambda: detect_by_json(request)),
+             ('file fields', lambda: contains_file(request)),
+             ('json + encoder', lambda: (detect_by_json(request),
+                                         telegram_encoder(request, endpoint_desc={}, request_params={}))),
+             ('encoder', lambda: telegram_encoder(request, endpoint_desc={}, request_params={})))
+
+    print('{:<16}{:>20}'.format('case', 'per request (us)'))
+    for name, func in cases:
+        elapsed = min(timeit.repeat(func, number=args.number, repeat=3))
+        print('{:<16}{:>20.1f}'.format(name, elapsed / args.number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Measures time spent building updates of a large getUpdates batch, decoding every update
+(as it was done before lazy updates), using lazy updates and using lazy updates when
+dispatchers read chat identifiers or handlers access messages::
+
+    python benchmarks/lazy_updates.py --updates 100
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from aiotelebot.dispatchers import ChatLaneDispatcher  # noqa
+from aiotelebot.messages import LazyUpdate, Update  # noqa
+
+
+def build_raw_update(update_id):
+    return {'update_id': update_id,
+            'message': {'message_id': update_id,
+                        'from': {'id': 10000002, 'first_name': 'Telebot', 'username': 'telebot'},
+                        'chat': {'id': 10000001 + update_id % 10, 'type': 'group', 'title': 'Group'},
+                        'date': 1475178814,
+                        'caption': '/command@telebot arg1 @user',
+                        'photo': [{'file_id': 'photo_{}_{}'.format(update_id, size),
+                                   'width': size, 'height': size, 'file_size': size * 100}
+                                  for size in (90, 320, 800)],
+                        'entities': [{'type': 'bot_command', 'offset': 0, 'length': 16},
+                                     {'type': 'mention', 'offset': 22, 'length': 5}]}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--updates', type=int, default=100, help='Updates in batch')
+    parser.add_argument('--number', type=int, default=100, help='Iterations')
+    args = parser.parse_args()
+
+    raw_updates = [build_raw_update(i) for i in range(args.updates)]
+
+    cases = (('update', lambda: [Update(raw) for raw in raw_updates]),
+             ('lazy update', lambda: [LazyUpdate(raw) for raw in raw_updates]),
+             ('lazy + key', lambda: [ChatLaneDispatcher.get_update_key(LazyUpdate(raw)) for raw in raw_updates]),
+             ('lazy + message', lambda: [LazyUpdate(raw).message for raw in raw_updates]))
+
+    print('{:<16}{:>18}'.format('case', 'per batch (ms)'))
+    for name, func in cases:
+        elapsed = min(timeit.repeat(func, number=args.number, repeat=3))
+        print('{:<16}{:>18.2f}'.format(name, elapsed / args.number * 1e3))
+
+
+if __name__ == '__main__':
+    main()
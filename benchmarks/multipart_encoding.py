@@ -0,0 +1,70 @@
+"""
+Measures time spent building a multipart body of a photo request with a large inline keyboard,
+using formatter iterators (as it was done before encoding plans) and using multipart encoding plans::
+
+    python benchmarks/multipart_encoding.py --rows 20 --columns 8
+"""
+import argparse
+import io
+import os
+import sys
+import timeit
+from json import dumps
+
+from dirty_models.fields import ArrayField, ModelField
+from dirty_models.utils import JSONEncoder, ListFormatterIter, ModelFormatterIter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from aiotelebot.formatters import iter_multipart_fields, telegram_encoder  # noqa
+from aiotelebot.messages import FileModel, InlineKeyboardMarkup, SendPhotoRequest  # noqa
+
+
+class FormatterIter(ModelFormatterIter):
+
+    def format_field(self, field, value):
+        if isinstance(field, ModelField):
+            if isinstance(value, FileModel):
+                return value
+            return dumps(value, cls=JSONEncoder)
+        elif isinstance(field, ArrayField):
+            return dumps(ListFormatterIter(obj=value,
+                                           field=value.get_field_type(),
+                                           parent_formatter=ModelFormatterIter(model=self.model)),
+                         cls=JSONEncoder)
+
+        return super(FormatterIter, self).format_field(field, value)
+
+
+def build_request(rows, columns):
+    keyboard = [[{'text': 'button {} {}'.format(row, column),
+                  'callback_data': 'callback_data_{}_{}'.format(row, column)}
+                 for column in range(columns)]
+                for row in range(rows)]
+    return SendPhotoRequest({'chat_id': 12345,
+                             'photo': FileModel({'stream': io.BytesIO(b'photo')}),
+                             'caption': 'photo caption',
+                             'reply_markup': InlineKeyboardMarkup({'inline_keyboard': keyboard})})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20, help='Keyboard rows')
+    parser.add_argument('--columns', type=int, default=8, help='Keyboard columns')
+    parser.add_argument('--number', type=int, default=1000, help='Iterations')
+    args = parser.parse_args()
+
+    request = build_request(args.rows, args.columns)
+
+    cases = (('formatter iter', lambda: list(FormatterIter(request))),
+             ('encoding plan', lambda: list(iter_multipart_fields(request))),
+             ('multipart body', lambda: telegram_encoder(request, endpoint_desc={}, request_params={})))
+
+    print('{:<16}{:>16}'.format('case', 'per body (us)'))
+    for name, func in cases:
+        elapsed = min(timeit.repeat(func, number=args.number, repeat=3))
+        print('{:<16}{:>16.1f}'.format(name, elapsed / args.number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Measures peak RSS while uploading a large document using different kinds of streams.
+
+Each kind of stream is measured in its own process against a local server which
+discards request body. Server needs aiohttp 3::
+
+    python benchmarks/upload_rss.py --size 200
+"""
+import argparse
+import asyncio
+import io
+import json
+import mmap
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from aiotelebot import Bot  # noqa
+from aiotelebot.messages import FileModel  # noqa
+
+KINDS = ('bytesio', 'bytes', 'mmap', 'path', 'async_path')
+
+RESULT = {'ok': True,
+          'result': {'message_id': 1,
+                     'chat': {'id': 1, 'type': 'private'},
+                     'date': 1475520391,
+                     'document': {'file_id': 'file_id'}}}
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def discard_body(request):
+    while await request.content.readany():
+        pass
+    return web.json_response(RESULT)
+
+
+async def build_stream(kind, path, loop):
+    if kind == 'path':
+        return FileModel.from_filename(path)
+    elif kind == 'async_path':
+        return await FileModel.from_filename_async(path, loop=loop)
+
+    with open(path, 'rb') as f:
+        if kind == 'mmap':
+            return FileModel(stream=mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        data = f.read()
+
+    if kind == 'bytesio':
+        return FileModel(stream=io.BytesIO(data))
+    return FileModel(stream=data)
+
+
+async def upload(kind, path, loop):
+    app = web.Application()
+    app.router.add_post('/bottoken/sendDocument', discard_body)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', 0).start()
+    port = runner.addresses[0][1]
+
+    bot = Bot('token', base_path='http://127.0.0.1:{}/{{prefix}}bot{{token}}'.format(port), loop=loop)
+    try:
+        document = await build_stream(kind, path, loop)
+        before = peak_rss_mb()
+        await bot.send_document(chat_id=1, document=document)
+        return before, peak_rss_mb()
+    finally:
+        bot.close()
+        await runner.cleanup()
+
+
+def run_kind(kind, path):
+    loop = asyncio.get_event_loop()
+    before, after = loop.run_until_complete(upload(kind, path, loop))
+    print(json.dumps({'kind': kind, 'before': before, 'after': after}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=200, help='Document size in MB')
+    parser.add_argument('--kind', choices=KINDS)
+    parser.add_argument('--path')
+    args = parser.parse_args()
+
+    if args.kind:
+        run_kind(args.kind, args.path)
+        return
+
+    with tempfile.NamedTemporaryFile() as f:
+        chunk = os.urandom(1024 * 1024)
+        for _ in range(args.size):
+            f.write(chunk)
+        f.flush()
+
+        print('{:<12}{:>16}{:>16}{:>16}'.format('stream', 'before (MB)', 'peak (MB)', 'upload (MB)'))
+        for kind in KINDS:
+            output = subprocess.check_output([sys.executable, __file__, '--kind', kind, '--path', f.name])
+            result = json.loads(output.decode().strip().splitlines()[-1])
+            print('{:<12}{:>16.1f}{:>16.1f}{:>16.1f}'.format(kind, result['before'], result['after'],
+                                                             result['after'] - result['before']))
+
+
+if __name__ == '__main__':
+    main()
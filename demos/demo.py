@@ -17,7 +17,7 @@ DOWNLOAD_DIR = os.path.join(os.path.dirname(__file__), 'downloads')
 
 from aiotelebot import Bot
 from aiotelebot.messages import GetFileRequest, GetUserProfilePhotoRequest, SendMessageRequest, InlineKeyboardMarkup, \
-    InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton, SendPhotoRequest, FileModel, GetUpdatesRequest
+    InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton, SendPhotoRequest, FileModel, GetUpdatesRequest, File
 
 
 def prepare_root_logger():
@@ -109,10 +109,9 @@ def download_file(ctx, file_path):
     bot = ctx.obj['bot']
 
     async def write_on_file():
-        response = await bot.download_file(file_path)
-        click.echo(os.path.join(DOWNLOAD_DIR, os.path.basename(file_path)))
-        with open(os.path.join(DOWNLOAD_DIR, os.path.basename(file_path)), 'wb') as out:
-            out.write(await response.read())
+        path = os.path.join(DOWNLOAD_DIR, os.path.basename(file_path))
+        click.echo(path)
+        await bot.download_to(path, file=File(file_path=file_path), resume=True)
 
     ctx.obj['loop'].run_until_complete(write_on_file())
 
@@ -1,5 +1,8 @@
 import os
 
+from aiohttp.streams import StreamReader
+from service_client.mocks import RawFileMock
+
 from aiotelebot.telegram_api_spec import spec
 
 MOCK_DIR = os.path.join(os.path.dirname(__file__), 'data', 'mocks')
@@ -96,3 +99,28 @@ spec['get_chat_member']['mock'] = {'mock_type': 'RawFileMock',
                                    'file': os.path.join(MOCK_DIR, 'get_chat_member.json')}
 
 mock_spec = spec
+
+
+class StreamFileMock(RawFileMock):
+    """
+    File mock which streams response content. It honors ``Range`` headers unless
+    ``ranges`` is disabled in mock description. Ranges starting at file end are not satisfiable.
+    """
+
+    async def prepare_response(self):
+        data = self.load_file(self.mock_desc['file'])
+
+        range_header = self.kwargs.get('headers', {}).get('Range')
+        if range_header and self.mock_desc.get('ranges', True):
+            offset = int(range_header[len('bytes='):-1])
+            if offset >= len(data):
+                self.response.status = 416
+                self.response.headers['Content-Range'] = 'bytes */{}'.format(len(data))
+                data = b''
+            else:
+                data = data[offset:]
+                self.response.status = 206
+
+        self.response.content = StreamReader(loop=self.loop)
+        self.response.content.feed_data(data)
+        self.response.content.feed_eof()
@@ -1,12 +1,15 @@
+import asyncio
 import datetime
 
 import os
 from asynctest.case import TestCase
 from service_client.mocks import Mock, mock_manager
+from service_client.plugins import BasePlugin
 
-from aiotelebot import Bot
-from aiotelebot.messages import User, Update, GetFileRequest, File, GetUserProfilePhotoRequest, UserProfilePhotos, \
-    SendMessageRequest, Message, Chat
+from aiotelebot import Bot, TelegramError
+from aiotelebot.formatters import RequestTemplate, PreparedRequest
+from aiotelebot.messages import User, Update, LazyUpdate, GetFileRequest, File, GetUserProfilePhotoRequest, \
+    UserProfilePhotos, SendMessageRequest, Message, Chat
 from tests.telegram_api_mock_spec import MOCK_DIR
 from .telegram_api_mock_spec import mock_spec
 
@@ -129,3 +132,210 @@ class TelegramModelFormatterIterTests(TestCase):
                                                   "entities": [{"type": "bold",
                                                                 "offset": 0,
                                                                 "length": 4}]})
+
+    async def test_send_message_template(self):
+        payloads = []
+
+        class Spy(BasePlugin):
+            async def prepare_payload(self, endpoint_desc, session, request_params, payload):
+                payloads.append(payload)
+                return payload
+
+        self.bot.service_client.add_plugins([Spy()])
+        template = RequestTemplate(SendMessageRequest(text='test'), fields=['chat_id', 'reply_to_message_id'])
+
+        response = await self.bot.send_message(template, chat_id=10000001, reply_to_message_id=5)
+
+        self.assertIsInstance(response, Message)
+        self.assertIsInstance(payloads[0], PreparedRequest)
+        self.assertEqual(payloads[0].chat_id, 10000001)
+        self.assertTrue(payloads[0].body.startswith('{"chat_id":10000001,"reply_to_message_id":5,'))
+
+    @mock_manager.patch_mock_desc({'file': os.path.join(MOCK_DIR, 'get_updates_text.json')})
+    async def test_get_updates_lazy(self):
+        self.bot.lazy_updates = True
+        updates = await self.bot.get_updates()
+        self.assertEqual(len(updates), 1)
+        self.assertIsInstance(updates[0], LazyUpdate)
+        self.assertEqual(updates[0].message.text, 'test')
+
+    async def test_start_get_updates_uses_get_updates(self):
+        processed = self.loop.create_future()
+
+        async def get_updates():
+            await asyncio.sleep(0.01)
+            return [Update({'update_id': 100000005, 'message': {'message_id': 1, 'text': 'overridden'}})]
+
+        async def update_processor(update):
+            if not processed.done():
+                processed.set_result(update)
+            return True
+
+        self.bot.get_updates = get_updates
+        self.bot.register_update_processor(update_processor)
+
+        task = asyncio.ensure_future(self.bot.start_get_updates(), loop=self.loop)
+        try:
+            update = await asyncio.wait_for(processed, timeout=1)
+        finally:
+            task.cancel()
+
+        self.assertEqual(update.message.text, 'overridden')
+        self.assertEqual(self.bot.update_offset, 100000006)
+
+    @mock_manager.patch_mock_desc({'file': os.path.join(MOCK_DIR, 'get_updates_text.json')},
+                                  endpoint='get_updates')
+    async def test_start_get_updates_pipelined(self):
+        self.bot.pipelined_updates = True
+        processed = self.loop.create_future()
+
+        async def get_updates():
+            raise AssertionError('Pipelined updates must not use get_updates')
+
+        self.bot.get_updates = get_updates
+
+        async def update_processor(update):
+            processed.set_result(update)
+            return True
+
+        self.bot.register_update_processor(update_processor)
+
+        task = asyncio.ensure_future(self.bot.start_get_updates(), loop=self.loop)
+        try:
+            update = await asyncio.wait_for(processed, timeout=1)
+        finally:
+            task.cancel()
+
+        self.assertIsInstance(update, Update)
+        self.assertEqual(update.update_id, 100000001)
+        self.assertEqual(update.message.text, 'test')
+        self.assertEqual(self.bot.update_offset, 100000002)
+
+    @mock_manager.patch_mock_desc({'file': os.path.join(MOCK_DIR, 'get_updates_text.json')},
+                                  endpoint='get_updates')
+    async def test_start_get_updates_lazy(self):
+        self.bot.pipelined_updates = True
+        self.bot.lazy_updates = True
+        processed = self.loop.create_future()
+
+        async def update_processor(update):
+            processed.set_result(update)
+            return True
+
+        self.bot.register_update_processor(update_processor)
+
+        task = asyncio.ensure_future(self.bot.start_get_updates(), loop=self.loop)
+        try:
+            update = await asyncio.wait_for(processed, timeout=1)
+        finally:
+            task.cancel()
+
+        self.assertIsInstance(update, LazyUpdate)
+        self.assertEqual(update.update_id, 100000001)
+        self.assertEqual(update.message.text, 'test')
+        self.assertEqual(self.bot.update_offset, 100000002)
+
+
+class ConnectionPoolTests(TestCase):
+
+    def setUp(self):
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       connector_config={'limit': 10},
+                       loop=self.loop)
+
+    def tearDown(self):
+        self.bot.close()
+
+    async def test_polling_uses_dedicated_session(self):
+        sessions = {}
+
+        class Spy(BasePlugin):
+            async def before_request(self, endpoint_desc, session, request_params):
+                sessions[endpoint_desc['endpoint']] = session._obj
+
+        self.bot.service_client.add_plugins([Spy()])
+        self.bot._start_polling_session()
+
+        await self.bot.get_updates()
+        await self.bot.send_message(chat_id=10000001, text='test')
+
+        self.assertIsNot(sessions['get_updates'], self.bot.service_client.session)
+        self.assertIs(sessions['get_updates'].connector, self.bot.polling_connector)
+        self.assertIs(sessions['send_message'], self.bot.service_client.session)
+
+    async def test_connection_stats(self):
+        self.assertEqual(self.bot.get_connection_stats(),
+                         {'requests': {'limit': 10, 'acquired': 0, 'idle': 0, 'waiting': 0},
+                          'polling': None})
+
+        started = self.loop.create_future()
+
+        async def get_updates():
+            if not started.done():
+                started.set_result(True)
+            await asyncio.sleep(10)
+
+        self.bot.get_updates = get_updates
+
+        task = asyncio.ensure_future(self.bot.start_get_updates(), loop=self.loop)
+        try:
+            await asyncio.wait_for(started, timeout=1)
+        finally:
+            task.cancel()
+
+        self.assertEqual(self.bot.get_connection_stats(),
+                         {'requests': {'limit': 10, 'acquired': 0, 'idle': 0, 'waiting': 0},
+                          'polling': {'limit': 1, 'acquired': 0, 'idle': 0, 'waiting': 0}})
+
+
+class FileCacheTests(TestCase):
+
+    def setUp(self):
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       loop=self.loop)
+        self.requests = []
+        requests = self.requests
+
+        class Spy(BasePlugin):
+            async def before_request(self, endpoint_desc, session, request_params):
+                requests.append(endpoint_desc['endpoint'])
+
+        self.bot.service_client.add_plugins([Spy()])
+
+    async def test_cached(self):
+        file_1 = await self.bot.get_file(file_id='aaAAbb1')
+        file_2 = await self.bot.get_file(file_id='aaAAbb1')
+
+        self.assertIs(file_1, file_2)
+        self.assertEqual(self.requests, ['get_file'])
+        self.assertEqual(self.bot.file_cache.get_stats()['hits'], 1)
+
+    async def test_coalesced(self):
+        files = await asyncio.gather(*[self.bot.get_file(file_id='aaAAbb1') for _ in range(5)])
+
+        self.assertTrue(all(file is files[0] for file in files))
+        self.assertEqual(self.requests, ['get_file'])
+        self.assertEqual(self.bot._file_requests, {})
+
+    @mock_manager.patch_mock_desc({'file': os.path.join(MOCK_DIR, 'error_bad_request.json'),
+                                   'status': 400},
+                                  endpoint='get_file')
+    async def test_error_not_cached(self):
+        with self.assertRaises(TelegramError):
+            await self.bot.get_file(file_id='aaAAbb1')
+
+        file = await self.bot.get_file(file_id='aaAAbb1')
+
+        self.assertEqual(file.file_id, 'aaAAbb1')
+        self.assertEqual(self.requests, ['get_file', 'get_file'])
+
+    async def test_disabled(self):
+        self.bot.file_cache = None
+        await self.bot.get_file(file_id='aaAAbb1')
+        await self.bot.get_file(file_id='aaAAbb1')
+
+        self.assertEqual(self.requests, ['get_file', 'get_file'])
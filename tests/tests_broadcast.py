@@ -0,0 +1,192 @@
+import asyncio
+import json
+
+from asynctest.case import TestCase
+from service_client.mocks import Mock
+
+from aiotelebot import Bot, TelegramError
+from aiotelebot.formatters import PreparedRequest
+from aiotelebot.messages import SendMessageRequest, Message, SendPhotoRequest, FileModel, EditMessageTextRequest
+from .telegram_api_mock_spec import mock_spec
+
+
+class AsyncChatIds:
+
+    def __init__(self, chat_ids):
+        self.chat_ids = iter(chat_ids)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        try:
+            return next(self.chat_ids)
+        except StopIteration:
+            raise StopAsyncIteration()
+
+
+async def collect(broadcast):
+    results = []
+    async for result in broadcast:
+        results.append(result)
+    return results
+
+
+class BroadcastTests(TestCase):
+
+    def setUp(self):
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       loop=self.loop)
+        self.request = SendMessageRequest(text='Hello')
+
+    async def test_broadcast(self):
+        results = await collect(self.bot.broadcast(self.request, range(1, 21), concurrency=5))
+
+        self.assertEqual(sorted(result.chat_id for result in results), list(range(1, 21)))
+        self.assertTrue(all(result.ok for result in results))
+        self.assertIsInstance(results[0].result, Message)
+
+    async def test_prepared_requests(self):
+        bodies = []
+
+        async def send_message(request):
+            bodies.append(json.loads(request.body))
+            return True
+
+        self.bot.send_message = send_message
+
+        broadcast = self.bot.broadcast(self.request, AsyncChatIds([1, '@channel']), concurrency=1)
+        results = await collect(broadcast)
+
+        self.assertEqual([result.index for result in results], [0, 1])
+        self.assertEqual([body['chat_id'] for body in bodies], [1, '@channel'])
+        self.assertEqual(bodies[0]['text'], 'Hello')
+        self.assertEqual(broadcast.get_stats(), {'read_chats': 2,
+                                                 'sent': 2,
+                                                 'failed': 0,
+                                                 'checkpoint': 2})
+
+    async def test_concurrency_and_errors(self):
+        running = []
+        max_running = []
+
+        async def send_message(request):
+            running.append(request.chat_id)
+            max_running.append(len(running))
+            await asyncio.sleep(0.001)
+            running.remove(request.chat_id)
+            if request.chat_id == 3:
+                raise TelegramError('Forbidden: bot was blocked by the user', 403)
+            return True
+
+        self.bot.send_message = send_message
+
+        broadcast = self.bot.broadcast(self.request, range(10), concurrency=3)
+        results = {result.chat_id: result for result in await collect(broadcast)}
+
+        self.assertEqual(max(max_running), 3)
+        self.assertFalse(results[3].ok)
+        self.assertEqual(results[3].error.code, 403)
+        self.assertEqual(broadcast.sent, 9)
+        self.assertEqual(broadcast.failed, 1)
+
+    async def test_checkpoint_and_resume(self):
+        release = asyncio.Event()
+
+        async def send_message(request):
+            if request.chat_id == 0:
+                await release.wait()
+            return True
+
+        self.bot.send_message = send_message
+
+        broadcast = self.bot.broadcast(self.request, range(5), concurrency=2)
+        results = [await broadcast.__anext__() for _ in range(3)]
+        self.assertEqual([result.chat_id for result in results], [1, 2, 3])
+        self.assertEqual(broadcast.checkpoint, 0)
+
+        release.set()
+        results = await collect(broadcast)
+        self.assertEqual(sorted(result.chat_id for result in results), [0, 4])
+        self.assertEqual(broadcast.checkpoint, 5)
+
+        broadcast = self.bot.broadcast(self.request, range(5), start_at=3)
+        results = await collect(broadcast)
+        self.assertEqual(sorted((result.index, result.chat_id) for result in results), [(3, 3), (4, 4)])
+        self.assertEqual(broadcast.checkpoint, 5)
+
+    async def test_cancel(self):
+        sent = []
+
+        async def send_message(request):
+            sent.append(request.chat_id)
+            await asyncio.sleep(0.001)
+            return True
+
+        self.bot.send_message = send_message
+
+        broadcast = self.bot.broadcast(self.request, range(1000), concurrency=2)
+        await broadcast.__anext__()
+        broadcast.cancel()
+
+        self.assertEqual(await collect(broadcast), [])
+        await asyncio.sleep(0.01)
+        self.assertLess(len(sent), 10)
+
+    async def test_break(self):
+        sent = []
+
+        async def send_message(request):
+            sent.append(request.chat_id)
+            await asyncio.sleep(0.001)
+            return True
+
+        self.bot.send_message = send_message
+
+        async with self.bot.broadcast(self.request, range(1000), concurrency=2) as broadcast:
+            async for result in broadcast:
+                break
+
+        self.assertTrue(all(task.done() for task in broadcast._tasks))
+        count = len(sent)
+        await asyncio.sleep(0.01)
+        self.assertEqual(len(sent), count)
+        self.assertLess(count, 10)
+
+    async def test_rate(self):
+        async def send_message(request):
+            return True
+
+        self.bot.send_message = send_message
+
+        start = self.loop.time()
+        results = await collect(self.bot.broadcast(self.request, range(3), rate=50))
+        self.assertEqual(len(results), 3)
+        self.assertGreaterEqual(self.loop.time() - start, 0.04)
+
+    async def test_source_error(self):
+        def chat_ids():
+            yield 1
+            raise ValueError('Source error')
+
+        with self.assertRaises(ValueError):
+            await collect(self.bot.broadcast(self.request, chat_ids(), concurrency=1))
+
+    def test_request_with_file(self):
+        with self.assertRaises(ValueError):
+            self.bot.broadcast(SendPhotoRequest(photo=FileModel(stream=__file__)), [1])
+
+    def test_request_without_method(self):
+        request = EditMessageTextRequest(message_id=1, text='Hello')
+        with self.assertRaisesRegex(ValueError, 'EditMessageTextRequest'):
+            self.bot.broadcast(request, [1])
+
+        broadcast = self.bot.broadcast(request, [1], method='edit_message_text')
+        self.assertEqual(broadcast.method, self.bot.edit_message_text)
+
+    async def test_prepared_request_is_sent(self):
+        message = await self.bot.send_message(PreparedRequest('{"chat_id":1,"text":"Hello"}', chat_id=1))
+        self.assertIsInstance(message, Message)
@@ -0,0 +1,51 @@
+from time import sleep
+from unittest.case import TestCase
+
+from aiotelebot.cache import TTLCache
+
+
+class TTLCacheTests(TestCase):
+
+    def test_get_set(self):
+        cache = TTLCache(max_size=2, ttl=10)
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get_stats(), {'size': 1,
+                                             'max_size': 2,
+                                             'hits': 1,
+                                             'misses': 1,
+                                             'evictions': 0,
+                                             'expirations': 0})
+
+    def test_lru_eviction(self):
+        cache = TTLCache(max_size=2, ttl=10)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(len(cache), 2)
+
+    def test_expiration(self):
+        cache = TTLCache(max_size=2, ttl=10)
+        cache.set('a', 1, ttl=0.001)
+        sleep(0.002)
+
+        self.assertEqual(cache.get('a', 'default'), 'default')
+        self.assertEqual(cache.expirations, 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_delete_clear(self):
+        cache = TTLCache()
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.delete('a')
+        cache.delete('z')
+        self.assertIsNone(cache.get('a'))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
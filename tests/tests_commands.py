@@ -0,0 +1,126 @@
+import asyncio
+from unittest.case import TestCase
+
+from asynctest.case import TestCase as AsyncTestCase
+from service_client.mocks import Mock
+
+from aiotelebot import Bot
+from aiotelebot.commands import CommandRouter
+from aiotelebot.messages import Message, User
+from .telegram_api_mock_spec import mock_spec
+
+
+def build_command_message(text, command_length=None, chat_id=10000001):
+    return Message({'message_id': 1,
+                    'from': {'id': 10000002,
+                             'first_name': 'Telebot'},
+                    'chat': {'id': chat_id,
+                             'type': 'group'},
+                    'date': 1475178814,
+                    'text': text,
+                    'entities': [{'type': 'bot_command',
+                                  'offset': 0,
+                                  'length': command_length or len(text.split()[0])}]})
+
+
+class CommandRouterTests(TestCase):
+
+    def setUp(self):
+        self.router = CommandRouter()
+
+    def test_parse_command(self):
+        command = self.router.parse(build_command_message('/start'))
+        self.assertEqual(command.name, 'start')
+        self.assertIsNone(command.bot_name)
+        self.assertEqual(command.text, '')
+        self.assertEqual(command.args, [])
+
+    def test_parse_command_with_bot_name_and_args(self):
+        command = self.router.parse(build_command_message('/start@TeleBot arg1  arg2'))
+        self.assertEqual(command.name, 'start')
+        self.assertEqual(command.bot_name, 'TeleBot')
+        self.assertEqual(command.text, 'arg1  arg2')
+        self.assertEqual(command.args, ['arg1', 'arg2'])
+        self.assertTrue(command.is_addressed_to('telebot'))
+        self.assertFalse(command.is_addressed_to('otherbot'))
+
+    def test_parse_no_command(self):
+        message = Message({'message_id': 1,
+                           'text': 'hello'})
+        self.assertIsNone(self.router.parse(message))
+
+    def test_parse_command_not_at_beginning(self):
+        message = Message({'message_id': 1,
+                           'text': 'hello /start',
+                           'entities': [{'type': 'bot_command',
+                                         'offset': 6,
+                                         'length': 6}]})
+        self.assertIsNone(self.router.parse(message))
+
+    def test_routes_and_aliases(self):
+        async def func(message):
+            pass
+
+        route = self.router.register('Start', func, aliases=['/begin'])
+        self.assertIs(self.router.get_route('start'), route)
+        self.assertIs(self.router.get_route('BEGIN'), route)
+        self.assertIsNone(self.router.get_route('stop'))
+
+
+class BotCommandTests(AsyncTestCase):
+
+    def setUp(self):
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       loop=self.loop)
+        self.bot.me = User({'id': 1000000001, 'username': 'telebot'})
+        self.executed = []
+
+    async def test_execute_command(self):
+        @self.bot.register_command('start', aliases=['begin'])
+        async def start(message):
+            self.executed.append(message.text)
+
+        self.assertIsNotNone(start)
+
+        await self.bot.execute_command(build_command_message('/begin@telebot'))
+        self.assertEqual(self.executed, ['/begin@telebot'])
+
+    async def test_execute_command_with_args(self):
+        async def start(message, args):
+            self.executed.append(args)
+
+        self.bot.register_command('start', start, pass_args=True)
+
+        await self.bot.execute_command(build_command_message('/start a b'))
+        self.assertEqual(self.executed, [['a', 'b']])
+
+    async def test_process_message_command_for_other_bot(self):
+        async def start(message):
+            self.executed.append('command')
+
+        async def processor(message):
+            self.executed.append('message')
+
+        self.bot.register_command('start', start)
+        self.bot.register_message_processor(processor)
+        await self.bot.process_message(build_command_message('/start@otherbot'))
+        await asyncio.sleep(0)
+        await self.bot.process_message(build_command_message('/start@telebot'))
+        await asyncio.sleep(0)
+        self.assertEqual(self.executed, ['message', 'command'])
+
+    async def test_execute_unknown_command(self):
+        await self.bot.execute_command(build_command_message('/unknown'))
+        self.assertEqual(self.executed, [])
+
+    async def test_execute_command_registered_directly(self):
+        async def start(message):
+            self.executed.append(message.text)
+
+        self.bot.registered_commands['start'] = start
+
+        with self.assertWarns(DeprecationWarning):
+            await self.bot.execute_command(build_command_message('/start'))
+        self.assertEqual(self.executed, ['/start'])
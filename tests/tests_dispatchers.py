@@ -0,0 +1,253 @@
+import asyncio
+
+from asynctest.case import TestCase
+from service_client.mocks import Mock
+
+from aiotelebot import Bot
+from aiotelebot.dispatchers import QueueDispatcher, ChatLaneDispatcher
+from aiotelebot.messages import LazyUpdate, Update
+from .telegram_api_mock_spec import mock_spec
+
+
+def build_update(update_id, chat_id=10000001, text='test'):
+    return Update({'update_id': update_id,
+                   'message': {'message_id': update_id,
+                               'from': {'id': chat_id,
+                                        'first_name': 'Telebot'},
+                               'chat': {'id': chat_id,
+                                        'first_name': 'Telebot',
+                                        'type': 'private'},
+                               'date': 1475178814,
+                               'text': text}})
+
+
+class QueueDispatcherTests(TestCase):
+
+    def setUp(self):
+        self.dispatcher = QueueDispatcher(max_size=2, workers=1)
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       dispatcher=self.dispatcher,
+                       loop=self.loop)
+
+    def tearDown(self):
+        self.dispatcher.close()
+
+    async def test_process_updates(self):
+        messages = []
+
+        async def message_processor(message):
+            messages.append(message.message_id)
+
+        self.bot.register_message_processor(message_processor)
+
+        for i in range(5):
+            await self.bot.dispatch_update(build_update(i))
+
+        await self.dispatcher.join()
+
+        self.assertEqual(messages, [0, 1, 2, 3, 4])
+        stats = self.dispatcher.get_stats()
+        self.assertEqual(stats['dispatched_updates'], 5)
+        self.assertEqual(stats['processed_updates'], 5)
+        self.assertEqual(stats['queue_depth'], 0)
+
+    async def test_backpressure(self):
+        release = asyncio.Event()
+
+        async def update_processor(update):
+            await release.wait()
+            return True
+
+        self.bot.register_update_processor(update_processor)
+
+        for i in range(3):
+            await self.bot.dispatch_update(build_update(i))
+
+        await asyncio.sleep(0)
+        self.assertEqual(self.dispatcher.queue_depth, 2)
+
+        blocked = asyncio.ensure_future(self.bot.dispatch_update(build_update(3)), loop=self.loop)
+        await asyncio.sleep(0.01)
+        self.assertFalse(blocked.done())
+
+        release.set()
+        await blocked
+        await self.dispatcher.join()
+
+        stats = self.dispatcher.get_stats()
+        self.assertEqual(stats['processed_updates'], 4)
+        self.assertGreater(stats['backpressure_time'], 0)
+        self.assertGreater(stats['max_wait_time'], 0)
+
+    async def test_processor_exception_does_not_stop_worker(self):
+        processed = []
+
+        async def message_processor(message):
+            processed.append(message.message_id)
+            raise ValueError('Fail')
+
+        self.bot.register_message_processor(message_processor)
+
+        await self.bot.dispatch_update(build_update(1))
+        await self.bot.dispatch_update(build_update(2))
+        await self.dispatcher.join()
+
+        self.assertEqual(processed, [1, 2])
+
+    async def test_close_while_processing(self):
+        started = asyncio.Event()
+
+        async def update_processor(update):
+            started.set()
+            await asyncio.sleep(10)
+
+        self.bot.register_update_processor(update_processor)
+
+        await self.bot.dispatch_update(build_update(1))
+        await started.wait()
+
+        workers = self.dispatcher._workers
+        self.dispatcher.close()
+        results = await asyncio.gather(*workers, return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, asyncio.CancelledError) for result in results), results)
+
+
+class ChatLaneDispatcherTests(TestCase):
+
+    def setUp(self):
+        self.dispatcher = ChatLaneDispatcher(max_pending=4, idle_timeout=0.01)
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       dispatcher=self.dispatcher,
+                       loop=self.loop)
+
+    def tearDown(self):
+        self.dispatcher.close()
+
+    async def test_same_chat_in_order_other_chats_in_parallel(self):
+        release = asyncio.Event()
+        processed = []
+
+        async def message_processor(message):
+            if message.chat.id == 1:
+                await release.wait()
+            processed.append((message.chat.id, message.message_id))
+
+        self.bot.register_message_processor(message_processor)
+
+        await self.bot.dispatch_update(build_update(1, chat_id=1))
+        await self.bot.dispatch_update(build_update(2, chat_id=1))
+        await self.bot.dispatch_update(build_update(3, chat_id=2))
+
+        await asyncio.sleep(0.001)
+        self.assertEqual(processed, [(2, 3)])
+        self.assertEqual(self.dispatcher.active_lanes, 2)
+
+        release.set()
+        await self.dispatcher.join()
+
+        self.assertEqual(processed, [(2, 3), (1, 1), (1, 2)])
+
+    async def test_idle_lane_eviction(self):
+        await self.bot.dispatch_update(build_update(1, chat_id=1))
+        await self.bot.dispatch_update(build_update(2, chat_id=2))
+        await self.dispatcher.join()
+
+        await asyncio.sleep(0.05)
+
+        stats = self.dispatcher.get_stats()
+        self.assertEqual(stats['active_lanes'], 0)
+        self.assertEqual(stats['evicted_lanes'], 2)
+        self.assertEqual(stats['processed_updates'], 2)
+
+    async def test_backpressure(self):
+        release = asyncio.Event()
+
+        async def update_processor(update):
+            await release.wait()
+            return True
+
+        self.bot.register_update_processor(update_processor)
+
+        for i in range(4):
+            await self.bot.dispatch_update(build_update(i, chat_id=i))
+
+        blocked = asyncio.ensure_future(self.bot.dispatch_update(build_update(5)), loop=self.loop)
+        await asyncio.sleep(0.001)
+        self.assertFalse(blocked.done())
+        self.assertEqual(self.dispatcher.pending_updates, 4)
+
+        release.set()
+        await blocked
+        await self.dispatcher.join()
+        self.assertEqual(self.dispatcher.processed_updates, 5)
+
+    def test_update_keys(self):
+        self.assertEqual(ChatLaneDispatcher.get_update_key(build_update(1, chat_id=33)), 33)
+        self.assertEqual(ChatLaneDispatcher.get_update_key(Update({'update_id': 1,
+                                                                   'inline_query': {'id': 'q1',
+                                                                                    'from': {'id': 44},
+                                                                                    'query': 'test'}})),
+                         44)
+        self.assertEqual(ChatLaneDispatcher.get_update_key(Update({'update_id': 1,
+                                                                   'callback_query': {'id': 'c1',
+                                                                                      'from': {'id': 55},
+                                                                                      'data': 'test'}})),
+                         55)
+        self.assertIsNone(ChatLaneDispatcher.get_update_key(Update({'update_id': 1})))
+
+    def test_update_keys_lazy(self):
+        update = LazyUpdate({'update_id': 1,
+                             'edited_message': {'message_id': 1, 'chat': {'id': 33, 'type': 'private'},
+                                                'date': 1475520391, 'text': 'test'}})
+        self.assertEqual(ChatLaneDispatcher.get_update_key(update), 33)
+        self.assertIn('edited_message', update.__lazy_data__)
+
+    async def test_updates_without_key_are_concurrent(self):
+        started = []
+        release = asyncio.Event()
+
+        async def update_processor(update):
+            started.append(update.update_id)
+            await release.wait()
+            return True
+
+        self.bot.register_update_processor(update_processor)
+
+        await self.bot.dispatch_update(Update({'update_id': 1}))
+        await self.bot.dispatch_update(Update({'update_id': 2}))
+        await asyncio.sleep(0.001)
+
+        self.assertEqual(started, [1, 2])
+        self.assertEqual(self.dispatcher.active_lanes, 0)
+
+        release.set()
+        await self.dispatcher.join()
+        self.assertEqual(self.dispatcher.processed_updates, 2)
+
+    async def test_close_while_processing(self):
+        started = asyncio.Event()
+
+        async def update_processor(update):
+            started.set()
+            await asyncio.sleep(10)
+
+        self.bot.register_update_processor(update_processor)
+
+        await self.bot.dispatch_update(build_update(1, chat_id=1))
+        await self.bot.dispatch_update(build_update(2, chat_id=1))
+        await self.bot.dispatch_update(Update({'update_id': 3}))
+        await started.wait()
+
+        tasks = [lane.task for lane in self.dispatcher._lanes.values()] + list(self.dispatcher._tasks)
+        joining = asyncio.ensure_future(self.dispatcher.join(), loop=self.loop)
+        self.dispatcher.close()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, asyncio.CancelledError) for result in results), results)
+        await asyncio.wait_for(joining, timeout=1)
+        self.assertEqual(self.dispatcher.pending_updates, 0)
@@ -0,0 +1,179 @@
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+
+from asynctest.case import TestCase
+from service_client.mocks import Mock, mock_manager
+
+from aiotelebot import Bot
+from aiotelebot.downloads import DownloadError
+from aiotelebot.messages import File
+from .telegram_api_mock_spec import mock_spec, MOCK_DIR
+
+STREAM_MOCK = {'mock_type': 'StreamFileMock',
+               'file': os.path.join(MOCK_DIR, 'python-logo.png')}
+
+
+class DownloadTests(TestCase):
+
+    def setUp(self):
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock(namespaces={'tests': 'tests.telegram_api_mock_spec'})],
+                       spec=mock_spec,
+                       max_downloads=2,
+                       loop=self.loop)
+
+        with open(os.path.join(MOCK_DIR, 'python-logo.png'), 'rb') as mock_file:
+            self.data = mock_file.read()
+        self.file = File(file_id='aaAAbb1', file_path='photo/file_1.jpg', file_size=len(self.data))
+
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @mock_manager.patch_mock_desc(STREAM_MOCK, endpoint='download_file')
+    async def test_iter_file_chunks(self):
+        chunks = []
+        async for chunk in self.bot.iter_file_chunks(file=self.file, chunk_size=1024):
+            chunks.append(chunk)
+
+        self.assertEqual(len(chunks), 16)
+        self.assertTrue(all(len(chunk) <= 1024 for chunk in chunks))
+        self.assertEqual(b''.join(chunks), self.data)
+
+    @mock_manager.patch_mock_desc(STREAM_MOCK, endpoint='download_file')
+    async def test_iter_file_chunks_size_mismatch(self):
+        # Mocked get_file returns a different file size
+        with self.assertRaises(DownloadError):
+            async for _ in self.bot.iter_file_chunks(file_id='aaAAbb1'):
+                pass
+
+        self.assertEqual(self.bot.download_semaphore._value, 2)
+
+    @mock_manager.patch_mock_desc(STREAM_MOCK, endpoint='download_file')
+    async def test_iter_file_chunks_break(self):
+        async with self.bot.iter_file_chunks(file=self.file, chunk_size=1024) as chunks:
+            async for _ in chunks:
+                self.assertEqual(self.bot.download_semaphore._value, 1)
+                break
+
+        self.assertEqual(self.bot.download_semaphore._value, 2)
+
+    @mock_manager.patch_mock_desc(STREAM_MOCK, endpoint='download_file')
+    async def test_iter_file_chunks_break_without_context(self):
+        chunks = self.bot.iter_file_chunks(file=self.file, chunk_size=1024)
+        async for _ in chunks:
+            break
+
+        self.assertEqual(self.bot.download_semaphore._value, 1)
+        del chunks
+        self.assertEqual(self.bot.download_semaphore._value, 2)
+
+    @mock_manager.patch_mock_desc(STREAM_MOCK, endpoint='download_file')
+    async def test_iter_file_chunks_offset(self):
+        chunks = self.bot.iter_file_chunks(file=self.file, offset=1000)
+        result = b''
+        async for chunk in chunks:
+            result += chunk
+
+        self.assertEqual(chunks.start_offset, 1000)
+        self.assertEqual(result, self.data[1000:])
+
+    @mock_manager.patch_mock_desc(dict(STREAM_MOCK, ranges=False), endpoint='download_file')
+    async def test_iter_file_chunks_offset_not_supported(self):
+        chunks = self.bot.iter_file_chunks(file=self.file, offset=1000)
+        result = b''
+        async for chunk in chunks:
+            result += chunk
+
+        self.assertEqual(chunks.start_offset, 0)
+        self.assertEqual(result, self.data)
+
+    @mock_manager.patch_mock_desc(STREAM_MOCK, endpoint='download_file')
+    async def test_download_to_file_object(self):
+        out = io.BytesIO()
+        result = await self.bot.download_to(out, file=self.file)
+
+        self.assertIs(result, self.file)
+        self.assertEqual(out.getvalue(), self.data)
+
+    @mock_manager.patch_mock_desc(STREAM_MOCK, endpoint='download_file')
+    async def test_download_to_resume(self):
+        path = os.path.join(self.tmp_dir, 'logo.png')
+        with open(path, 'wb') as out:
+            out.write(self.data[:1000])
+
+        await self.bot.download_to(path, file=self.file, resume=True)
+
+        with open(path, 'rb') as result:
+            self.assertEqual(result.read(), self.data)
+
+    @mock_manager.patch_mock_desc(dict(STREAM_MOCK, ranges=False), endpoint='download_file')
+    async def test_download_to_resume_not_supported(self):
+        path = os.path.join(self.tmp_dir, 'logo.png')
+        with open(path, 'wb') as out:
+            out.write(b'wrong data')
+
+        await self.bot.download_to(path, file=self.file, resume=True)
+
+        with open(path, 'rb') as result:
+            self.assertEqual(result.read(), self.data)
+
+    async def test_download_to_resume_completed(self):
+        path = os.path.join(self.tmp_dir, 'logo.png')
+        with open(path, 'wb') as out:
+            out.write(self.data)
+
+        await self.bot.download_to(path, file=self.file, resume=True)
+
+        with open(path, 'rb') as result:
+            self.assertEqual(result.read(), self.data)
+
+    async def test_download_to_resume_longer_than_size(self):
+        path = os.path.join(self.tmp_dir, 'logo.png')
+        with open(path, 'wb') as out:
+            out.write(self.data + b'extra')
+
+        with self.assertRaises(DownloadError):
+            await self.bot.download_to(path, file=self.file, resume=True)
+        self.assertEqual(self.bot.download_semaphore._value, 2)
+
+    @mock_manager.patch_mock_desc(STREAM_MOCK, endpoint='download_file')
+    async def test_download_to_resume_completed_unknown_size(self):
+        path = os.path.join(self.tmp_dir, 'logo.png')
+        with open(path, 'wb') as out:
+            out.write(self.data)
+
+        await self.bot.download_to(path, file=File(file_path='photo/file_1.jpg'), resume=True)
+
+        with open(path, 'rb') as result:
+            self.assertEqual(result.read(), self.data)
+        self.assertEqual(self.bot.download_semaphore._value, 2)
+
+    @mock_manager.patch_mock_desc(STREAM_MOCK, endpoint='download_file')
+    async def test_download_to_resume_longer_file(self):
+        path = os.path.join(self.tmp_dir, 'logo.png')
+        with open(path, 'wb') as out:
+            out.write(self.data + b'extra')
+
+        with self.assertRaises(DownloadError):
+            await self.bot.download_to(path, file=File(file_path='photo/file_1.jpg'), resume=True)
+
+    @mock_manager.patch_mock_desc(STREAM_MOCK, endpoint='download_file', limit=0)
+    async def test_concurrent_downloads_limit(self):
+        chunks = [self.bot.iter_file_chunks(file=self.file) for _ in range(3)]
+        await asyncio.gather(*[c.open() for c in chunks[:2]])
+
+        third = asyncio.ensure_future(chunks[2].open(), loop=self.loop)
+        await asyncio.sleep(0.01)
+        self.assertFalse(third.done())
+
+        chunks[0].close()
+        await asyncio.wait_for(third, timeout=1)
+
+        for c in chunks:
+            c.close()
+        self.assertEqual(self.bot.download_semaphore._value, 2)
@@ -0,0 +1,184 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipUnless
+
+from asynctest.case import TestCase
+from service_client.mocks import Mock, mock_manager
+
+from aiotelebot import Bot, TelegramError
+from aiotelebot.files import AsyncFile
+from aiotelebot.messages import FileModel, Message
+from aiotelebot.plugins import UploadCache
+from .telegram_api_mock_spec import mock_spec, MOCK_DIR
+
+FILENAME = os.path.join(MOCK_DIR, 'python-logo.png')
+
+
+class AsyncFileTests(TestCase):
+
+    def setUp(self):
+        with open(FILENAME, 'rb') as f:
+            self.data = f.read()
+
+    async def test_read(self):
+        stream = AsyncFile(FILENAME, loop=self.loop)
+        chunks = []
+        chunk = await stream.read(4096)
+        while chunk:
+            chunks.append(chunk)
+            chunk = await stream.read(4096)
+        stream.close()
+
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(b''.join(chunks), self.data)
+        self.assertEqual(stream.size, len(self.data))
+        self.assertTrue(stream.closed)
+
+    async def test_executor(self):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            stream = AsyncFile(FILENAME, executor=executor, loop=self.loop)
+            await stream.open()
+            self.assertEqual(os.fstat(stream.fileno()).st_size, len(self.data))
+            stream.close()
+
+    def test_fileno_not_opened(self):
+        with self.assertRaises(OSError):
+            AsyncFile(FILENAME).fileno()
+
+    async def test_open_not_found(self):
+        with self.assertRaises(FileNotFoundError):
+            await AsyncFile(os.path.join(MOCK_DIR, 'not_found.png'), loop=self.loop).open()
+
+    async def test_from_filename_async(self):
+        file = await FileModel.from_filename_async(FILENAME, loop=self.loop)
+
+        self.assertIsInstance(file.stream, AsyncFile)
+        self.assertEqual(file.name, 'python-logo.png')
+        self.assertEqual(file.mime_type, 'image/png')
+        self.assertEqual(file.stream.size, len(self.data))
+        file.stream.close()
+
+
+def count_fds():
+    return len(os.listdir('/proc/self/fd'))
+
+
+class FileOwnershipTests(TestCase):
+
+    def setUp(self):
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       loop=self.loop)
+
+    def test_owns_stream_opened_from_path(self):
+        file = FileModel.from_filename(FILENAME)
+        self.assertTrue(file.owns_stream)
+        file.close()
+        self.assertTrue(file.stream.closed)
+
+    def test_not_owns_given_stream(self):
+        with open(FILENAME, 'rb') as stream:
+            file = FileModel(stream=stream)
+            self.assertFalse(file.owns_stream)
+            file.close()
+            self.assertFalse(stream.closed)
+
+    async def test_owns_async_stream(self):
+        file = await FileModel.from_filename_async(FILENAME, loop=self.loop)
+        self.assertTrue(file.owns_stream)
+        file.close()
+        self.assertTrue(file.stream.closed)
+
+    def test_replaced_stream_closed(self):
+        file = FileModel.from_filename(FILENAME)
+        previous = file.stream
+
+        with open(FILENAME, 'rb') as stream:
+            file.stream = stream
+            self.assertTrue(previous.closed)
+            self.assertFalse(file.owns_stream)
+            file.close()
+            self.assertFalse(stream.closed)
+
+    def test_replaced_given_stream_not_closed(self):
+        with open(FILENAME, 'rb') as stream:
+            file = FileModel(stream=stream)
+            file.stream = FILENAME
+            self.assertFalse(stream.closed)
+            self.assertTrue(file.owns_stream)
+            file.close()
+
+    def test_deleted_stream_closed(self):
+        file = FileModel.from_filename(FILENAME)
+        stream = file.stream
+        del file.stream
+
+        self.assertTrue(stream.closed)
+        self.assertFalse(file.owns_stream)
+
+    def test_copy_keeps_ownership(self):
+        file = FileModel.from_filename(FILENAME)
+        copy = file.copy()
+
+        self.assertIs(copy.stream, file.stream)
+        self.assertTrue(copy.owns_stream)
+        copy.close()
+        self.assertTrue(file.stream.closed)
+
+    async def test_closed_after_send(self):
+        file = FileModel.from_filename(FILENAME)
+        message = await self.bot.send_photo(chat_id=10000002, photo=file)
+
+        self.assertIsInstance(message, Message)
+        self.assertTrue(file.stream.closed)
+
+    async def test_given_stream_not_closed_after_send(self):
+        stream = io.BytesIO(b'data')
+        await self.bot.send_photo(chat_id=10000002, photo=FileModel(stream=stream))
+
+        self.assertFalse(stream.closed)
+
+    @mock_manager.patch_mock_desc({'file': os.path.join(MOCK_DIR, 'error_bad_request.json'),
+                                   'status': 400},
+                                  endpoint='send_document')
+    async def test_closed_after_failure(self):
+        file = FileModel.from_filename(FILENAME)
+        with self.assertRaises(TelegramError):
+            await self.bot.send_document(chat_id=10000002, document=file)
+
+        self.assertTrue(file.stream.closed)
+
+
+@skipUnless(os.path.isdir('/proc/self/fd'), 'File descriptors could not be counted')
+class FileDescriptorLeakTests(TestCase):
+
+    UPLOADS = 1000
+
+    async def assert_no_leaks(self, bot):
+        fds = count_fds()
+        files = []
+        for _ in range(self.UPLOADS):
+            file = FileModel.from_filename(FILENAME)
+            files.append(file)
+            try:
+                await bot.send_photo(chat_id=10000002, photo=file)
+            except TelegramError:
+                pass
+
+        self.assertTrue(all(file.stream.closed for file in files))
+        self.assertEqual(count_fds(), fds)
+
+    async def test_uploads(self):
+        await self.assert_no_leaks(Bot('testtoken', client_plugins=[Mock()], spec=mock_spec, loop=self.loop))
+
+    async def test_failed_uploads(self):
+        with mock_manager.patch_mock_desc({'file': os.path.join(MOCK_DIR, 'error_bad_request.json'),
+                                           'status': 400},
+                                          endpoint='send_photo', limit=0):
+            await self.assert_no_leaks(Bot('testtoken', client_plugins=[Mock()], spec=mock_spec, loop=self.loop))
+
+    async def test_cached_uploads(self):
+        await self.assert_no_leaks(Bot('testtoken', client_plugins=[Mock(), UploadCache()],
+                                       spec=mock_spec, loop=self.loop))
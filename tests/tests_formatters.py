@@ -1,17 +1,23 @@
 import re
 
 import io
+import mmap
 import os
+import tempfile
 from json import loads, dumps
 from unittest.case import TestCase
 
 from aiohttp import hdrs
+from asynctest.case import TestCase as AsyncTestCase
 from aiohttp.multipart import MultipartWriter
 
 from aiotelebot.formatters import TelegramModelFormatterIter, TelegramJsonEncoder, ContainsFileError, \
-    telegram_encoder, telegram_decoder
+    telegram_encoder, telegram_decoder, get_file_field_names, contains_file, serialize_request, set_json_backend, \
+    get_model_encoding_plan, ChatRequestTemplate, RequestTemplate, PreparedRequest, BufferPayload, \
+    get_multipart_encoding_plan, iter_multipart_fields, AsyncFilePayload
 from aiotelebot.messages import SendPhotoRequest, InlineKeyboardMarkup, AnswerInlineQueryRequest, \
-    InlineQueryResultArticle, InputTextMessageContent, FileModel, Response
+    InlineQueryResultArticle, InputTextMessageContent, FileModel, Response, SendMessageRequest, SetWebhookRequest, \
+    SendChatActionRequest
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 
@@ -458,6 +464,321 @@ class TelegramEncoderTests(TestCase):
                 raise Exception('Unknown field')
 
 
+class ContainsFileTests(TestCase):
+
+    def test_file_field_names(self):
+        self.assertEqual(get_file_field_names(SendPhotoRequest), ('photo',))
+        self.assertEqual(get_file_field_names(SetWebhookRequest), ('certificate',))
+        self.assertEqual(get_file_field_names(SendMessageRequest), ())
+
+    def test_contains_file(self):
+        request = SendPhotoRequest({'chat_id': 'chat_id_tests',
+                                    'photo': FileModel.from_filename(os.path.join(DATA_DIR, 'python-logo.png'))})
+        self.assertTrue(contains_file(request))
+        request.photo.stream.close()
+
+    def test_not_contains_file(self):
+        self.assertFalse(contains_file(SendPhotoRequest({'chat_id': 'chat_id_tests',
+                                                         'photo': 'photoId'})))
+        self.assertFalse(contains_file(SendMessageRequest({'chat_id': 'chat_id_tests',
+                                                           'text': 'text'})))
+
+
+class SerializeRequestTests(TestCase):
+
+    def tearDown(self):
+        set_json_backend()
+
+    def test_simple(self):
+        request = SendChatActionRequest({'chat_id': 12345,
+                                         'action': SendChatActionRequest.Action.TYPING})
+
+        self.assertEqual(loads(serialize_request(request)), {'chat_id': 12345,
+                                                             'action': 'typing'})
+
+    def test_same_as_json_encoder(self):
+        request = SendMessageRequest({'chat_id': 'chat_id_tests',
+                                      'text': 'text ñ',
+                                      'parse_mode': SendMessageRequest.ParseMode.MODE_HTML,
+                                      'reply_markup': InlineKeyboardMarkup(
+                                          {'inline_keyboard': [[{'text': 'but1_1',
+                                                                 'callback_data': 'callback_data_1_1'}],
+                                                               [{'text': 'but2_1',
+                                                                 'url': 'http://example.com'}]]})})
+
+        data = loads(serialize_request(request))
+        expected = loads(dumps(request, cls=TelegramJsonEncoder))
+
+        self.assertIsInstance(data['reply_markup'], str)
+        data['reply_markup'] = loads(data['reply_markup'])
+        expected['reply_markup'] = loads(expected['reply_markup'])
+        self.assertEqual(data, expected)
+
+    def test_array(self):
+        request = AnswerInlineQueryRequest({'inline_query_id': 'inline_query_id_tests',
+                                            'results': [InlineQueryResultArticle(
+                                                {'id': 'article_1',
+                                                 'title': 'Article 1',
+                                                 'input_message_content': InputTextMessageContent(
+                                                     {'message_text': 'text 1'})})]})
+
+        data = loads(serialize_request(request))
+        self.assertIsInstance(data['results'], str)
+        self.assertEqual(loads(data['results']), [{'id': 'article_1',
+                                                   'type': 'article',
+                                                   'title': 'Article 1',
+                                                   'hide_url': False,
+                                                   'input_message_content': {'message_text': 'text 1',
+                                                                             'parse_mode': 'Markdown',
+                                                                             'disable_web_page_preview': False}}])
+
+    def test_encoding_plan_is_cached(self):
+        self.assertIs(get_model_encoding_plan(SendMessageRequest), get_model_encoding_plan(SendMessageRequest))
+
+    def test_custom_backend(self):
+        set_json_backend(lambda obj: 'custom')
+        self.assertEqual(serialize_request(SendMessageRequest({'chat_id': 1})), 'custom')
+
+    def test_stdlib_backend(self):
+        set_json_backend('json')
+        self.assertEqual(loads(serialize_request(SendMessageRequest({'chat_id': 1, 'text': 'a'}))),
+                         {'chat_id': 1, 'text': 'a', 'parse_mode': 'Markdown', 'disable_notification': False,
+                          'disable_web_page_preview': False})
+
+
+class ChatRequestTemplateTests(TestCase):
+
+    def test_prepare(self):
+        request = SendMessageRequest({'chat_id': 'ignored',
+                                      'text': 'text',
+                                      'reply_markup': InlineKeyboardMarkup(
+                                          {'inline_keyboard': [[{'text': 'but1_1',
+                                                                 'callback_data': 'callback_data_1_1'}]]})})
+        template = ChatRequestTemplate(request)
+
+        for chat_id in (12345, '@channel'):
+            prepared = template.prepare(chat_id)
+            self.assertIsInstance(prepared, PreparedRequest)
+            self.assertEqual(prepared.chat_id, chat_id)
+
+            expected = loads(serialize_request(request))
+            expected['chat_id'] = chat_id
+            self.assertEqual(loads(prepared.body), expected)
+            self.assertEqual(telegram_encoder(prepared), prepared.body)
+
+    def test_prepare_no_more_fields(self):
+        template = ChatRequestTemplate(SendChatActionRequest())
+        self.assertEqual(template.prepare(1).body, '{"chat_id":1}')
+
+    def test_request_with_file(self):
+        with self.assertRaises(ValueError):
+            ChatRequestTemplate(SendPhotoRequest({'photo': FileModel({'stream': io.BytesIO(b'data')})}))
+
+
+class RequestTemplateTests(TestCase):
+
+    def setUp(self):
+        self.request = SendMessageRequest({'chat_id': 12345,
+                                           'text': 'text',
+                                           'reply_to_message_id': 1})
+        self.template = RequestTemplate(self.request, fields=['chat_id', 'reply_to_message_id', 'reply_markup'])
+
+    def test_prepare(self):
+        keyboard = InlineKeyboardMarkup({'inline_keyboard': [[{'text': 'but1_1',
+                                                               'callback_data': 'callback_data_1_1'}]]})
+        prepared = self.template.prepare(chat_id='@channel', reply_to_message_id=5, reply_markup=keyboard)
+
+        self.assertIsInstance(prepared, PreparedRequest)
+        self.assertEqual(prepared.chat_id, '@channel')
+
+        expected = SendMessageRequest(self.request.export_data())
+        expected.chat_id = '@channel'
+        expected.reply_to_message_id = 5
+        expected.reply_markup = keyboard
+        self.assertEqual(loads(prepared.body), loads(serialize_request(expected)))
+
+    def test_prepare_defaults(self):
+        prepared = self.template(reply_to_message_id=None)
+
+        expected = loads(serialize_request(self.request))
+        del expected['reply_to_message_id']
+        self.assertEqual(prepared.chat_id, 12345)
+        self.assertEqual(loads(prepared.body), expected)
+
+    def test_prepare_raw_values(self):
+        prepared = self.template(reply_markup={'force_reply': True})
+        self.assertEqual(loads(loads(prepared.body)['reply_markup']), {'force_reply': True})
+
+    def test_prepare_no_more_fields(self):
+        template = RequestTemplate(SendChatActionRequest(), fields=['chat_id', 'action'])
+        self.assertEqual(loads(template(chat_id=1, action='typing').body), {'chat_id': 1, 'action': 'typing'})
+        self.assertEqual(template().body, '{}')
+
+    def test_not_substitutable_field(self):
+        with self.assertRaises(TypeError):
+            self.template.prepare(text='other')
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            RequestTemplate(self.request, fields=['chat_id', 'unknown'])
+
+
+class MultipartEncodingPlanTests(TestCase):
+
+    def tearDown(self):
+        set_json_backend()
+
+    def test_plan_is_cached(self):
+        self.assertIs(get_multipart_encoding_plan(SendPhotoRequest), get_multipart_encoding_plan(SendPhotoRequest))
+
+    def test_file_field(self):
+        plan = get_multipart_encoding_plan(SendPhotoRequest)
+        file = FileModel({'stream': b'data'})
+
+        self.assertIs(plan['photo'](file), file)
+        self.assertEqual(plan['photo']('photoId'), 'photoId')
+
+    def test_nested_models_use_json_backend(self):
+        set_json_backend(lambda obj: 'custom')
+        request = SendPhotoRequest({'chat_id': 12345,
+                                    'photo': FileModel({'stream': b'data'}),
+                                    'reply_markup': InlineKeyboardMarkup(
+                                        {'inline_keyboard': [[{'text': 'but1_1',
+                                                               'callback_data': 'callback_data_1_1'}]]})})
+
+        data = dict(iter_multipart_fields(request))
+        self.assertEqual(data['reply_markup'], 'custom')
+        self.assertEqual(data['chat_id'], 12345)
+        self.assertIs(data['disable_notification'], False)
+
+
+class BufferWriter:
+
+    def __init__(self):
+        self.data = bytearray()
+
+    async def write(self, chunk):
+        self.data.extend(chunk)
+
+
+class AsyncFileMultipartTests(AsyncTestCase):
+
+    async def test_async_file(self):
+        filename = os.path.join(DATA_DIR, 'python-logo.png')
+        file = await FileModel.from_filename_async(filename, loop=self.loop)
+        request = SendPhotoRequest({'chat_id': 12345, 'photo': file})
+        endpoint_desc = {}
+
+        mp = telegram_encoder(request, endpoint_desc=endpoint_desc, request_params={})
+        writer = BufferWriter()
+        await mp.write(writer)
+
+        with open(filename, 'rb') as f:
+            data = f.read()
+
+        self.assertTrue(endpoint_desc['stream_request'])
+        self.assertEqual(mp.size, len(writer.data))
+        self.assertIn(data, writer.data)
+        self.assertIsNotNone(re.search(b'(?i)content-type: image/png', writer.data))
+        self.assertTrue(file.stream.closed)
+
+    async def test_async_file_payload(self):
+        filename = os.path.join(DATA_DIR, 'python-logo.png')
+        file = await FileModel.from_filename_async(filename, loop=self.loop)
+        payload = AsyncFilePayload(file.stream)
+
+        with open(filename, 'rb') as f:
+            data = f.read()
+
+        self.assertEqual(await payload.as_bytes(), data)
+        self.assertEqual(payload.decode('latin-1'), data.decode('latin-1'))
+
+        writer = BufferWriter()
+        await payload.write(writer)
+        self.assertEqual(writer.data, data)
+
+    async def test_async_file_payload_decode_large_file(self):
+        file = await FileModel.from_filename_async(os.path.join(DATA_DIR, 'python-logo.png'), loop=self.loop)
+        payload = AsyncFilePayload(file.stream)
+        payload.max_decode_size = 10
+
+        with self.assertRaisesRegex(ValueError, 'too large'):
+            payload.decode('latin-1')
+
+        self.assertEqual(len(await payload.as_bytes()), file.stream.size)
+        file.close()
+
+    async def test_async_file_payload_closed_unsent(self):
+        file = await FileModel.from_filename_async(os.path.join(DATA_DIR, 'python-logo.png'), loop=self.loop)
+        AsyncFilePayload(file.stream)._close()
+
+        self.assertTrue(file.stream.closed)
+
+
+class ChunksWriter:
+
+    def __init__(self):
+        self.chunks = []
+
+    async def write(self, chunk):
+        self.chunks.append(chunk)
+
+
+class BufferMultipartTests(AsyncTestCase):
+
+    def setUp(self):
+        with open(os.path.join(DATA_DIR, 'python-logo.png'), 'rb') as f:
+            self.data = f.read() * 10
+
+    async def assert_buffer_sent(self, buffer):
+        request = SendPhotoRequest({'chat_id': 12345, 'photo': FileModel({'stream': buffer})})
+        self.assertIs(request.photo.stream, buffer)
+
+        mp = telegram_encoder(request, endpoint_desc={}, request_params={})
+        part = [item[0] for item in mp._parts if isinstance(item[0], BufferPayload)][0]
+        writer = ChunksWriter()
+        await part.write(writer)
+
+        self.assertEqual(part.size, len(self.data))
+        self.assertEqual(len(writer.chunks), 3)
+        owner = buffer.obj if isinstance(buffer, memoryview) else buffer
+        self.assertTrue(all(isinstance(chunk, memoryview) and chunk.obj is owner for chunk in writer.chunks))
+        self.assertEqual(b''.join(writer.chunks), self.data)
+
+    async def test_bytes(self):
+        await self.assert_buffer_sent(self.data)
+
+    async def test_multipart(self):
+        request = SendPhotoRequest({'chat_id': 12345, 'photo': FileModel({'stream': bytearray(self.data)})})
+
+        mp = telegram_encoder(request, endpoint_desc={}, request_params={})
+        writer = BufferWriter()
+        await mp.write(writer)
+
+        self.assertEqual(mp.size, len(writer.data))
+        self.assertIn(self.data, writer.data)
+
+    async def test_decode(self):
+        payload = BufferPayload(memoryview(bytearray(b'photo')))
+
+        self.assertEqual(payload.decode(), 'photo')
+        self.assertEqual(await payload.as_bytes(), b'photo')
+
+    async def test_bytearray(self):
+        await self.assert_buffer_sent(bytearray(self.data))
+
+    async def test_memoryview(self):
+        buffer = bytearray(self.data)
+        await self.assert_buffer_sent(memoryview(buffer))
+
+    async def test_mmap(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(self.data)
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                await self.assert_buffer_sent(buffer)
+
+
 class TelegramDecoderTests(TestCase):
 
     def test_simple(self):
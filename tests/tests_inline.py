@@ -0,0 +1,201 @@
+import asyncio
+
+from asynctest.case import TestCase
+from service_client.mocks import Mock
+
+from aiotelebot import Bot
+from aiotelebot.dispatchers import ChatLaneDispatcher
+from aiotelebot.messages import Update, InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+from .telegram_api_mock_spec import mock_spec
+
+
+def build_inline_query(query_id='q1', user_id=10000002, query='test', offset=None):
+    data = {'id': query_id,
+            'from': {'id': user_id,
+                     'first_name': 'Telebot'},
+            'query': query}
+    if offset is not None:
+        data['offset'] = offset
+    return InlineQuery(data)
+
+
+def build_results(prefix, count):
+    return [InlineQueryResultArticle(id='{}{}'.format(prefix, i),
+                                     title='{} {}'.format(prefix, i),
+                                     input_message_content=InputTextMessageContent(message_text='text'))
+            for i in range(count)]
+
+
+class InlineProvidersTests(TestCase):
+
+    def setUp(self):
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       inline_query_timeout=0.05,
+                       loop=self.loop)
+
+    async def test_results_priority_order(self):
+        async def slow(query):
+            await asyncio.sleep(0.01)
+            return build_results('slow', 2)
+
+        async def fast(query):
+            return build_results('fast', 2)
+
+        self.bot.register_inline_provider('slow', slow)
+        self.bot.register_inline_provider('fast', fast)
+
+        results = await self.bot.get_inline_results(build_inline_query())
+
+        self.assertEqual([r.id for r in results], ['slow:slow0', 'slow:slow1', 'fast:fast0', 'fast:fast1'])
+
+    async def test_no_results(self):
+        results = await self.bot.get_inline_results(build_inline_query())
+        self.assertEqual(results, [])
+
+    async def test_deadline_cancels_slow_providers(self):
+        cancelled = []
+
+        async def too_slow(query):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def fast(query):
+            return build_results('fast', 1)
+
+        self.bot.register_inline_provider('too_slow', too_slow)
+        self.bot.register_inline_provider('fast', fast)
+
+        results = await self.bot.get_inline_results(build_inline_query())
+        await asyncio.sleep(0)
+
+        self.assertEqual([r.id for r in results], ['fast:fast0'])
+        self.assertEqual(cancelled, [True])
+
+    async def test_early_cutoff(self):
+        cancelled = []
+
+        async def many(query):
+            return build_results('many', 60)
+
+        async def slow(query):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        self.bot.inline_query_timeout = None
+        self.bot.register_inline_provider('many', many)
+        self.bot.register_inline_provider('slow', slow)
+
+        results = await self.bot.get_inline_results(build_inline_query())
+        await asyncio.sleep(0)
+
+        self.assertEqual(len(results), 50)
+        self.assertEqual(cancelled, [True])
+
+    async def test_failed_provider(self):
+        async def fail(query):
+            raise ValueError('fail')
+
+        async def fast(query):
+            return build_results('fast', 1)
+
+        self.bot.register_inline_provider('fail', fail)
+        self.bot.register_inline_provider('fast', fast)
+
+        results = await self.bot.get_inline_results(build_inline_query())
+        self.assertEqual([r.id for r in results], ['fast:fast0'])
+
+
+class InlineResultsCacheTests(TestCase):
+
+    def setUp(self):
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       inline_cache_size=10,
+                       loop=self.loop)
+        self.calls = []
+
+        async def provider(query):
+            self.calls.append(query.query)
+            return build_results('r', 2)
+
+        self.bot.register_inline_provider('prov', provider)
+
+    async def test_cache_hit(self):
+        results_1 = await self.bot.get_inline_results(build_inline_query(query='Test  query'))
+        results_2 = await self.bot.get_inline_results(build_inline_query(query=' test query'))
+
+        self.assertEqual(self.calls, ['Test  query'])
+        self.assertEqual([r.id for r in results_1], ['prov:r0', 'prov:r1'])
+        self.assertEqual([r.id for r in results_2], ['prov:r0', 'prov:r1'])
+
+        stats = self.bot.inline_results_cache.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    async def test_cache_by_offset(self):
+        await self.bot.get_inline_results(build_inline_query(query='test'))
+        await self.bot.get_inline_results(build_inline_query(query='test', offset=10))
+
+        self.assertEqual(self.calls, ['test', 'test'])
+
+
+class InlineQueryDebounceTests(TestCase):
+
+    def setUp(self):
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       inline_query_debounce=0.01,
+                       loop=self.loop)
+        self.calls = []
+
+        async def provider(query):
+            self.calls.append(query.query)
+            return build_results('r', 1)
+
+        self.bot.register_inline_provider('prov', provider)
+
+    async def wait_answers(self, tasks):
+        await asyncio.wait(tasks)
+
+    async def test_superseded_query_is_dropped(self):
+        first = await self.bot.process_inline_query(build_inline_query(query_id='q1', query='te'))
+        await asyncio.sleep(0.001)
+        second = await self.bot.process_inline_query(build_inline_query(query_id='q2', query='test'))
+        await self.wait_answers([first, second])
+
+        self.assertTrue(first.cancelled())
+        self.assertEqual(self.calls, ['test'])
+        self.assertEqual(self.bot._inline_query_tasks, {})
+
+    async def test_other_users_are_not_superseded(self):
+        first = await self.bot.process_inline_query(build_inline_query(query_id='q1', user_id=1, query='one'))
+        second = await self.bot.process_inline_query(build_inline_query(query_id='q2', user_id=2, query='two'))
+        await self.wait_answers([first, second])
+
+        self.assertEqual(sorted(self.calls), ['one', 'two'])
+
+    async def test_superseded_with_chat_lane_dispatcher(self):
+        dispatcher = ChatLaneDispatcher()
+        dispatcher.assign_bot(self.bot)
+        self.bot.dispatcher = dispatcher
+
+        for i, query in enumerate(['t', 'te', 'tes', 'test']):
+            await self.bot.dispatch_update(Update({'update_id': i,
+                                                   'inline_query': {'id': 'q{}'.format(i),
+                                                                    'from': {'id': 10000002, 'first_name': 'Telebot'},
+                                                                    'query': query}}))
+        await dispatcher.join()
+        await self.wait_answers(list(self.bot._inline_query_tasks.values()))
+        dispatcher.close()
+
+        self.assertEqual(self.calls, ['test'])
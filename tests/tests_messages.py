@@ -0,0 +1,63 @@
+import datetime
+from unittest.case import TestCase
+
+from aiotelebot.messages import LazyUpdate, Update, Message, Chat
+
+RAW_UPDATE = {'update_id': 100000001,
+              'message': {'message_id': 1,
+                          'from': {'id': 10000001,
+                                   'first_name': 'telebot'},
+                          'chat': {'id': 10000002,
+                                   'type': 'private'},
+                          'date': 1475520391,
+                          'text': 'test'}}
+
+
+class LazyUpdateTests(TestCase):
+
+    def setUp(self):
+        self.update = LazyUpdate(RAW_UPDATE)
+
+    def test_not_decoded(self):
+        self.assertEqual(self.update.update_id, 100000001)
+        self.assertEqual(self.update.get_fields(), ['update_id', 'message'])
+        self.assertIn('message', self.update)
+        self.assertIn('message', self.update.__lazy_data__)
+        self.assertIsNone(self.update.inline_query)
+        self.assertIn('message', self.update.__lazy_data__)
+
+    def test_decode_on_access(self):
+        self.assertIsInstance(self.update.message, Message)
+        self.assertEqual(self.update.message.chat.type, Chat.Type.PRIVATE)
+        self.assertEqual(self.update.message.date,
+                         datetime.datetime(2016, 10, 3, 18, 46, 31, tzinfo=datetime.timezone.utc))
+        self.assertEqual(self.update.__lazy_data__, {})
+
+    def test_export_data(self):
+        self.assertEqual(self.update.export_data(), Update(RAW_UPDATE).export_data())
+
+    def test_set_field(self):
+        self.update.message = Message(text='other')
+        self.assertEqual(self.update.message.export_data(), {'text': 'other'})
+
+    def test_delete_field(self):
+        del self.update.message
+        self.assertIsNone(self.update.message)
+        self.assertEqual(self.update.export_data(), {'update_id': 100000001})
+
+    def test_get_path_value_not_decoded(self):
+        self.assertEqual(self.update.get_path_value('message', 'chat', 'id'), 10000002)
+        self.assertEqual(self.update.get_path_value('message', 'from', 'id'), 10000001)
+        self.assertIsNone(self.update.get_path_value('message', 'reply_to_message', 'chat'))
+        self.assertIsNone(self.update.get_path_value('callback_query', 'from', 'id'))
+        self.assertIn('message', self.update.__lazy_data__)
+
+    def test_get_path_value_decoded(self):
+        self.assertEqual(self.update.message.chat.id, 10000002)
+        self.assertEqual(self.update.get_path_value('message', 'chat', 'id'), 10000002)
+        self.assertEqual(Update(RAW_UPDATE).get_path_value('message', 'from', 'id'), 10000001)
+
+    def test_raw_data_not_modified(self):
+        self.update.decode()
+        self.assertIsInstance(RAW_UPDATE['message'], dict)
+        self.assertEqual(RAW_UPDATE['message']['chat']['type'], 'private')
@@ -0,0 +1,218 @@
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+from unittest.case import TestCase
+
+from asynctest.case import TestCase as AsyncTestCase
+from service_client.mocks import Mock
+
+from aiotelebot import Bot
+from aiotelebot.files import AsyncFile
+from aiotelebot.messages import FileModel, Message, SendDocumentRequest
+from aiotelebot.plugins import DedicatedSession, TokenBucket, RateLimit, UploadCache
+from .telegram_api_mock_spec import mock_spec, MOCK_DIR
+
+
+class TokenBucketTests(TestCase):
+
+    def test_burst(self):
+        bucket = TokenBucket(rate=10, capacity=3)
+
+        self.assertEqual([bucket.reserve(100) for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(bucket.reserve(100), 0.1)
+        self.assertAlmostEqual(bucket.reserve(100), 0.2)
+        self.assertFalse(bucket.is_idle(100.3))
+        self.assertTrue(bucket.is_idle(100.5))
+
+    def test_refill(self):
+        bucket = TokenBucket(rate=10, capacity=1)
+
+        self.assertEqual(bucket.reserve(100), 0)
+        self.assertAlmostEqual(bucket.reserve(100.05), 0.05)
+        self.assertEqual(bucket.reserve(101), 0)
+
+
+class RateLimitTests(AsyncTestCase):
+
+    def setUp(self):
+        self.rate_limit = RateLimit(global_rate=100, global_capacity=2, chat_rate=20, group_rate=10)
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock(), self.rate_limit],
+                       spec=mock_spec,
+                       loop=self.loop)
+
+    async def test_chat_limit(self):
+        start = self.loop.time()
+        await asyncio.gather(*[self.bot.send_message(chat_id=1, text='test') for _ in range(3)])
+
+        self.assertGreaterEqual(self.loop.time() - start, 0.1)
+
+        stats = self.rate_limit.get_stats()
+        self.assertEqual(stats['queued_requests'], 0)
+        self.assertEqual(stats['limited_requests'], 3)
+        self.assertEqual(stats['delayed_requests'], 2)
+        self.assertGreater(stats['max_wait_time'], 0.05)
+        self.assertEqual(stats['chats'], 1)
+
+    async def test_group_limit(self):
+        start = self.loop.time()
+        await asyncio.gather(*[self.bot.send_message(chat_id=-1, text='test') for _ in range(2)])
+
+        self.assertGreaterEqual(self.loop.time() - start, 0.1)
+
+    async def test_busy_chat_does_not_delay_other_chats(self):
+        done = []
+
+        async def send(chat_id):
+            await self.bot.send_message(chat_id=chat_id, text='test')
+            done.append(chat_id)
+
+        busy = [asyncio.ensure_future(send(1), loop=self.loop) for _ in range(5)]
+        await asyncio.sleep(0.001)
+        await send(2)
+
+        self.assertEqual(done, [1, 2])
+        self.assertEqual(self.rate_limit.queued_requests, 4)
+
+        await asyncio.gather(*busy)
+        self.assertEqual(self.rate_limit.queued_requests, 0)
+
+    async def test_global_limit(self):
+        self.rate_limit.global_bucket = TokenBucket(rate=10, capacity=1)
+
+        start = self.loop.time()
+        await asyncio.gather(*[self.bot.send_message(chat_id=i, text='test') for i in range(3)])
+
+        self.assertGreaterEqual(self.loop.time() - start, 0.2)
+
+    async def test_not_limited_endpoint(self):
+        await self.bot.get_me()
+        self.assertEqual(self.rate_limit.limited_requests, 0)
+
+    def test_is_group(self):
+        self.assertTrue(RateLimit.is_group(-1001234))
+        self.assertTrue(RateLimit.is_group('@channel'))
+        self.assertFalse(RateLimit.is_group(1234))
+        self.assertFalse(RateLimit.is_group('1234'))
+        self.assertTrue(RateLimit.is_group('-1001234'))
+        self.assertFalse(RateLimit.is_group('channel'))
+
+    async def test_numeric_string_chat_id(self):
+        await self.rate_limit.acquire('1')
+        await self.rate_limit.acquire(1)
+
+        stats = self.rate_limit.get_stats()
+        self.assertEqual(stats['delayed_requests'], 1)
+        self.assertEqual(stats['chats'], 1)
+
+    def test_discard_idle_chats(self):
+        rate_limit = RateLimit(max_idle_chats=2)
+        rate_limit._get_chat_bucket(1, 100).reserve(100)
+        rate_limit._get_chat_bucket(2, 101).reserve(101)
+        rate_limit._get_chat_bucket(3, 101.5).reserve(101.5)
+        self.assertEqual(sorted(rate_limit._chat_buckets), [2, 3])
+
+
+class DedicatedSessionTests(AsyncTestCase):
+
+    class Session:
+        closed = False
+
+        async def close(self):
+            self.closed = True
+
+    async def test_close(self):
+        session = self.Session()
+        plugin = DedicatedSession(session, loop=self.loop)
+
+        plugin.close()
+        await asyncio.sleep(0)
+        self.assertTrue(session.closed)
+
+        plugin.close()
+
+
+class UploadCacheTests(AsyncTestCase):
+
+    def setUp(self):
+        self.upload_cache = UploadCache()
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock(), self.upload_cache],
+                       spec=mock_spec,
+                       loop=self.loop)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'logo.png')
+        shutil.copy(os.path.join(MOCK_DIR, 'python-logo.png'), self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    async def test_reuse_file_id(self):
+        await self.bot.send_photo(chat_id=10000002, photo=FileModel.from_filename(self.path))
+
+        request = {'chat_id': 10000002, 'photo': FileModel.from_filename(self.path)}
+        message = await self.bot.send_photo(**request)
+
+        self.assertIsInstance(message, Message)
+        self.assertEqual(self.upload_cache.get_stats(), {'reused': 1, 'uploaded': 1, 'size': 1})
+
+    async def test_reuse_file_id_request(self):
+        await self.bot.send_document(chat_id=10000002, document=FileModel.from_filename(self.path))
+
+        request = SendDocumentRequest(chat_id=10000002, document=FileModel.from_filename(self.path))
+        await self.bot.send_document(request)
+
+        self.assertEqual(request.document, 'BQADBAADvgADdoc1')
+
+    async def test_modified_file(self):
+        await self.bot.send_photo(chat_id=10000002, photo=FileModel.from_filename(self.path))
+
+        with open(self.path, 'ab') as f:
+            f.write(b'more data')
+        await self.bot.send_photo(chat_id=10000002, photo=FileModel.from_filename(self.path))
+
+        self.assertEqual(self.upload_cache.get_stats(), {'reused': 0, 'uploaded': 2, 'size': 2})
+
+    async def test_async_file_not_opened(self):
+        streams = [AsyncFile(self.path, loop=self.loop) for _ in range(2)]
+        for stream in streams:
+            await self.bot.send_photo(chat_id=10000002, photo=FileModel(stream=stream))
+            stream.close()
+
+        self.assertEqual(self.upload_cache.get_stats(), {'reused': 1, 'uploaded': 1, 'size': 1})
+
+    async def test_stream_without_path(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        await self.bot.send_photo(chat_id=10000002, photo=FileModel(stream=io.BytesIO(data)))
+        await self.bot.send_photo(chat_id=10000002, photo=FileModel(stream=io.BytesIO(data)))
+
+        self.assertEqual(self.upload_cache.get_stats(), {'reused': 0, 'uploaded': 0, 'size': 0})
+
+    async def test_by_content(self):
+        self.upload_cache.by_content = True
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        await self.bot.send_photo(chat_id=10000002, photo=FileModel(stream=io.BytesIO(data)))
+        await self.bot.send_photo(chat_id=10000002, photo=FileModel.from_filename(self.path))
+
+        self.assertEqual(self.upload_cache.get_stats(), {'reused': 1, 'uploaded': 1, 'size': 1})
+
+    async def test_by_content_in_executor(self):
+        self.upload_cache.by_content = True
+        calls = []
+        run_in_executor = self.loop.run_in_executor
+
+        def record(executor, func, *args):
+            calls.append(func)
+            return run_in_executor(executor, func, *args)
+
+        self.loop.run_in_executor = record
+        file = FileModel.from_filename(self.path)
+        key = await self.upload_cache.get_key(file)
+        file.close()
+
+        self.assertEqual(calls, [UploadCache._get_content_key])
+        self.assertEqual(len(key), 64)
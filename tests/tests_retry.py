@@ -0,0 +1,129 @@
+import asyncio
+import os
+from unittest.case import TestCase
+
+from aiohttp import ClientError
+from asynctest.case import TestCase as AsyncTestCase
+from service_client.mocks import Mock, mock_manager
+
+from aiotelebot import Bot, RetryPolicy, TelegramError
+from aiotelebot.messages import User, Message, ResponseParameters
+from tests.telegram_api_mock_spec import MOCK_DIR
+from .telegram_api_mock_spec import mock_spec
+
+
+class RetryPolicyTests(TestCase):
+
+    def setUp(self):
+        self.policy = RetryPolicy(max_retries=3, base_delay=1, max_delay=3, budget=2, budget_refill=0.5)
+
+    def test_flood_error(self):
+        ex = TelegramError('Too Many Requests', 429, ResponseParameters(retry_after=5))
+        self.assertEqual(ex.retry_after, 5)
+        self.assertEqual(self.policy.get_retry_delay(ex, 0), 5)
+        self.assertEqual(self.policy.flood_retries, 1)
+        self.assertEqual(self.policy.budget, 2)
+
+    def test_flood_error_too_long(self):
+        ex = TelegramError('Too Many Requests', 429, ResponseParameters(retry_after=3600))
+        self.assertIsNone(self.policy.get_retry_delay(ex, 0))
+
+    def test_transient_error_backoff(self):
+        for attempt, max_delay in enumerate([1, 2]):
+            delay = self.policy.get_retry_delay(TelegramError('Internal Server Error', 500), attempt,
+                                                idempotent=True)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, max_delay)
+
+        self.assertEqual(self.policy.retries, 2)
+
+    def test_max_delay(self):
+        for _ in range(20):
+            self.policy.budget = 2
+            self.assertLessEqual(self.policy.get_retry_delay(ClientError(), 2, idempotent=True), 3)
+
+    def test_max_retries(self):
+        self.assertIsNone(self.policy.get_retry_delay(ClientError(), 3, idempotent=True))
+
+    def test_non_idempotent(self):
+        self.assertIsNone(self.policy.get_retry_delay(ClientError(), 0))
+
+        self.policy.retry_non_idempotent = True
+        self.assertIsNotNone(self.policy.get_retry_delay(ClientError(), 0))
+
+    def test_not_transient_error(self):
+        self.assertIsNone(self.policy.get_retry_delay(TelegramError('Bad Request', 400), 0, idempotent=True))
+        self.assertIsNone(self.policy.get_retry_delay(ValueError(), 0, idempotent=True))
+        self.assertIsNone(self.policy.get_retry_delay(asyncio.CancelledError(), 0, idempotent=True))
+
+    def test_budget(self):
+        self.assertIsNotNone(self.policy.get_retry_delay(ClientError(), 0, idempotent=True))
+        self.assertIsNotNone(self.policy.get_retry_delay(ClientError(), 0, idempotent=True))
+        self.assertIsNone(self.policy.get_retry_delay(ClientError(), 0, idempotent=True))
+        self.assertEqual(self.policy.budget_exhausted, 1)
+
+        self.policy.on_success()
+        self.policy.on_success()
+        self.assertIsNotNone(self.policy.get_retry_delay(ClientError(), 0, idempotent=True))
+
+        for _ in range(10):
+            self.policy.on_success()
+        self.assertEqual(self.policy.get_stats()['budget'], 2)
+
+
+class BotRetryTests(AsyncTestCase):
+
+    def setUp(self):
+        self.retry_policy = RetryPolicy(base_delay=0.001)
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       retry_policy=self.retry_policy,
+                       loop=self.loop)
+
+    @mock_manager.patch_mock_desc({'file': os.path.join(MOCK_DIR, 'error_too_many_requests.json'),
+                                   'status': 429},
+                                  endpoint='send_message')
+    async def test_retry_flood_error(self):
+        message = await self.bot.send_message(chat_id=12345, text='test')
+        self.assertIsInstance(message, Message)
+        self.assertEqual(self.retry_policy.flood_retries, 1)
+
+    @mock_manager.patch_mock_desc({'file': os.path.join(MOCK_DIR, 'error_internal_server.json'),
+                                   'status': 500},
+                                  endpoint='get_me')
+    async def test_retry_idempotent(self):
+        user = await self.bot.get_me()
+        self.assertIsInstance(user, User)
+        self.assertEqual(self.retry_policy.retries, 1)
+
+    @mock_manager.patch_mock_desc({'file': os.path.join(MOCK_DIR, 'error_internal_server.json'),
+                                   'status': 500},
+                                  endpoint='send_message')
+    async def test_no_retry_non_idempotent(self):
+        with self.assertRaises(TelegramError) as ctx:
+            await self.bot.send_message(chat_id=12345, text='test')
+
+        self.assertEqual(ctx.exception.code, 500)
+        self.assertEqual(self.retry_policy.retries, 0)
+
+    @mock_manager.patch_mock_desc({'file': os.path.join(MOCK_DIR, 'error_internal_server.json'),
+                                   'status': 500},
+                                  endpoint='send_message')
+    async def test_retry_non_idempotent_opt_in(self):
+        self.retry_policy.retry_non_idempotent = True
+
+        message = await self.bot.send_message(chat_id=12345, text='test')
+        self.assertIsInstance(message, Message)
+        self.assertEqual(self.retry_policy.retries, 1)
+
+    @mock_manager.patch_mock_desc({'file': os.path.join(MOCK_DIR, 'error_bad_request.json'),
+                                   'status': 400},
+                                  endpoint='get_me')
+    async def test_no_retry_bad_request(self):
+        with self.assertRaises(TelegramError) as ctx:
+            await self.bot.get_me()
+
+        self.assertEqual(ctx.exception.code, 400)
+        self.assertIsNone(ctx.exception.retry_after)
+        self.assertEqual(self.retry_policy.retries, 0)
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import shutil
+import tempfile
+
+from asynctest.case import TestCase
+from service_client.mocks import Mock
+from service_client.plugins import BasePlugin
+
+from aiotelebot import Bot
+from aiotelebot.messages import FileModel, Message
+from aiotelebot.plugins import UploadCache
+from .telegram_api_mock_spec import mock_spec, MOCK_DIR
+
+
+def count_fds():
+    return len(os.listdir('/proc/self/fd'))
+
+
+async def collect(upload):
+    results = []
+    async for result in upload:
+        results.append(result)
+    return results
+
+
+class ConcurrencySpy(BasePlugin):
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.captions = []
+
+    async def prepare_payload(self, endpoint_desc, session, request_params, payload):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.captions.append(payload.caption)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        return payload
+
+
+class BulkUploadTests(TestCase):
+
+    def setUp(self):
+        self.spy = ConcurrencySpy(self.loop)
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock(), self.spy],
+                       spec=mock_spec,
+                       loop=self.loop)
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for i in range(10):
+            path = os.path.join(self.tmp_dir, 'logo_{}.png'.format(i))
+            shutil.copy(os.path.join(MOCK_DIR, 'python-logo.png'), path)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    async def test_upload_documents(self):
+        upload = self.bot.upload_files(10000002, self.paths, concurrency=3, caption='logo')
+        results = await collect(upload)
+
+        self.assertEqual(sorted(result.index for result in results), list(range(10)))
+        self.assertTrue(all(result.ok for result in results))
+        self.assertTrue(all(isinstance(result.message, Message) for result in results))
+        self.assertTrue(all(result.file_id == 'BQADBAADvgADdoc1' for result in results))
+        self.assertEqual(self.spy.max_in_flight, 3)
+        self.assertEqual(self.spy.captions, ['logo'] * 10)
+        self.assertEqual(upload.get_stats(), {'prepared': 10, 'uploaded': 10, 'failed': 0})
+
+    async def test_upload_photos(self):
+        files = [FileModel.from_filename(path) for path in self.paths[:2]]
+        results = await collect(self.bot.upload_files(10000002, files, method='send_photo'))
+
+        self.assertEqual([result.file_id for result in results], ['AgADBAADq6cxG2'] * 2)
+        self.assertEqual(set(result.source for result in results), set(files))
+        self.assertTrue(all(file.stream.closed for file in files))
+
+    def test_unknown_method(self):
+        with self.assertRaisesRegex(ValueError, 'send_message'):
+            self.bot.upload_files(10000002, self.paths, method='send_message')
+
+    async def test_upload_cache(self):
+        upload_cache = UploadCache()
+        self.bot.service_client.add_plugins([upload_cache])
+
+        results = await collect(self.bot.upload_files(10000002, self.paths[:1] * 2, concurrency=1))
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(upload_cache.get_stats(), {'reused': 1, 'uploaded': 1, 'size': 1})
+
+    async def test_missing_file(self):
+        paths = self.paths[:2] + [os.path.join(self.tmp_dir, 'not_found.png')]
+        upload = self.bot.upload_files(10000002, paths)
+        results = await collect(upload)
+
+        failed = [result for result in results if not result.ok]
+        self.assertEqual(len(failed), 1)
+        self.assertEqual(failed[0].index, 2)
+        self.assertIsInstance(failed[0].error, FileNotFoundError)
+        self.assertEqual(upload.get_stats(), {'prepared': 3, 'uploaded': 2, 'failed': 1})
+
+    async def test_source_error(self):
+        def paths():
+            yield self.paths[0]
+            raise ValueError('source error')
+
+        with self.assertRaises(ValueError):
+            await collect(self.bot.upload_files(10000002, paths()))
+
+    async def test_cancel(self):
+        files = [FileModel.from_filename(path) for path in self.paths]
+        upload = self.bot.upload_files(10000002, files, concurrency=2, read_ahead=2)
+
+        result = await upload.__anext__()
+        upload.cancel()
+        await asyncio.sleep(0.02)
+
+        self.assertTrue(result.ok)
+        with self.assertRaises(StopAsyncIteration):
+            await upload.__anext__()
+        self.assertTrue(all(file.stream.closed for file in files[:upload.prepared]))
+        self.assertLess(upload.prepared, 10)
+
+    async def test_break_closes_files(self):
+        fds = count_fds()
+        async with self.bot.upload_files(10000002, self.paths, concurrency=2, read_ahead=2) as upload:
+            async for result in upload:
+                self.assertTrue(result.ok)
+                break
+
+        self.assertTrue(all(task.done() for task in upload._tasks))
+        self.assertLess(upload.prepared, 10)
+        self.assertEqual(count_fds(), fds)
+        with self.assertRaises(StopAsyncIteration):
+            await upload.__anext__()
@@ -0,0 +1,315 @@
+import asyncio
+import json
+
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestClient
+from asynctest.case import TestCase
+from service_client.mocks import Mock
+
+from aiotelebot import Bot
+from aiotelebot.dispatchers import QueueDispatcher
+from aiotelebot.messages import Message
+from aiotelebot.webhook import WebhookServer, current_task
+from .telegram_api_mock_spec import mock_spec
+
+
+def build_raw_update(update_id, text='test'):
+    return {'update_id': update_id,
+            'message': {'message_id': update_id,
+                        'from': {'id': 10000001,
+                                 'first_name': 'Telebot'},
+                        'chat': {'id': 10000001,
+                                 'type': 'private'},
+                        'date': 1475178814,
+                        'text': text}}
+
+
+class WebhookServerTests(TestCase):
+
+    def setUp(self):
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       loop=self.loop)
+        self.server = WebhookServer(self.bot, secret='secret', max_in_flight=2)
+        self.client = TestClient(self.server.build_app(), loop=self.loop)
+        self.loop.run_until_complete(self.client.start_server())
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.client.close())
+
+    async def test_process_update(self):
+        messages = []
+
+        async def message_processor(message):
+            messages.append(message.text)
+
+        self.bot.register_message_processor(message_processor)
+
+        response = await self.client.post('/webhook/secret', data=json.dumps(build_raw_update(1)))
+        self.assertEqual(response.status, 200)
+
+        await self.server.stop()
+        await asyncio.sleep(0)
+
+        self.assertEqual(messages, ['test'])
+        self.assertEqual(self.server.get_stats(), {'received_updates': 1,
+                                                   'invalid_requests': 0,
+                                                   'in_flight': 0,
+                                                   'max_in_flight': 2,
+                                                   'replies_in_response': 0})
+
+    async def test_wrong_path(self):
+        response = await self.client.post('/webhook/other', data=json.dumps(build_raw_update(1)))
+        self.assertEqual(response.status, 404)
+        self.assertEqual(self.server.received_updates, 0)
+
+    async def test_invalid_update(self):
+        response = await self.client.post('/webhook/secret', data='no json')
+        self.assertEqual(response.status, 400)
+
+        response = await self.client.post('/webhook/secret', data='[1, 2]')
+        self.assertEqual(response.status, 400)
+
+        self.assertEqual(self.server.invalid_requests, 2)
+
+    async def test_in_flight_limit(self):
+        release = asyncio.Event()
+
+        async def update_processor(update):
+            await release.wait()
+            return True
+
+        self.bot.register_update_processor(update_processor)
+
+        for i in range(2):
+            response = await self.client.post('/webhook/secret', data=json.dumps(build_raw_update(i)))
+            self.assertEqual(response.status, 200)
+
+        self.assertEqual(self.server.in_flight, 2)
+
+        blocked = asyncio.ensure_future(self.client.post('/webhook/secret', data=json.dumps(build_raw_update(3))),
+                                        loop=self.loop)
+        await asyncio.sleep(0.01)
+        self.assertFalse(blocked.done())
+
+        release.set()
+        response = await blocked
+        self.assertEqual(response.status, 200)
+
+        await self.server.stop()
+        self.assertEqual(self.server.in_flight, 0)
+        self.assertEqual(self.server.received_updates, 3)
+
+    async def test_dispatcher(self):
+        dispatcher = QueueDispatcher(workers=1)
+        dispatcher.assign_bot(self.bot)
+        self.bot.dispatcher = dispatcher
+        messages = []
+
+        async def message_processor(message):
+            messages.append(message.text)
+
+        self.bot.register_message_processor(message_processor)
+
+        response = await self.client.post('/webhook/secret', data=json.dumps(build_raw_update(1)))
+        self.assertEqual(response.status, 200)
+
+        await dispatcher.join()
+        dispatcher.close()
+
+        self.assertEqual(messages, ['test'])
+        self.assertEqual(self.server.in_flight, 0)
+
+
+class WebhookReplyInResponseTests(TestCase):
+
+    def setUp(self):
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       loop=self.loop)
+        self.server = WebhookServer(self.bot, reply_in_response=True, reply_timeout=0.5)
+        self.client = TestClient(self.server.build_app(), loop=self.loop)
+        self.loop.run_until_complete(self.client.start_server())
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.client.close())
+
+    async def test_send_message_in_response(self):
+        results = []
+        sent = []
+
+        async def message_processor(message):
+            slot = self.server._task_slots[current_task(loop=self.loop)]
+            results.append(await self.bot.send_message(chat_id=message.chat.id, text='reply 1'))
+            results.append(await self.bot.send_message(chat_id=message.chat.id, text='reply 2'))
+            sent.append(slot.sent.done())
+
+        self.bot.register_message_processor(message_processor)
+
+        response = await self.client.post('/webhook', data=json.dumps(build_raw_update(1)))
+        self.assertEqual(response.status, 200)
+        self.assertEqual(await response.json(), {'method': 'sendMessage',
+                                                 'chat_id': 10000001,
+                                                 'text': 'reply 1',
+                                                 'parse_mode': 'Markdown',
+                                                 'disable_web_page_preview': False,
+                                                 'disable_notification': False})
+
+        await self.server.stop()
+
+        self.assertIs(results[0], True)
+        self.assertIsInstance(results[1], Message)
+        self.assertEqual(sent, [True])
+        self.assertEqual(self.server.replies_in_response, 1)
+        self.assertEqual(self.server._update_slots, {})
+        self.assertEqual(self.server._task_slots, {})
+
+    async def test_send_message_in_response_with_dispatcher(self):
+        dispatcher = QueueDispatcher(workers=1)
+        dispatcher.assign_bot(self.bot)
+        self.bot.dispatcher = dispatcher
+
+        async def message_processor(message):
+            await self.bot.send_message(chat_id=message.chat.id, text='reply')
+
+        self.bot.register_message_processor(message_processor)
+
+        response = await self.client.post('/webhook', data=json.dumps(build_raw_update(1)))
+        self.assertEqual((await response.json())['text'], 'reply')
+
+        await dispatcher.join()
+        dispatcher.close()
+
+    async def test_other_task_reply(self):
+        processing = asyncio.Event()
+        release = asyncio.Event()
+
+        async def message_processor(message):
+            processing.set()
+            await release.wait()
+
+        self.bot.register_message_processor(message_processor)
+
+        async def other_task():
+            await processing.wait()
+            try:
+                return await self.bot.send_message(chat_id=10000001, text='other task')
+            finally:
+                release.set()
+
+        other = asyncio.ensure_future(other_task(), loop=self.loop)
+        response = await self.client.post('/webhook', data=json.dumps(build_raw_update(1)))
+        self.assertEqual(await response.read(), b'')
+        self.assertIsInstance(await other, Message)
+        self.assertEqual(self.server.replies_in_response, 0)
+
+    async def test_answer_callback_query_in_response(self):
+        async def callback_query_processor(callback_query):
+            await self.bot.answer_callback_query(callback_query_id=callback_query.id, text='Done')
+
+        self.bot.process_callback_query = callback_query_processor
+
+        response = await self.client.post('/webhook', data=json.dumps({'update_id': 1,
+                                                                       'callback_query': {'id': 'cq1',
+                                                                                          'from': {'id': 1},
+                                                                                          'data': 'test'}}))
+        self.assertEqual(await response.json(), {'method': 'answerCallbackQuery',
+                                                 'callback_query_id': 'cq1',
+                                                 'text': 'Done',
+                                                 'show_alert': False})
+
+    async def test_no_reply(self):
+        async def message_processor(message):
+            pass
+
+        self.bot.register_message_processor(message_processor)
+
+        start = self.loop.time()
+        response = await self.client.post('/webhook', data=json.dumps(build_raw_update(1)))
+        self.assertEqual(response.status, 200)
+        self.assertEqual(await response.read(), b'')
+        self.assertLess(self.loop.time() - start, 0.5)
+
+    async def test_reply_after_timeout(self):
+        self.server.reply_timeout = 0.01
+        sent = self.loop.create_future()
+
+        async def message_processor(message):
+            await asyncio.sleep(0.05)
+            sent.set_result(await self.bot.send_message(chat_id=message.chat.id, text='late'))
+
+        self.bot.register_message_processor(message_processor)
+
+        response = await self.client.post('/webhook', data=json.dumps(build_raw_update(1)))
+        self.assertEqual(await response.read(), b'')
+
+        self.assertIsInstance(await sent, Message)
+        self.assertEqual(self.server.replies_in_response, 0)
+
+    async def test_other_chat_reply(self):
+        async def message_processor(message):
+            await self.bot.send_message(chat_id=12345, text='other chat')
+
+        self.bot.register_message_processor(message_processor)
+
+        response = await self.client.post('/webhook', data=json.dumps(build_raw_update(1)))
+        self.assertEqual(await response.read(), b'')
+
+
+class WebhookServerStartTests(TestCase):
+
+    def setUp(self):
+        self.bot = Bot('testtoken',
+                       client_plugins=[Mock()],
+                       spec=mock_spec,
+                       loop=self.loop)
+        self.server = WebhookServer(self.bot, path='/hook/', keepalive_timeout=5)
+
+    async def test_start_stop(self):
+        processed = self.loop.create_future()
+
+        async def update_processor(update):
+            processed.set_result(update.update_id)
+            return True
+
+        self.bot.register_update_processor(update_processor)
+
+        await self.server.start(host='127.0.0.1', port=0)
+        try:
+            port = self.server.addresses[0][1]
+            with ClientSession(loop=self.loop) as session:
+                response = await session.post('http://127.0.0.1:{}/hook/'.format(port),
+                                              data=json.dumps(build_raw_update(5)))
+                self.assertEqual(response.status, 200)
+                response.release()
+        finally:
+            await self.server.stop()
+
+        self.assertEqual(await processed, 5)
+
+    async def test_start_gets_me(self):
+        executed = []
+
+        async def start(message):
+            executed.append(message.text)
+
+        self.bot.register_command('start', start)
+
+        await self.server.start(host='127.0.0.1', port=0)
+        try:
+            self.assertEqual(self.bot.me.username, 'telebot')
+            port = self.server.addresses[0][1]
+            with ClientSession(loop=self.loop) as session:
+                for i, text in enumerate(['/start@otherbot', '/start@telebot']):
+                    raw_update = build_raw_update(i, text=text)
+                    raw_update['message']['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text)}]
+                    response = await session.post('http://127.0.0.1:{}/hook/'.format(port),
+                                                  data=json.dumps(raw_update))
+                    self.assertEqual(response.status, 200)
+                    response.release()
+        finally:
+            await self.server.stop()
+
+        self.assertEqual(executed, ['/start@telebot'])